@@ -1,12 +1,18 @@
 import PyInstaller.__main__
+import shutil
 import sys
 import os
 
+# --onedir (not --onefile): a one-file exe re-extracts the whole bundle to a
+# temp dir on every launch, which dominates cold-start time. The folder build
+# starts directly and is zipped below so there is still a single asset to ship.
 PyInstaller.__main__.run([
     'run.py',
     '--name=GIF-Maker',
     '--windowed',
-    '--onefile',
+    '--onedir',
+    '--noupx',
+    '--contents-directory=_internal',
     '--icon=src/assets/icon.png',
     '--add-data=src;src',
     '--hidden-import=PIL._tkinter_finder',
@@ -15,3 +21,7 @@ PyInstaller.__main__.run([
     '--noconfirm',
 ])
 
+archive = shutil.make_archive(
+    os.path.join('dist', 'GIF-Maker'), 'zip', root_dir='dist', base_dir='GIF-Maker'
+)
+print(f"Packaged {archive}")
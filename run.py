@@ -6,15 +6,18 @@ GIF Maker - Quick Launch Script
     python run.py
 """
 
+import multiprocessing
 import sys
 from pathlib import Path
 
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.main import main
-
 if __name__ == '__main__':
+    # Batch processing uses worker processes; frozen builds need this so the
+    # workers don't re-launch the GUI.
+    multiprocessing.freeze_support()
+
     print("=" * 60)
     print("GIF Maker - Animation Editor")
     print("=" * 60)
@@ -22,6 +25,9 @@ if __name__ == '__main__':
     print()
     
     try:
+        # Imported only after the banner so the user gets immediate feedback
+        # while PyQt6/Pillow load.
+        from src.main import main
         main()
     except ImportError as e:
         print("error: missing necessary dependencies")
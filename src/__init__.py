@@ -6,16 +6,23 @@ A powerful GIF animation editor for game developers and animators.
 __version__ = '1.0.0'
 __author__ = 'Aaron Cheng'
 
-from . import core
-from . import i18n
-from . import settings
-
-try:
-    from . import widgets
-except ImportError:
-    # PyQt6 not installed — fine for headless uses (e.g. `python -m src.cli`)
-    # that only need src.core, not the GUI.
-    widgets = None
+import importlib
 
 __all__ = ['core', 'widgets', 'i18n', 'settings']
 
+
+def __getattr__(name):
+    # Subpackages load on first access so launching the app (or the CLI)
+    # doesn't pay for Pillow/PyQt6 imports before they are needed.
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        module = importlib.import_module(f".{name}", __name__)
+    except ImportError:
+        if name != 'widgets':
+            raise
+        # PyQt6 not installed — fine for headless uses (e.g. `python -m src.cli`)
+        # that only need src.core, not the GUI.
+        module = None
+    globals()[name] = module
+    return module
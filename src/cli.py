@@ -14,6 +14,7 @@ from pathlib import Path
 from typing import List, Optional, Tuple
 
 from .core.batch_processor import BatchProcessor
+from .core.gif_builder import QUANTIZE_METHODS
 from .core.template_manager import TemplateManager
 
 
@@ -53,10 +54,17 @@ def build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--tile-width", type=int, default=64, help="Tile width in px (split-mode=size)")
     parser.add_argument("--tile-height", type=int, default=64, help="Tile height in px (split-mode=size)")
     parser.add_argument("--color-count", type=int, default=256, help="GIF palette size (default: 256)")
+    parser.add_argument("--quantize", choices=QUANTIZE_METHODS, default="adaptive",
+                         help="Palette quantizer: adaptive (median cut), fastoctree (much "
+                              "faster), libimagequant (best quality if Pillow has it, "
+                              "else fastoctree) or auto (fastoctree for transparent, "
+                              "median cut + k-means for opaque output). Default: adaptive")
     parser.add_argument("--output-width", type=int, default=None, help="Override output GIF width")
     parser.add_argument("--output-height", type=int, default=None, help="Override output GIF height")
     parser.add_argument("--positions", nargs="+", metavar="ROW,COL", default=None,
                          help="Only use these tile positions, e.g. --positions 0,0 0,1")
+    parser.add_argument("--workers", type=int, default=None,
+                         help="Worker processes for the batch (default: one per CPU core; 1 = serial)")
     return parser
 
 
@@ -106,6 +114,8 @@ def main(argv: Optional[List[str]] = None) -> int:
         selected_positions=positions,
         output_width=args.output_width,
         output_height=args.output_height,
+        max_workers=args.workers,
+        quantize=args.quantize,
     )
 
     print(f"\nDone: {len(successful)} succeeded, {len(failed)} failed.")
@@ -1,35 +1,65 @@
-from .utils import *
-from .image_loader import ImageLoader, MaterialManager
-from .gif_builder import GifBuilder
-from .template_manager import TemplateManager
-from .batch_processor import BatchProcessor, BatchProcessingError
-from .group_manager import GroupManager
-from .video_to_gif import (
-    VideoConversionError,
-    find_ffmpeg,
-    is_ffmpeg_available,
-    get_ffmpeg_install_info,
-    get_video_info,
-)
-from .composition_group import (
-    CompositionGroup,
-    FrameEntry,
-    SubGroupEntry,
-    LayerBlockEntry,
-    FrameSlot,
-    GroupSlot,
-    Slot,
-    Entry,
-    is_frame_entry,
-    is_sub_group_entry,
-    is_layer_block_entry,
-    is_frame_slot,
-    is_group_slot,
-    slot_to_dict, slot_from_dict,
-    entry_to_dict, entry_from_dict,
-    group_to_dict, group_from_dict,
-    max_material_index, remap_material_indices,
-)
+"""Core (GUI-free) building blocks.
+
+Submodules are imported on first attribute access (PEP 562), so importing
+``src.core`` — or one name from it — does not pull in every module (and
+their Pillow/NumPy/subprocess dependencies) up front.
+"""
+import importlib
+
+# public name -> submodule that defines it
+_LAZY_ATTRS = {
+    'ensure_rgba': 'utils',
+    'resize_image': 'utils',
+    'resize_rgba': 'utils',
+    'create_background': 'utils',
+    'paste_center': 'utils',
+    'paste_center_inplace': 'utils',
+    'validate_image_file': 'utils',
+    'ImageLoader': 'image_loader',
+    'MaterialManager': 'image_loader',
+    'GifBuilder': 'gif_builder',
+    'TemplateManager': 'template_manager',
+    'BatchProcessor': 'batch_processor',
+    'BatchProcessingError': 'batch_processor',
+    'GroupManager': 'group_manager',
+    'VideoConversionError': 'video_to_gif',
+    'find_ffmpeg': 'video_to_gif',
+    'is_ffmpeg_available': 'video_to_gif',
+    'get_ffmpeg_install_info': 'video_to_gif',
+    'get_video_info': 'video_to_gif',
+    **{name: 'composition_group' for name in (
+        'CompositionGroup',
+        'FrameEntry',
+        'SubGroupEntry',
+        'LayerBlockEntry',
+        'FrameSlot',
+        'GroupSlot',
+        'Slot',
+        'Entry',
+        'is_frame_entry',
+        'is_sub_group_entry',
+        'is_layer_block_entry',
+        'is_frame_slot',
+        'is_group_slot',
+        'slot_to_dict', 'slot_from_dict',
+        'entry_to_dict', 'entry_from_dict',
+        'group_to_dict', 'group_from_dict',
+        'max_material_index', 'remap_material_indices',
+    )},
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
 
 __all__ = [
     'ImageLoader',
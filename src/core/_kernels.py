@@ -0,0 +1,261 @@
+"""
+Per-pixel kernels used on the frame-export hot path.
+
+When numba is installed the kernels are JIT-compiled (rows split across
+cores with prange, compiled code cached on disk so the JIT cost is paid
+once per install rather than per run). Without numba the same maths runs
+as plain NumPy, except alpha-over, which then goes through Pillow's paste
+(same rounding, one C pass), and the GIF LZW encoder, which falls back to
+a pure-Python loop.
+"""
+import numpy as np
+from PIL import Image
+
+try:
+    import numba
+except ImportError:  # optional dependency
+    numba = None
+
+
+def _alpha_over_numpy(rgba: np.ndarray, bg_rgb: np.ndarray) -> np.ndarray:
+    """NumPy version of ``alpha_over``."""
+    a = rgba[..., 3:4].astype(np.uint16)
+    rgb = (rgba[..., :3] * a + bg_rgb.astype(np.uint16) * (255 - a) + 127) // 255
+    return rgb.astype(np.uint8)
+
+
+def _alpha_over_pil(rgba: np.ndarray, bg_rgb: np.ndarray) -> np.ndarray:
+    """``alpha_over`` without numba.
+
+    ``Image.paste`` with the image as its own mask blends with exactly the
+    rounding of ``_alpha_over_numpy`` but in a single C loop, about 5x
+    faster than the several uint16 passes NumPy needs.
+    """
+    src = Image.fromarray(np.ascontiguousarray(rgba, dtype=np.uint8), "RGBA")
+    out = Image.new("RGB", src.size, tuple(int(c) for c in bg_rgb))
+    out.paste(src, (0, 0), src)
+    return np.array(out)
+
+
+def _chroma_key_numpy(rgba: np.ndarray, key_rgb, threshold: int) -> None:
+    """NumPy version of ``chroma_key``."""
+    # Squared distance is separable per channel, so each channel is one
+    # lookup in a 256-entry table of (v - key)²: exact, and no per-pixel
+    # subtract/multiply. Compared against threshold² so no sqrt is needed.
+    values = np.arange(256, dtype=np.int32)
+    dist_sq = None
+    for channel, key in enumerate(key_rgb):
+        part = ((values - int(key)) ** 2)[rgba[..., channel]]
+        if dist_sq is None:
+            dist_sq = part
+        else:
+            dist_sq += part
+    rgba[..., 3][dist_sq <= threshold * threshold] = 0
+
+
+_MAX_CODE = 4096  # 12-bit LZW code space
+
+
+def _lzw_compress_python(indices: bytes, min_code_size: int) -> bytes:
+    """Pure-Python version of ``lzw_compress``."""
+    clear = 1 << min_code_size
+    end = clear + 1
+
+    out = bytearray()
+    bits = 0       # pending bits, LSB first
+    n_bits = 0
+    code_size = min_code_size + 1
+    next_code = end + 1
+    table = {}     # (prefix_code << 8 | index) -> code
+
+    def emit(code):
+        nonlocal bits, n_bits
+        bits |= code << n_bits
+        n_bits += code_size
+        while n_bits >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            n_bits -= 8
+
+    emit(clear)
+    prefix = None
+    for pixel in indices:
+        if prefix is None:
+            prefix = pixel
+            continue
+        key = (prefix << 8) | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        emit(prefix)
+        table[key] = next_code
+        next_code += 1
+        if next_code > (1 << code_size) and code_size < 12:
+            code_size += 1
+        elif next_code == _MAX_CODE:
+            # Table full: tell the decoder to start over
+            emit(clear)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = pixel
+
+    if prefix is not None:
+        emit(prefix)
+        # The decoder adds one more table entry after reading that code
+        # (unless it directly follows a clear), which can widen the end code.
+        if table and next_code == (1 << code_size) and code_size < 12:
+            code_size += 1
+    emit(end)
+    if n_bits:
+        out.append(bits & 0xFF)
+    return bytes(out)
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def _alpha_over_kernel(rgba, bg_rgb, out):
+        height, width = rgba.shape[0], rgba.shape[1]
+        for y in numba.prange(height):
+            for x in range(width):
+                a = np.int32(rgba[y, x, 3])
+                for c in range(3):
+                    out[y, x, c] = (
+                        np.int32(rgba[y, x, c]) * a + np.int32(bg_rgb[c]) * (255 - a) + 127
+                    ) // 255
+
+    def alpha_over(rgba: np.ndarray, bg_rgb: np.ndarray) -> np.ndarray:
+        """Composite an (H, W, 4) uint8 RGBA array over a solid RGB colour.
+
+        Returns an (H, W, 3) uint8 array: ``(rgb*a + bg*(255-a) + 127) // 255``.
+        """
+        out = np.empty(rgba.shape[:2] + (3,), dtype=np.uint8)
+        _alpha_over_kernel(np.ascontiguousarray(rgba), bg_rgb.astype(np.uint8), out)
+        return out
+
+    @numba.njit(parallel=True, cache=True)
+    def _chroma_key_kernel(pixels, kr, kg, kb, t2):
+        for i in numba.prange(pixels.shape[0]):
+            dr = np.int32(pixels[i, 0]) - kr
+            dg = np.int32(pixels[i, 1]) - kg
+            db = np.int32(pixels[i, 2]) - kb
+            if dr * dr + dg * dg + db * db <= t2:
+                pixels[i, 3] = 0
+
+    def chroma_key(rgba: np.ndarray, key_rgb, threshold: int) -> None:
+        """Zero the alpha of every pixel within *threshold* (Euclidean RGB
+        distance) of *key_rgb*, in place.
+
+        *rgba* is a writable uint8 array of shape (..., 4): one image
+        (H, W, 4) or a stack of equally sized frames (F, H, W, 4).
+        """
+        if not rgba.flags.c_contiguous:
+            _chroma_key_numpy(rgba, key_rgb, threshold)
+            return
+        kr, kg, kb = (int(c) for c in key_rgb)
+        _chroma_key_kernel(rgba.reshape(-1, 4), kr, kg, kb, int(threshold) ** 2)
+
+    @numba.njit(cache=True)
+    def _lzw_kernel(indices, min_code_size, out):
+        # Same steps as _lzw_compress_python; the code table is a flat
+        # (prefix_code << 8 | index) -> code array, and a clear resets only
+        # the entries added since the last one.
+        clear = 1 << min_code_size
+        end = clear + 1
+        table = np.full(_MAX_CODE << 8, -1, dtype=np.int16)
+        added = np.empty(_MAX_CODE, dtype=np.int32)
+        n_added = 0
+        pos = 0
+        bits = np.int64(0)
+        n_bits = 0
+        code_size = min_code_size + 1
+        next_code = end + 1
+
+        bits |= np.int64(clear) << n_bits
+        n_bits += code_size
+        while n_bits >= 8:
+            out[pos] = bits & 0xFF
+            pos += 1
+            bits >>= 8
+            n_bits -= 8
+
+        prefix = -1
+        for i in range(indices.shape[0]):
+            pixel = np.int32(indices[i])
+            if prefix < 0:
+                prefix = pixel
+                continue
+            key = (prefix << 8) | pixel
+            code = table[key]
+            if code >= 0:
+                prefix = code
+                continue
+
+            bits |= np.int64(prefix) << n_bits
+            n_bits += code_size
+            while n_bits >= 8:
+                out[pos] = bits & 0xFF
+                pos += 1
+                bits >>= 8
+                n_bits -= 8
+            table[key] = next_code
+            added[n_added] = key
+            n_added += 1
+            next_code += 1
+            if next_code > (1 << code_size) and code_size < 12:
+                code_size += 1
+            elif next_code == _MAX_CODE:
+                bits |= np.int64(clear) << n_bits
+                n_bits += code_size
+                while n_bits >= 8:
+                    out[pos] = bits & 0xFF
+                    pos += 1
+                    bits >>= 8
+                    n_bits -= 8
+                for j in range(n_added):
+                    table[added[j]] = -1
+                n_added = 0
+                code_size = min_code_size + 1
+                next_code = end + 1
+            prefix = pixel
+
+        if prefix >= 0:
+            bits |= np.int64(prefix) << n_bits
+            n_bits += code_size
+            while n_bits >= 8:
+                out[pos] = bits & 0xFF
+                pos += 1
+                bits >>= 8
+                n_bits -= 8
+            if n_added > 0 and next_code == (1 << code_size) and code_size < 12:
+                code_size += 1
+        bits |= np.int64(end) << n_bits
+        n_bits += code_size
+        while n_bits > 0:
+            out[pos] = bits & 0xFF
+            pos += 1
+            bits >>= 8
+            n_bits -= 8
+        return pos
+
+    def lzw_compress(indices: bytes, min_code_size: int) -> bytes:
+        """LZW-compress palette indices the way GIF image data expects.
+
+        Codes are variable width (min_code_size + 1 up to 12 bits), packed
+        LSB-first; a clear code is emitted whenever the code table fills up.
+
+        Returns:
+            The packed code stream (not yet split into sub-blocks).
+        """
+        data = np.frombuffer(indices, dtype=np.uint8)
+        # At most one code (<= 12 bits) per index, plus clear codes
+        out = np.empty(2 * len(data) + 16, dtype=np.uint8)
+        return out[:_lzw_kernel(data, min_code_size, out)].tobytes()
+
+else:
+    alpha_over = _alpha_over_pil
+    chroma_key = _chroma_key_numpy
+    lzw_compress = _lzw_compress_python
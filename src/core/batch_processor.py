@@ -1,18 +1,27 @@
 """
 Batch processor - generate GIFs from multiple images using a composition template.
 
+Once per batch
+──────────────
+Validate the template, restore its GroupManager (material indices = tile
+positions) and configure a GifBuilder from its settings.
+
 Workflow per image
 ──────────────────
 1. Load image and split into tiles.
 2. (Optional) filter tiles by selected positions.
 3. Create a temporary MaterialManager populated with the tile images.
-4. Restore a GroupManager from the template (material indices = tile positions).
+4. Check the template's required tile count.
 5. Build GIF with GifBuilder.build_gif_from_group().
 6. Save to output path.
 """
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional, Tuple, Callable
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 
 from .image_loader import ImageLoader, MaterialManager
@@ -24,6 +33,22 @@ class BatchProcessingError(Exception):
     pass
 
 
+class _TemplateJob:
+    """Everything derived from the template, built once per batch.
+
+    The restored GroupManager and configured GifBuilder are only read while
+    rendering, so every image of the batch (and every worker process, which
+    receives a pickled copy) can share them.
+    """
+
+    def __init__(self, group_manager, root_group_id: int, required_tiles: int,
+                 gif_builder: GifBuilder):
+        self.group_manager = group_manager
+        self.root_group_id = root_group_id
+        self.required_tiles = required_tiles
+        self.gif_builder = gif_builder
+
+
 class BatchProcessor:
 
     def __init__(self):
@@ -38,8 +63,44 @@ class BatchProcessor:
 
     # ─────────────────────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _prepare_template_job(
+        template: Dict[str, Any],
+        color_count: int = 256,
+        output_width: Optional[int] = None,
+        output_height: Optional[int] = None,
+        quantize: str = "adaptive",
+    ) -> _TemplateJob:
+        """Validate and restore *template* and set up the GifBuilder for it.
+
+        Raises BatchProcessingError / ValueError if the template is unusable.
+        """
+        TemplateManager.validate_template(template)
+        required = TemplateManager.estimate_required_tiles(template)
+        group_manager, settings = TemplateManager.import_composition_template(template)
+
+        root_gid = group_manager.get_root_group_id()
+        if root_gid is None:
+            raise BatchProcessingError("Template has no root group")
+
+        gif_builder = GifBuilder()
+
+        w = output_width if output_width is not None else settings.get("output_width", 256)
+        h = output_height if output_height is not None else settings.get("output_height", 256)
+        gif_builder.set_output_size(w, h)
+        gif_builder.set_loop(settings.get("loop_count", 0))
+        gif_builder.set_color_count(color_count)
+        gif_builder.set_quantize_method(quantize)
+
+        if settings.get("transparent_bg", False):
+            gif_builder.set_background_color(0, 0, 0, 0)
+        else:
+            gif_builder.set_background_color(255, 255, 255, 255)
+
+        return _TemplateJob(group_manager, root_gid, required, gif_builder)
+
+    @staticmethod
     def process_single_image(
-        self,
         image_path: str,
         template: Dict[str, Any],
         split_mode: str,
@@ -52,6 +113,7 @@ class BatchProcessor:
         selected_positions: Optional[List[Tuple[int, int]]] = None,
         output_width: Optional[int] = None,
         output_height: Optional[int] = None,
+        quantize: str = "adaptive",
     ) -> str:
         """
         Process one image into a GIF using a composition template.
@@ -59,67 +121,83 @@ class BatchProcessor:
         Returns the path of the created GIF.
         Raises BatchProcessingError on failure.
         """
+        try:
+            job = BatchProcessor._prepare_template_job(
+                template, color_count, output_width, output_height, quantize
+            )
+        except BatchProcessingError:
+            raise
+        except Exception as e:
+            import traceback
+            msg = f"Failed to process {Path(image_path).name}: {e}\n{traceback.format_exc()}"
+            print(msg)
+            raise BatchProcessingError(msg)
+
+        return BatchProcessor._process_image(
+            image_path, job,
+            split_mode, split_rows, split_cols,
+            tile_width, tile_height,
+            output_path, selected_positions,
+        )
+
+    @staticmethod
+    def _process_image(
+        image_path: str,
+        job: _TemplateJob,
+        split_mode: str,
+        split_rows: int,
+        split_cols: int,
+        tile_width: int,
+        tile_height: int,
+        output_path: Optional[str] = None,
+        selected_positions: Optional[List[Tuple[int, int]]] = None,
+    ) -> str:
+        """Render one image with an already prepared template job."""
         try:
             # ── 1. Load + split ───────────────────────────────────────────────
+            # Tiles stay NumPy arrays (views into the image) until they are
+            # handed to the MaterialManager, which keeps the array form.
             image = ImageLoader.load_image(image_path)
+            img_w, img_h = image.size
 
             if split_mode == "grid":
-                tiles = ImageLoader.split_into_tiles(image, split_rows, split_cols)
+                rows, cols = split_rows, split_cols
+                tile_w, tile_h = img_w // cols, img_h // rows
             else:
-                tiles = ImageLoader.split_by_tile_size(image, tile_width, tile_height)
+                tile_w, tile_h = tile_width, tile_height
+                rows, cols = img_h // tile_h, img_w // tile_w
+
+            tiles = ImageLoader.split_into_tile_array(image, rows, cols, tile_w, tile_h)
 
             # ── 2. Filter tiles ───────────────────────────────────────────────
             if selected_positions:
-                cols = split_cols if split_mode == "grid" else (image.size[0] // tile_width)
-                filtered = []
-                for row, col in selected_positions:
-                    idx = row * cols + col
-                    if idx < len(tiles):
-                        filtered.append(tiles[idx])
-                tiles = filtered
-
-            if not tiles:
+                # One gather over the (N, th, tw, 4) tile array
+                positions = np.asarray(selected_positions, dtype=np.intp).reshape(-1, 2)
+                indices = positions[:, 0] * cols + positions[:, 1]
+                tiles = tiles[indices[indices < len(tiles)]]
+
+            if len(tiles) == 0:
                 raise BatchProcessingError("No tiles generated after filtering")
 
             # ── 3. Temporary MaterialManager ──────────────────────────────────
             mm = MaterialManager()
             stem = Path(image_path).stem
             for i, tile in enumerate(tiles):
-                mm.add_material(tile, f"{stem}_tile_{i}")
+                mm.add_material_array(tile, f"{stem}_tile_{i}")
 
-            # ── 4. Validate and restore GroupManager ──────────────────────────
-            TemplateManager.validate_template(template)
-
-            required = TemplateManager.estimate_required_tiles(template)
-            if len(mm) < required:
+            # ── 4. Check tile count against the template ──────────────────────
+            if len(mm) < job.required_tiles:
                 raise BatchProcessingError(
-                    f"Template requires {required} tiles; only {len(mm)} generated"
+                    f"Template requires {job.required_tiles} tiles; only {len(mm)} generated"
                 )
 
-            group_manager, settings = TemplateManager.import_composition_template(template)
-
             # ── 5. Build GIF ──────────────────────────────────────────────────
-            gif_builder = GifBuilder()
-
-            w = output_width if output_width is not None else settings.get("output_width", 256)
-            h = output_height if output_height is not None else settings.get("output_height", 256)
-            gif_builder.set_output_size(w, h)
-            gif_builder.set_loop(settings.get("loop_count", 0))
-            gif_builder.set_color_count(color_count)
-
-            if settings.get("transparent_bg", False):
-                gif_builder.set_background_color(0, 0, 0, 0)
-            else:
-                gif_builder.set_background_color(255, 255, 255, 255)
-
             if output_path is None:
                 output_path = str(Path(image_path).with_suffix(".gif"))
 
-            root_gid = group_manager.get_root_group_id()
-            if root_gid is None:
-                raise BatchProcessingError("Template has no root group")
-
-            gif_builder.build_gif_from_group(root_gid, group_manager, mm, output_path)
+            job.gif_builder.build_gif_from_group(
+                job.root_group_id, job.group_manager, mm, output_path
+            )
             return output_path
 
         except BatchProcessingError:
@@ -146,39 +224,88 @@ class BatchProcessor:
         selected_positions: Optional[List[Tuple[int, int]]] = None,
         output_width: Optional[int] = None,
         output_height: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        quantize: str = "adaptive",
     ) -> Tuple[List[str], List[Tuple[str, str]]]:
         """
         Process multiple images into GIFs with the same template.
 
+        Every image is an independent load → split → build pipeline, so with
+        more than one worker the images are spread over a process pool and
+        progress is reported as each one completes.
+
+        Args:
+            max_workers: Number of worker processes. None = one per CPU core
+                         (capped at the number of images); 1 = run serially
+                         in this process.
+            quantize: Palette quantizer: "adaptive" (median cut),
+                      "fastoctree" (much faster on large batches),
+                      "libimagequant" (best palettes when available) or
+                      "auto" (chosen by the template's background).
+
         Returns (successful_paths, [(img_path, error_msg), ...]).
         """
         successful: List[str] = []
         failed: List[Tuple[str, str]] = []
         total = len(image_paths)
 
-        for idx, image_path in enumerate(image_paths, 1):
-            try:
-                self._report_progress(idx, total, f"Processing {Path(image_path).name}")
-
-                out = (
-                    str(Path(output_directory) / f"{Path(image_path).stem}.gif")
-                    if output_directory
-                    else None
-                )
-
-                result = self.process_single_image(
-                    image_path, template,
-                    split_mode, split_rows, split_cols,
-                    tile_width, tile_height,
-                    color_count, out, selected_positions,
-                    output_width, output_height,
-                )
-                successful.append(result)
-                self._report_progress(idx, total, f"Done {Path(image_path).name}")
-
-            except Exception as e:
+        # The template is identical for every image: parse it once.
+        try:
+            job = self._prepare_template_job(
+                template, color_count, output_width, output_height, quantize
+            )
+        except Exception as e:
+            for idx, image_path in enumerate(image_paths, 1):
                 failed.append((image_path, str(e)))
                 self._report_progress(idx, total, f"Failed {Path(image_path).name}: {e}")
+            return successful, failed
+
+        def job_args(image_path: str) -> tuple:
+            out = (
+                str(Path(output_directory) / f"{Path(image_path).stem}.gif")
+                if output_directory
+                else None
+            )
+            return (
+                image_path, job,
+                split_mode, split_rows, split_cols,
+                tile_width, tile_height,
+                out, selected_positions,
+            )
+
+        if max_workers is None:
+            max_workers = min(total, os.cpu_count() or 1)
+
+        if max_workers <= 1:
+            for idx, image_path in enumerate(image_paths, 1):
+                try:
+                    self._report_progress(idx, total, f"Processing {Path(image_path).name}")
+                    result = self._process_image(*job_args(image_path))
+                    successful.append(result)
+                    self._report_progress(idx, total, f"Done {Path(image_path).name}")
+
+                except Exception as e:
+                    failed.append((image_path, str(e)))
+                    self._report_progress(idx, total, f"Failed {Path(image_path).name}: {e}")
+
+            return successful, failed
+
+        # "spawn" avoids forking a process that may be running Qt threads.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(BatchProcessor._process_image, *job_args(image_path)): image_path
+                for image_path in image_paths
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                image_path = futures[future]
+                try:
+                    successful.append(future.result())
+                    self._report_progress(done, total, f"Done {Path(image_path).name}")
+
+                except Exception as e:
+                    failed.append((image_path, str(e)))
+                    self._report_progress(done, total, f"Failed {Path(image_path).name}: {e}")
 
         return successful, failed
 
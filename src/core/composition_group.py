@@ -10,10 +10,12 @@ Groups can be nested; preview and export target the currently selected group.
 from dataclasses import dataclass, field
 from typing import List, Optional, Union
 
+from .utils import DATACLASS_SLOTS
+
 
 # ----- Slots (used inside a timeline of a LayerBlock) -----
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FrameSlot:
     """Single frame in a timeline slot: material + position."""
     material_index: int
@@ -21,7 +23,7 @@ class FrameSlot:
     y: int = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class GroupSlot:
     """Reference to a group in a timeline slot; loop_count applies when expanding."""
     group_id: int
@@ -48,7 +50,7 @@ Timeline = List[Slot]
 
 # ----- Entries (items in a CompositionGroup's sequence) -----
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FrameEntry:
     """Single frame entry: one material at (x, y) with optional duration."""
     material_index: int
@@ -57,7 +59,7 @@ class FrameEntry:
     duration_ms: Optional[int] = None  # None = use group default_duration
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SubGroupEntry:
     """Reference to another group; expand that group, then repeat loop_count times.
     x, y shift every material in the expanded frames by this offset.
@@ -69,7 +71,7 @@ class SubGroupEntry:
     duration_override_ms: Optional[int] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class LayerBlockEntry:
     """Multiple timelines composited frame-by-frame (same length). At index i, composite all timeline[i]."""
     timelines: List[Timeline] = field(default_factory=list)
@@ -121,14 +123,17 @@ def slot_to_dict(slot: "Slot") -> dict:
     raise ValueError(f"Unknown slot type: {type(slot)}")
 
 
+# The *_from_dict readers run once per slot/entry of a template and pass
+# fields positionally, in declaration order: keyword calls into the
+# generated dataclass __init__ cost about twice as much.
+
 def slot_from_dict(d: dict) -> "Slot":
     t = d.get("type")
     if t == "frameslot":
-        return FrameSlot(material_index=d["material_index"],
-                         x=d.get("x", 0), y=d.get("y", 0))
+        return FrameSlot(d["material_index"], d.get("x", 0), d.get("y", 0))
     if t == "groupslot":
-        return GroupSlot(group_id=d["group_id"], loop_count=d.get("loop_count", 1),
-                         x=d.get("x", 0), y=d.get("y", 0))
+        return GroupSlot(d["group_id"], d.get("loop_count", 1),
+                         d.get("x", 0), d.get("y", 0))
     raise ValueError(f"Unknown slot type: {t!r}")
 
 
@@ -149,17 +154,16 @@ def entry_to_dict(entry: "Entry") -> dict:
 def entry_from_dict(d: dict) -> "Entry":
     t = d.get("type")
     if t == "frame":
-        return FrameEntry(material_index=d["material_index"],
-                          x=d.get("x", 0), y=d.get("y", 0),
-                          duration_ms=d.get("duration_ms"))
+        return FrameEntry(d["material_index"], d.get("x", 0), d.get("y", 0),
+                          d.get("duration_ms"))
     if t == "subgroup":
-        return SubGroupEntry(group_id=d["group_id"], loop_count=d.get("loop_count", 1),
-                             x=d.get("x", 0), y=d.get("y", 0),
-                             duration_override_ms=d.get("duration_override_ms"))
+        return SubGroupEntry(d["group_id"], d.get("loop_count", 1),
+                             d.get("x", 0), d.get("y", 0),
+                             d.get("duration_override_ms"))
     if t == "layerblock":
         return LayerBlockEntry(
-            timelines=[[slot_from_dict(s) for s in tl] for tl in d.get("timelines", [])],
-            default_duration_ms=d.get("default_duration_ms", 100),
+            [[slot_from_dict(s) for s in tl] for tl in d.get("timelines", [])],
+            d.get("default_duration_ms", 100),
         )
     raise ValueError(f"Unknown entry type: {t!r}")
 
@@ -198,12 +202,20 @@ def max_material_index(gm: "GroupManager") -> int:  # type: ignore[name-defined]
 
 def remap_material_indices(gm: "GroupManager", mapping: dict) -> None:  # type: ignore[name-defined]
     """Remap material indices in-place using {old_idx: new_idx} mapping."""
+    # Entries that map to themselves need no write; with none left the
+    # walk over every entry and slot can be skipped entirely.
+    mapping = {old: new for old, new in mapping.items() if old != new}
+    if not mapping:
+        return
+    get = mapping.get
     for group in gm.groups:
         for entry in group.entries:
             if isinstance(entry, FrameEntry):
-                entry.material_index = mapping.get(entry.material_index, entry.material_index)
+                index = entry.material_index
+                entry.material_index = get(index, index)
             elif isinstance(entry, LayerBlockEntry):
                 for tl in entry.timelines:
                     for slot in tl:
                         if isinstance(slot, FrameSlot):
-                            slot.material_index = mapping.get(slot.material_index, slot.material_index)
+                            index = slot.material_index
+                            slot.material_index = get(index, index)
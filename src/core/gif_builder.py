@@ -1,8 +1,24 @@
-from typing import List, Tuple, Optional, TYPE_CHECKING
+import functools
+import io
+import itertools
+import os
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Optional, Sequence, TYPE_CHECKING
 from pathlib import Path
 import numpy as np
 from PIL import Image
-from .utils import create_background, paste_center, ensure_rgba
+
+try:
+    import cv2
+except ImportError:  # optional: faster Lanczos downscales
+    cv2 = None
+
+from .utils import create_background, paste_center_inplace, ensure_rgba, resize_rgba
+from .gif_optimizer import is_gifsicle_available
+from ._kernels import alpha_over, chroma_key
+from .gif_writer import IndexedFrame, encode_gif, read_frame_delays
 from .sequence_editor import SequenceEditor, Frame
 from .image_loader import MaterialManager
 from .layer_system import LayeredFrame, LayerCompositor
@@ -25,6 +41,130 @@ if TYPE_CHECKING:
     from .group_manager import GroupManager
 
 
+# Frames prepared ahead of the GIF writer; bounds memory while keeping the
+# preparation threads busy.
+_PREFETCH_DEPTH = 8
+
+# Supported values for GifBuilder.encoder
+ENCODERS = ("pil", "gifsicle", "native")
+
+# Palette quantizers: "adaptive" is Pillow's median cut; "fastoctree" is
+# several times faster with slightly coarser palettes, which suits large
+# batches; "libimagequant" gives the best palettes but needs a Pillow built
+# with libimagequant (falls back to fastoctree otherwise); "auto" picks per
+# background: fastoctree for transparent output, median cut refined with
+# k-means for composited opaque RGB frames (frequency-tuned palettes give
+# longer LZW runs and smaller files).
+QUANTIZE_METHODS = ("adaptive", "fastoctree", "libimagequant", "auto")
+
+# Frames are shrunk to at most this many pixels per side before being
+# stacked into the montage a shared palette is learned from.
+_PALETTE_SAMPLE_SIDE = 128
+
+# Alpha -> paste mask for the transparency index: alpha < 128 becomes transparent
+_TRANSPARENT_MASK_LUT = [255] * 128 + [0] * 128
+
+# Alpha -> alpha for resized GIF frames: any coverage becomes fully opaque
+_COVERED_MASK_LUT = [0] + [255] * 255
+
+def _coalesce_frames(
+    frames: Iterable[Any], durations: List[int], same: Callable[[Any, Any], bool]
+) -> Iterator[Tuple[Any, int]]:
+    """Merge runs of identical consecutive frames into one longer frame.
+
+    Pillow's writer does this itself; the native and gifsicle encoders
+    would otherwise encode (and store) every repeat. Frames are streamed:
+    each one is yielded with its summed duration as soon as the next
+    differing frame arrives.
+
+    Args:
+        frames: GIF-ready frames, in order.
+        durations: Per-frame durations (ms); missing entries count as 100.
+        same: Equality test for two consecutive frames.
+    """
+    previous = None
+    total = 0
+    for i, frame in enumerate(frames):
+        duration = durations[i] if i < len(durations) else 100
+        if previous is not None and same(previous, frame):
+            total += duration
+            continue
+        if previous is not None:
+            yield previous, total
+        previous, total = frame, duration
+    if previous is not None:
+        yield previous, total
+
+
+class _CarryOverCache(dict):
+    """Per-call cache that can still serve the previous call's entries.
+
+    ``get`` falls back to the entries of the cache it replaced and copies a
+    hit over, so a preview followed by an export of the same project keys /
+    resizes each material only once. Entries nobody asked for again are
+    dropped at the next reset. Every entry records its source image and is
+    checked against it by the reader, so stale entries never match.
+    """
+
+    def __init__(self, previous: Optional[dict] = None):
+        super().__init__()
+        # Only the previous call's own entries, not what it carried over
+        self._previous = dict(previous) if previous else {}
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, default)
+        if value is default and key in self._previous:
+            value = self[key] = self._previous[key]
+        return value
+
+
+def _same_indexed_frame(a: IndexedFrame, b: IndexedFrame) -> bool:
+    return a[1] == b[1] and a[2] == b[2] and np.array_equal(a[0], b[0])
+
+
+def _same_image(a: Image.Image, b: Image.Image) -> bool:
+    return a is b or (
+        a.mode == b.mode
+        and a.size == b.size
+        and a.info.get("transparency") == b.info.get("transparency")
+        and a.getpalette() == b.getpalette()
+        and a.tobytes() == b.tobytes()
+    )
+
+
+def _has_transparency(img: Image.Image) -> bool:
+    """Whether *img* has pixels the GIF writer will make transparent."""
+    if "transparency" in img.info:
+        return True
+    if img.mode in ("RGBA", "LA", "PA"):
+        return img.getchannel("A").getextrema()[0] < 255
+    return False
+
+
+def _with_disposal(
+    items: Iterable[Any], disposal: int, is_transparent: Optional[Callable[[Any], bool]] = None
+) -> Iterator[Tuple[Any, int]]:
+    """Pair each frame with the GIF disposal method to write for it.
+
+    Frames get *disposal*, except that with *is_transparent* given, a frame
+    followed by a transparent one gets 2 (restore to background): left in
+    place, it would show through the holes of the next frame. This needs
+    one frame of lookahead, so each item is yielded once the next one has
+    arrived.
+    """
+    if is_transparent is None:
+        for item in items:
+            yield item, disposal
+        return
+    previous = None
+    for item in items:
+        if previous is not None:
+            yield previous, 2 if is_transparent(item) else disposal
+        previous = item
+    if previous is not None:
+        yield previous, disposal
+
+
 class GifBuilder:
     
     def __init__(self):
@@ -32,20 +172,77 @@ class GifBuilder:
         self.background_color: Tuple[int, int, int, int] = (255, 255, 255, 255)
         self.loop: int = 0
         self.optimize: bool = True
-        self.disposal: int = 2
+        self.disposal: Optional[int] = None  # GIF disposal method; None = auto (see save_gif)
         self.color_count: int = 256  # Default color palette size
         self.chroma_key_color: Optional[Tuple[int, int, int]] = None  # RGB color to make transparent
         self.chroma_key_threshold: int = 30  # Color similarity threshold (0-255)
+        self.encoder: str = "pil"  # GIF encoder backend, see ENCODERS
+        self.quantize_method: str = "adaptive"  # see QUANTIZE_METHODS
+        self.resample: Optional[int] = None  # Downscale filter; None = auto (see _downscale)
+        self.external_optimize: bool = True  # Optimize Pillow output with gifsicle if installed
+        self._bg_rgb: np.ndarray = np.array(self.background_color[:3], dtype=np.uint16)
+        # Blank output-size canvas shared by the layer compositor
+        # (see _background_template)
+        self._bg_template: Optional[Image.Image] = None
+        self._bg_template_key: Optional[tuple] = None
+        # Last prepared materials, shared by preview and export (see _prepare_materials)
+        self._prepared_cache: dict = {}
+        # Chroma-keyed materials / transformed layers of the current
+        # export or preview (see _layer_image, prepare_layered_frame)
+        self._layer_cache: dict = _CarryOverCache()
     
     def set_output_size(self, width: int, height: int):
         self.output_size = (width, height)
     
     def set_background_color(self, r: int, g: int, b: int, a: int = 255):
         self.background_color = (r, g, b, a)
+        self._bg_rgb = np.array((r, g, b), dtype=np.uint16)
     
     def set_loop(self, loop: int):
         self.loop = loop
     
+    def set_encoder(self, encoder: str):
+        """Select the GIF encoder backend.
+
+        Args:
+            encoder: "pil" (Pillow's built-in writer), "gifsicle" (external
+                binary, falls back to Pillow when it is not on PATH) or
+                "native" (experimental in-house GIF89a writer, see gif_writer;
+                its LZW loop is numba-compiled when numba is installed and
+                much slower than Pillow's without it)
+        """
+        if encoder not in ENCODERS:
+            raise ValueError(f"Unknown GIF encoder {encoder!r}; expected one of {ENCODERS}")
+        self.encoder = encoder
+    
+    def set_quantize_method(self, method: str):
+        """Select how per-frame / shared palettes are computed.
+
+        Args:
+            method: "adaptive" (median cut), "fastoctree", "libimagequant" or
+                "auto" (fastoctree / median cut + k-means by background)
+        """
+        if method not in QUANTIZE_METHODS:
+            raise ValueError(
+                f"Unknown quantize method {method!r}; expected one of {QUANTIZE_METHODS}"
+            )
+        self.quantize_method = method
+    
+    def set_external_optimize(self, enabled: bool):
+        """Run Pillow-encoded GIFs through ``gifsicle -O3`` when gifsicle is
+        on PATH (only while ``optimize`` is on; default: enabled)."""
+        self.external_optimize = enabled
+    
+    def set_resample_filter(self, resample: Optional[int]):
+        """Set the filter used to shrink materials larger than the output size.
+
+        Args:
+            resample: A ``PIL.Image.Resampling`` filter, or None (default) for
+                NEAREST on exact integer down-scales — which keeps pixel-art
+                sprites crisp — and LANCZOS otherwise.
+        """
+        self.resample = resample
+    
     def set_color_count(self, color_count: int):
         """Set the number of colors in the palette (256, 128, 64, 32, 16, etc.)"""
         self.color_count = color_count
@@ -64,95 +261,475 @@ class GifBuilder:
         """Remove chroma key effect"""
         self.chroma_key_color = None
     
-    def apply_chroma_key(self, image: Image.Image) -> Image.Image:
+    def apply_chroma_key(self, image) -> Image.Image:
         """Apply chroma key effect to an image, making specified color transparent.
 
         Uses NumPy vectorised operations instead of a per-pixel Python loop,
         giving ~100× speed-up on typical image sizes.
 
         Args:
-            image: Input image
+            image: Input image, or an (H, W, 4) RGBA array (e.g. from
+                ``MaterialManager.get_material_array``)
 
         Returns:
             Image with chroma key applied (RGBA format)
         """
-        if self.chroma_key_color is None:
-            return ensure_rgba(image)
+        if isinstance(image, np.ndarray):
+            if self.chroma_key_color is None:
+                return Image.fromarray(image, "RGBA")
+            arr = np.array(image, dtype=np.uint8)   # own copy; alpha is edited
+        else:
+            img = ensure_rgba(image)
+            if self.chroma_key_color is None:
+                return img
+            arr = np.array(img, dtype=np.uint8)     # shape (H, W, 4)
 
-        img = ensure_rgba(image)
-        arr = np.array(img, dtype=np.int32)   # shape (H, W, 4)
+        # Squared Euclidean distance in RGB against threshold², one fused
+        # pass (numba-compiled when numba is installed, NumPy otherwise)
+        chroma_key(arr, self.chroma_key_color, self.chroma_key_threshold)
 
-        tr, tg, tb = self.chroma_key_color
-        # Squared Euclidean distance in RGB; compare against threshold²
-        dist_sq = (
-            (arr[:, :, 0] - tr) ** 2
-            + (arr[:, :, 1] - tg) ** 2
-            + (arr[:, :, 2] - tb) ** 2
-        )
-        mask = dist_sq <= (self.chroma_key_threshold ** 2)
-        arr[:, :, 3] = np.where(mask, 0, arr[:, :, 3])
+        return Image.fromarray(arr, "RGBA")
+
+    def apply_chroma_key_batch(self, frames) -> List[Image.Image]:
+        """Apply the chroma key to many equally sized frames in one pass.
+
+        Args:
+            frames: An (F, H, W, 4) RGBA array (e.g. the tile stack from
+                ``ImageLoader.split_into_tile_array``) or a sequence of
+                images of the same size.
+
+        Returns:
+            One RGBA image per frame.
+        """
+        if isinstance(frames, np.ndarray):
+            stack = np.array(frames, dtype=np.uint8)   # own copy; alpha is edited
+        else:
+            frames = [np.asarray(ensure_rgba(f), dtype=np.uint8) for f in frames]
+            if not frames:
+                return []
+            stack = np.stack(frames)
+        if self.chroma_key_color is not None and stack.size:
+            chroma_key(stack, self.chroma_key_color, self.chroma_key_threshold)
+        return [Image.fromarray(frame, "RGBA") for frame in stack]
 
-        return Image.fromarray(arr.astype(np.uint8), "RGBA")
+    def _flatten_onto_background(self, img: Image.Image) -> Image.Image:
+        """Alpha-composite an RGBA image onto the solid background colour.
+
+        One fused pass (``_kernels.alpha_over``: numba-compiled when numba is
+        installed, a masked Pillow paste otherwise) replaces ``Image.new`` +
+        ``split`` + ``paste``.
+
+        Args:
+            img: RGBA source image
+
+        Returns:
+            RGB image of the same size
+        """
+        arr = np.asarray(img, dtype=np.uint8)
+        return Image.fromarray(alpha_over(arr, self._bg_rgb), "RGB")
     
+    def _quantize(self, rgb: Image.Image, colors: int) -> Image.Image:
+        """Reduce an RGB image to a *colors*-entry palette (P mode)."""
+        if self.quantize_method == "adaptive":
+            return rgb.convert("P", palette=Image.Palette.ADAPTIVE, colors=colors)
+        if self.quantize_method == "auto" and self.background_color[3] != 0:
+            return rgb.quantize(colors=colors, method=Image.Quantize.MEDIANCUT, kmeans=2)
+        if self.quantize_method == "libimagequant":
+            try:
+                return rgb.quantize(colors=colors, method=Image.Quantize.LIBIMAGEQUANT)
+            except ValueError:
+                pass  # Pillow was built without libimagequant
+        return rgb.quantize(colors=colors, method=Image.Quantize.FASTOCTREE)
+
+    @staticmethod
+    def _palette_sample(img: Image.Image) -> Image.Image:
+        """Shrink *img* (NEAREST, so no new colours appear) for palette learning."""
+        longest = max(img.size)
+        if longest <= _PALETTE_SAMPLE_SIDE:
+            return img
+        return img.resize(
+            (max(1, img.width * _PALETTE_SAMPLE_SIDE // longest),
+             max(1, img.height * _PALETTE_SAMPLE_SIDE // longest)),
+            Image.Resampling.NEAREST,
+        )
+
     # ------------------------------------------------------------------
     # Internal helper: convert a single composited RGBA image to the
     # palette/mode required for GIF output.
     # ------------------------------------------------------------------
-    def _convert_frame_for_gif(self, img: Image.Image) -> Image.Image:
+    def _convert_frame_for_gif(
+        self, img: Image.Image, palette: Optional[Image.Image] = None
+    ) -> Image.Image:
         """Convert a composited RGBA image to an appropriate mode for GIF saving.
 
-        * Transparent background → palette mode (P) with transparency index 255.
+        * Transparent background → palette mode (P); the transparency index is
+          the first entry after the palette's colours.
         * Solid background → alpha-composite onto the background colour, return RGB.
         * Non-RGBA input → returned unchanged.
 
+        Build loops pick the branch once with ``_frame_converter`` instead.
+
         Args:
             img: Source image (typically RGBA).
+            palette: Optional shared palette image (see
+                ``_build_shared_palette``). When given, the frame is remapped
+                onto it instead of computing its own adaptive palette, and
+                solid-background frames are returned in P mode as well.
 
         Returns:
             Image ready to be appended to a GIF frame list.
         """
-        if img.mode != "RGBA":
-            return img
+        return self._frame_converter(palette)(img)
 
+    def _frame_converter(
+        self, palette: Optional[Image.Image] = None
+    ) -> Callable[[Image.Image], Image.Image]:
+        """Return the per-frame ``_convert_frame_for_gif`` for the current
+        background, with the background dispatch done once up front."""
         if self.background_color[3] == 0:
-            alpha = img.split()[3]
-            out = img.convert("RGB").convert(
-                "P", palette=Image.Palette.ADAPTIVE, colors=self.color_count - 1
+            return functools.partial(self._convert_transparent, palette=palette)
+        return functools.partial(self._convert_opaque, palette=palette)
+
+    def _convert_transparent(
+        self, img: Image.Image, palette: Optional[Image.Image] = None
+    ) -> Image.Image:
+        """Transparent-background branch of ``_convert_frame_for_gif``."""
+        if img.mode != "RGBA":
+            return img
+        # getchannel allocates only the alpha band (split() makes all four)
+        alpha = img.getchannel("A")
+        if palette is not None:
+            out = img.convert("RGB").quantize(
+                palette=palette, dither=Image.Dither.FLOYDSTEINBERG
             )
-            mask = Image.eval(alpha, lambda a: 255 if a < 128 else 0)
-            out.paste(255, mask)
-            out.info["transparency"] = 255
-            return out
         else:
-            rgb_bg = Image.new("RGB", img.size, self.background_color[:3])
-            rgb_bg.paste(img, mask=img.split()[3])
-            return rgb_bg
+            out = self._quantize(img.convert("RGB"), self.color_count - 1)
+        # The palette holds at most color_count - 1 colours, so the entry
+        # right after them is free: mark it transparent explicitly rather
+        # than assuming a fixed slot. A short palette keeps the colour table
+        # (and LZW code size) small.
+        transparency = min(len(out.getpalette()) // 3, 255)
+        if alpha.getextrema()[0] < 128:
+            # Only frames that actually have see-through pixels need the
+            # mask image and the masked paste
+            mask = alpha.point(_TRANSPARENT_MASK_LUT)
+            out.paste(transparency, mask)
+        out.info["transparency"] = transparency
+        return out
+
+    def _convert_opaque(
+        self, img: Image.Image, palette: Optional[Image.Image] = None
+    ) -> Image.Image:
+        """Solid-background branch of ``_convert_frame_for_gif``."""
+        if img.mode == "RGB":
+            # Already composited onto the background (prepare_frame out_mode="RGB")
+            rgb = img
+        elif img.mode != "RGBA":
+            return img
+        else:
+            rgb = self._flatten_onto_background(img)
+
+        if palette is not None:
+            return rgb.quantize(palette=palette, dither=Image.Dither.FLOYDSTEINBERG)
+        if self.quantize_method != "adaptive":
+            # Pillow's writer would median-cut an RGB frame itself
+            return self._quantize(rgb, self.color_count)
+        return rgb
+
+    def _build_shared_palette(self, images: Iterable[Image.Image]) -> Image.Image:
+        """Compute one adaptive palette covering all *images*.
+
+        The (RGBA) frames are downsampled, flattened the same way
+        ``_convert_frame_for_gif`` would and stacked into a single montage,
+        which is quantized once. On a transparent background only the
+        pixels that stay visible (alpha >= 128) go into the montage, so
+        the colour hidden under transparent areas takes no palette entries.
+        Remapping each frame onto the result is much cheaper than running a
+        median cut per frame, and a palette shared by every frame also
+        compresses better.
+
+        Args:
+            images: Prepared RGBA frames.
+
+        Returns:
+            P-mode image whose palette holds at most ``color_count - 1``
+            colours (one index stays free for transparency).
+        """
+        images = [self._palette_sample(img) for img in images]
+        if self.background_color[3] == 0:
+            visible = [
+                arr[arr[..., 3] >= 128, :3]
+                for arr in (np.asarray(ensure_rgba(img)) for img in images)
+            ]
+            pixels = np.concatenate(visible + [np.zeros((0, 3), np.uint8)])
+            if not len(pixels):
+                pixels = np.zeros((1, 3), np.uint8)
+            # One pixel column; the quantizer only looks at the colours
+            montage = Image.fromarray(np.ascontiguousarray(pixels.reshape(-1, 1, 3)), "RGB")
+            return self._quantize(montage, self.color_count - 1)
+
+        flat = [
+            img if img.mode == "RGB" else self._flatten_onto_background(ensure_rgba(img))
+            for img in images
+        ]
+        width = max(img.width for img in flat)
+        montage = Image.new("RGB", (width, sum(img.height for img in flat)))
+        y = 0
+        for img in flat:
+            montage.paste(img, (0, y))
+            y += img.height
+
+        return self._quantize(montage, self.color_count - 1)
+
+    def _background_color(self) -> Tuple[int, int, int, int]:
+        """Canvas fill colour: any fully transparent colour becomes (0, 0, 0, 0)."""
+        return (0, 0, 0, 0) if self.background_color[3] == 0 else self.background_color
+
+    def _new_background(self, mode: str = "RGBA") -> Image.Image:
+        """Fresh output-size canvas filled with the background colour.
+
+        For canvases that are drawn on: filling a new image only writes the
+        buffer, while copying a cached one reads and writes it (about twice
+        as fast from 256x256 up).
+        """
+        color = self._background_color()
+        if mode == "RGB":
+            return Image.new("RGB", self.output_size, color[:3])
+        return create_background(self.output_size, color)
+
+    def _background_template(self, mode: str = "RGBA") -> Image.Image:
+        """Shared blank output-size canvas, never modified.
+
+        Built once per output size / background colour / mode; the layer
+        compositor returns it as is for frames with nothing to draw.
+        """
+        key = (self.output_size, self._background_color(), mode)
+        if self._bg_template is None or self._bg_template_key != key:
+            self._bg_template = self._new_background(mode)
+            self._bg_template_key = key
+        return self._bg_template
+
+    def _downscale(self, img: Image.Image) -> Image.Image:
+        """Shrink *img* to fit ``output_size`` (new image, aspect preserved).
+
+        The target size is computed up front and reached with a single
+        ``resize`` (no copy + in-place ``thumbnail``); ``reducing_gap`` lets
+        Pillow box-reduce large sources by an integer factor first.
+        """
+        w, h = img.size
+        out_w, out_h = self.output_size
+        resample = self.resample
+        if resample is None:
+            factor = max(-(-w // out_w), -(-h // out_h))  # smallest k with w/k, h/k fitting
+            if w % factor == 0 and h % factor == 0 and (w // factor == out_w or h // factor == out_h):
+                return img.resize((w // factor, h // factor), Image.Resampling.NEAREST)
+            resample = Image.Resampling.LANCZOS
+
+        scale = min(out_w / w, out_h / h)
+        size = (max(1, min(out_w, round(w * scale))), max(1, min(out_h, round(h * scale))))
+        if resample == Image.Resampling.NEAREST:
+            return img.resize(size, resample)
+        if resample == Image.Resampling.LANCZOS and cv2 is not None:
+            resized = self._downscale_cv2(img, size, scale)
+            if resized is not None:
+                return resized
+        return resize_rgba(img, size, resample, reducing_gap=3.0)
+
+    @staticmethod
+    def _downscale_cv2(img: Image.Image, size: Tuple[int, int], scale: float) -> Optional[Image.Image]:
+        """OpenCV (SIMD) version of the LANCZOS downscale, or None to use Pillow.
+
+        OpenCV's Lanczos kernel does not widen with the scale factor, so
+        reductions of 2x or more use INTER_AREA (box average) instead to stay
+        alias-free. Pillow resizes RGBA premultiplied while OpenCV treats the
+        channels independently, so only opaque images are handed over.
+        """
+        if img.mode not in ("RGB", "RGBA"):
+            return None
+        if img.mode == "RGBA" and img.getextrema()[3] != (255, 255):
+            return None
+        interpolation = cv2.INTER_LANCZOS4 if scale > 0.5 else cv2.INTER_AREA
+        resized = cv2.resize(np.asarray(img), size, interpolation=interpolation)
+        return Image.fromarray(resized, img.mode)
+
+    def prepare_frame(self, material_image, out_mode: str = "RGBA") -> Image.Image:
+        """Fit a material (Image or RGBA array) into an output-size frame.
 
-    def prepare_frame(self, material_image: Image.Image) -> Image.Image:
-        img = ensure_rgba(material_image)
+        Args:
+            material_image: Source image or (H, W, 4) RGBA array.
+            out_mode: "RGB" composites straight onto an opaque RGB background
+                (one blend instead of RGBA paste + flatten) when the
+                background colour is fully opaque; otherwise RGBA is returned.
+                An RGB material is then used as is, without an RGBA detour.
+        """
+        if isinstance(material_image, np.ndarray):
+            material_image = Image.fromarray(material_image, "RGBA")
+        opaque_rgb = out_mode == "RGB" and self.background_color[3] == 255
+        img = material_image
+        if img.mode != "RGBA" and not (opaque_rgb and img.mode == "RGB"):
+            img = img.convert("RGBA")
         
         if self.output_size:
-            # If transparent background, don't create a background image
-            if self.background_color[3] == 0:
-                # Just resize if needed, keep transparency
-                if img.size[0] > self.output_size[0] or img.size[1] > self.output_size[1]:
-                    img.thumbnail(self.output_size, Image.Resampling.LANCZOS)
-                
-                # Create a transparent background of the output size
-                transparent_bg = Image.new('RGBA', self.output_size, (0, 0, 0, 0))
-                result = paste_center(transparent_bg, img)
-                return result
-            else:
-                # Create solid background
-                background = create_background(self.output_size, self.background_color)
-                
-                if img.size[0] > self.output_size[0] or img.size[1] > self.output_size[1]:
-                    img.thumbnail(self.output_size, Image.Resampling.LANCZOS)
-                
-                result = paste_center(background, img)
-                return result
+            # _downscale works on a copy, so the shared material is never
+            # mutated (frames may be prepared concurrently).
+            if img.size[0] > self.output_size[0] or img.size[1] > self.output_size[1]:
+                img = self._downscale(img)
+            
+            # Transparent background keeps transparency, so a material that
+            # already fills the output needs no canvas at all. Otherwise it
+            # is centred on the (solid) background.
+            if img.size == self.output_size and (
+                self.background_color[3] == 0 or (opaque_rgb and img.mode == "RGB")
+            ):
+                return img
+            # A fully opaque RGBA material that fills the output hides the
+            # background completely: pasting it would reproduce it exactly
+            if (
+                img.size == self.output_size
+                and img.mode == "RGBA"
+                and img.getextrema()[3][0] == 255
+            ):
+                return img.convert("RGB") if opaque_rgb else img
+            return paste_center_inplace(self._new_background("RGB" if opaque_rgb else "RGBA"), img)
         else:
             return img
+
+    def _reuse_palette_frame(self, img) -> Optional[Image.Image]:
+        """Fit an already palettized (P mode) source without requantizing it.
+
+        A GIF frame that fills the output (or shrinks onto it exactly) and
+        goes onto a transparent background needs neither the RGBA round-trip
+        nor a new palette: it is forwarded as is, or NEAREST-resized on its
+        palette indices.
+
+        Returns:
+            The GIF-ready frame, or None when the source needs the regular
+            prepare + quantize path.
+        """
+        if (
+            not isinstance(img, Image.Image)
+            or img.mode != "P"
+            or img.palette is None
+            or img.palette.mode != "RGB"
+            or not self.output_size
+            or self.background_color[3] != 0
+            or len(img.getpalette()) // 3 > self.color_count
+        ):
+            return None
+        if img.size == self.output_size:
+            return img
+        if self.resample not in (None, Image.Resampling.NEAREST):
+            return None
+
+        w, h = img.size
+        out_w, out_h = self.output_size
+        scale = min(out_w / w, out_h / h)
+        if scale > 1 or (round(w * scale), round(h * scale)) != self.output_size:
+            return None  # would be centred on a canvas
+        return img.resize(self.output_size, Image.Resampling.NEAREST)
+
+    def _prepare_one(
+        self,
+        material_image: Image.Image,
+        convert_frame: Optional[Callable[[Image.Image], Image.Image]] = None,
+    ) -> Image.Image:
+        """Prepare a material and convert it to its GIF-ready mode (thread-safe).
+
+        *convert_frame* is a ``_frame_converter`` result, so a build loop can
+        resolve it once rather than per frame.
+        """
+        reused = self._reuse_palette_frame(material_image)
+        if reused is not None:
+            return reused
+        if convert_frame is None:
+            convert_frame = self._frame_converter()
+        return convert_frame(self.prepare_frame(material_image, "RGB"))
+
+    def _iter_prepared(
+        self,
+        sources: Iterable[Image.Image],
+        keys: Optional[Sequence[Any]] = None,
+        convert=None,
+    ) -> Iterator[Image.Image]:
+        """Yield GIF-ready frames for *sources*, in order.
+
+        Frames are prepared up to ``_PREFETCH_DEPTH`` ahead in a thread pool
+        (Pillow releases the GIL while resizing/compositing/quantizing) while
+        the consumer, normally the GIF writer, encodes the previous ones. When
+        *keys* (one per source) is given, sources sharing a key are prepared
+        once and the result is reused. Held in memory are the in-flight frames
+        plus, for a key that occurs again later, its frame until that last
+        occurrence.
+
+        *convert* is the per-frame function (defaults to ``_prepare_one``).
+        """
+        if convert is None:
+            convert = functools.partial(self._prepare_one, convert_frame=self._frame_converter())
+        reused = {}
+        pending = deque()
+        last_use = None if keys is None else {key: i for i, key in enumerate(keys)}
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            for i, source in enumerate(sources):
+                if last_use is None:
+                    future = pool.submit(convert, source)
+                else:
+                    key = keys[i]
+                    future = reused.pop(key, None) or pool.submit(convert, source)
+                    if last_use[key] > i:
+                        reused[key] = future
+                pending.append(future)
+                if len(pending) > _PREFETCH_DEPTH:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def _prepare_materials(self, sources: dict, out_mode: str = "RGBA") -> dict:
+        """``prepare_frame`` each distinct material once, concurrently.
+
+        Results are remembered until the next call, so a preview followed by
+        an export of the same materials (the usual editor workflow) prepares
+        them only once. An entry is reused only for the same source image and
+        the same output size / background / resample filter; an RGBA frame
+        also serves an "RGB" request (``_convert_opaque`` flattens it).
+
+        Args:
+            sources: {material_index: material image}
+            out_mode: Passed on to ``prepare_frame``.
+
+        Returns:
+            {material_index: prepared frame}
+        """
+        settings = (self.output_size, self.background_color, self.resample)
+        cache = self._prepared_cache
+        prepared = {}
+        missing = {}
+        for key, img in sources.items():
+            hit = cache.get(id(img))
+            if (
+                hit is not None and hit[0] is img and hit[1] == settings
+                and hit[2] in (out_mode, "RGBA")
+            ):
+                prepared[key] = hit[3]
+            else:
+                missing[key] = img
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                done = pool.map(lambda img: self.prepare_frame(img, out_mode), missing.values())
+                for key, frame in zip(missing, done):
+                    prepared[key] = frame
+
+        # Keep only this call's materials (holding the sources keeps id() stable)
+        self._prepared_cache = {
+            id(img): (
+                img, settings,
+                out_mode if key in missing else cache[id(img)][2],
+                prepared[key],
+            )
+            for key, img in sources.items()
+        }
+        return {key: prepared[key] for key in sources}
     
     def build_from_sequence(
         self,
@@ -166,18 +743,32 @@ class GifBuilder:
         if len(material_manager) == 0:
             raise ValueError("Material list is empty, cannot generate GIF")
         
-        frames = []
-        durations = []
+        # Resolve the material list and frame indices once up front instead
+        # of a get_material() call per frame.
+        materials = material_manager.get_images()
+        indices = np.fromiter(
+            (frame.material_index for frame in sequence_editor.iter_frames()),
+            dtype=np.intp, count=len(sequence_editor),
+        )
+        missing = indices[(indices < 0) | (indices >= len(materials))]
+        if missing.size:
+            raise ValueError(f"Material index {missing[0]} does not exist")
         
-        for frame in sequence_editor.get_frames():
-            material = material_manager.get_material(frame.material_index)
-            if material is None:
-                raise ValueError(f"Material index {frame.material_index} does not exist")
-            
-            material_img, _ = material
-            frame_img = self.prepare_frame(material_img)
-            frames.append(self._convert_frame_for_gif(frame_img))
-            durations.append(frame.duration)
+        # Only the distinct materials are prepared; their combined colours
+        # give one palette that every frame is remapped onto.
+        prepared = self._prepare_materials(
+            {key: materials[key] for key in np.unique(indices).tolist()}, "RGB"
+        )
+        palette = self._build_shared_palette(prepared.values())
+        
+        # Repeated material indices reuse the already quantized frame
+        keys = indices.tolist()
+        frames = self._iter_prepared(
+            (prepared[key] for key in keys),
+            keys,
+            self._frame_converter(palette),
+        )
+        durations = sequence_editor.export_durations()
         
         self.save_gif(frames, durations, output_path)
     
@@ -193,33 +784,239 @@ class GifBuilder:
         if len(images) != len(durations):
             raise ValueError("Image count does not match duration count")
         
-        frames = [self._convert_frame_for_gif(self.prepare_frame(img)) for img in images]
+        # Same two passes as the other builders: one palette learned from
+        # downsampled frames, then every frame is remapped onto it while
+        # streaming. Images passed more than once are prepared once per pass;
+        # P-mode frames that keep their own palette (_reuse_palette_frame)
+        # are left out of the palette.
+        keys = [id(img) for img in images]
+        if len(set(keys)) == len(keys):
+            keys = None  # nothing repeats, nothing to reuse
+        samples = [
+            sample for sample in self._iter_prepared(
+                images,
+                keys,
+                convert=lambda img: None if self._reuse_palette_frame(img) is not None
+                else self._palette_sample(self.prepare_frame(img, "RGB")),
+            )
+            if sample is not None
+        ]
+        palette = self._build_shared_palette(samples) if samples else None
+        frames = self._iter_prepared(
+            images,
+            keys,
+            convert=functools.partial(
+                self._prepare_one, convert_frame=self._frame_converter(palette)
+            ),
+        )
         self.save_gif(frames, durations, output_path)
     
-    def save_gif(self, frames: List[Image.Image], durations: List[int], output_path: str):
-        if not frames:
+    def save_gif(self, frames: Iterable[Image.Image], durations: List[int], output_path: str):
+        """Encode *frames* into a GIF.
+
+        *frames* may be any iterable (e.g. a generator); it is handed to the
+        writer lazily, so frames are produced as they are encoded.
+        """
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
             raise ValueError("Frame list is empty")
+        frames = itertools.chain([first], frames)
         
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
+        # Transparent GIFs always clear each frame to the background. Opaque
+        # frames cover the whole canvas, so by default they are left in place
+        # (1): the writer / gifsicle can then store just the changed region
+        # of each frame instead of repainting it in full. A later frame with
+        # transparent pixels still gets the one before it cleared (checked
+        # per frame as they stream in, see _with_disposal).
+        if self.background_color[3] == 0 or _has_transparency(first):
+            disposal = 2
+        elif self.disposal is None:
+            disposal = 1
+        else:
+            disposal = self.disposal
+        watch = disposal == 1 and self.disposal is None
+        
+        if self.encoder == "native":
+            merged_durations = []
+            merged_disposals = []
+            
+            def indexed():
+                for (frame, duration), frame_disposal in _with_disposal(
+                    _coalesce_frames(
+                        (self._index_frame(img) for img in frames),
+                        durations, _same_indexed_frame,
+                    ),
+                    disposal,
+                    (lambda item: item[0][2] is not None) if watch else None,
+                ):
+                    # encode_gif reads frame i's delay/disposal after receiving it
+                    merged_durations.append(duration)
+                    merged_disposals.append(frame_disposal)
+                    yield frame
+            
+            output_file.write_bytes(
+                encode_gif(indexed(), merged_durations, self.loop, merged_disposals)
+            )
+            return
+        
+        if self.encoder == "gifsicle" and is_gifsicle_available():
+            self._save_gif_with_gifsicle(
+                (
+                    (frame, duration, frame_disposal)
+                    for (frame, duration), frame_disposal in _with_disposal(
+                        _coalesce_frames(frames, durations, _same_image),
+                        disposal,
+                        (lambda item: _has_transparency(item[0])) if watch else None,
+                    )
+                ),
+                output_path,
+            )
+            return
+        
+        if watch:
+            # Pillow wants the per-frame disposals up front, so gather the
+            # frames first. It keeps its own copy of every frame until it
+            # writes anyway; handing them over by popping releases ours.
+            collected, disposals = [], []
+            for frame, frame_disposal in _with_disposal(frames, disposal, _has_transparency):
+                collected.append(frame)
+                disposals.append(frame_disposal)
+            if len(set(disposals)) > 1:
+                disposal = disposals
+            collected.reverse()
+            frames = (collected.pop() for _ in range(len(collected)))
+        first = next(frames)
+        
+        # gifsicle -O3 (when installed) runs on top of Pillow's own optimize
+        # pass, so a failed gifsicle run still leaves an optimized file
+        post_optimize = self.optimize and self.external_optimize and is_gifsicle_available()
         save_kwargs = {
             'format': 'GIF',
             'save_all': True,
-            'append_images': frames[1:],
+            'append_images': frames,
             'duration': durations,
             'loop': self.loop,
             'optimize': self.optimize,
-            'disposal': self.disposal
+            'disposal': disposal
         }
         
-        if self.background_color[3] == 0:
-            # For transparent GIF, set disposal method to clear to background
-            save_kwargs['disposal'] = 2
+        # Encode into memory and write the file in one call: the disk sees a
+        # single sequential write instead of Pillow's per-chunk writes, and a
+        # failure mid-encode no longer leaves a truncated GIF behind.
+        buffer = io.BytesIO()
+        first.save(buffer, **save_kwargs)
+        data = buffer.getbuffer()
+        if post_optimize:
+            data = self._optimize_with_gifsicle(data)
+        output_file.write_bytes(data)
+
+    @staticmethod
+    def _optimize_with_gifsicle(data) -> bytes:
+        """Pipe an encoded GIF through ``gifsicle -O3`` (frame diffing,
+        palette/transparency optimisation). Returns *data* unchanged if
+        gifsicle fails or doesn't make it smaller, so the export still
+        succeeds."""
+        try:
+            result = subprocess.run(
+                ["gifsicle", "--no-warnings", "-O3"],
+                input=bytes(data), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return data
+        if result.stdout and len(result.stdout) < len(data):
+            return result.stdout
+        return data
+
+    def _index_frame(self, img: Image.Image) -> IndexedFrame:
+        """Turn a GIF-ready frame into (indices, palette, transparency) for
+        the native writer, quantizing it first if it isn't in P mode yet."""
+        if img.mode == "RGBA":
+            img = self._convert_frame_for_gif(img)
+        if img.mode != "P":
+            img = self._quantize(img.convert("RGB"), self.color_count)
+        transparency = img.info.get("transparency")
+        return (
+            np.asarray(img),
+            bytes(img.getpalette() or ()),
+            transparency if isinstance(transparency, int) else None,
+        )
+
+    def _save_gif_with_gifsicle(
+        self,
+        frames: Iterable[Tuple[Image.Image, int, int]],
+        output_path: str,
+    ):
+        """Assemble the animation with gifsicle instead of Pillow's writer.
+
+        *frames* yields (frame, duration in ms, disposal method) triples;
+        each frame's disposal is written into its own GIF and kept by
+        gifsicle.
+
+        Each frame is encoded as a single-image GIF (carrying its own delay)
+        and streamed into ``gifsicle --multifile -`` over stdin; gifsicle
+        merges them and runs its (multithreaded) optimizer, writing the
+        output file itself. Nothing touches a temporary directory, and the
+        single-frame encodes run in a thread pool (Pillow releases the GIL
+        while encoding), overlapping with the preparation of later frames;
+        at most ``_PREFETCH_DEPTH`` encoded frames are pending at a time.
+        """
+        cmd = [
+            "gifsicle",
+            "--no-warnings",
+            f"--loopcount={self.loop if self.loop else 'forever'}",
+        ]
+        if self.optimize:
+            cmd.append("-O3")
+        cmd += ["--multifile", "-", "-o", str(output_path)]
+        
+        def encode(frame: Image.Image, duration: int, disposal: int) -> bytes:
+            buffer = io.BytesIO()
+            # GIF delays are in centiseconds; Pillow truncates, so round here
+            frame.save(
+                buffer, format="GIF",
+                duration=max(0, round(duration / 10)) * 10, disposal=disposal,
+            )
+            return buffer.getvalue()
+        
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                pending = deque()
+                try:
+                    for frame, duration, disposal in frames:
+                        pending.append(pool.submit(encode, frame, duration, disposal))
+                        if len(pending) > _PREFETCH_DEPTH:
+                            proc.stdin.write(pending.popleft().result())
+                    while pending:
+                        proc.stdin.write(pending.popleft().result())
+                except BrokenPipeError:
+                    pass  # gifsicle exited early; its exit code and stderr say why
+            _, stderr = proc.communicate()
+        except BaseException:
+            # Don't let gifsicle finish a GIF from a partial frame stream
+            proc.kill()
+            proc.wait()
+            raise
         
-        frames[0].save(output_path, **save_kwargs)
+        if proc.returncode:
+            raise ValueError(
+                f"gifsicle failed (code {proc.returncode}): "
+                f"{stderr.decode(errors='ignore').strip()}"
+            )
     
-    def resize_gif(self, input_path: str, output_path: str, scale_factor: float = 0.5):
+    def resize_gif(
+        self,
+        input_path: str,
+        output_path: str,
+        scale_factor: float = 0.5,
+        resample: Optional[int] = None,
+    ):
         """
         Resize an existing GIF file
         
@@ -227,49 +1024,74 @@ class GifBuilder:
             input_path: Path to input GIF file
             output_path: Path for output GIF file
             scale_factor: Scale factor (0.5 = half size, 2.0 = double size)
+            resample: ``PIL.Image.Resampling`` filter. None (default) picks
+                BILINEAR after a box pre-reduction for heavy downscales
+                (scale_factor < 0.5), where Lanczos' extra taps are not
+                visible, and LANCZOS otherwise.
         """
+        if resample is None:
+            resample = (
+                Image.Resampling.BILINEAR if scale_factor < 0.5 else Image.Resampling.LANCZOS
+            )
         try:
+            # Delays come from the block headers, so the frames are decoded
+            # only once, by the resize pass below
+            durations = read_frame_delays(Path(input_path).read_bytes())
             with Image.open(input_path) as gif:
-                # Get all frames
-                frames = []
-                durations = []
-                
                 # Get loop count from original GIF
                 loop = 0
                 if 'loop' in gif.info:
                     loop = gif.info['loop']
                 
-                # Extract frames
-                for frame_index in range(gif.n_frames):
-                    gif.seek(frame_index)
-                    frame = gif.copy()
-                    
-                    # Resize frame
+                def decoded():
+                    for frame_index in range(len(durations)):
+                        gif.seek(frame_index)
+                        # The pool resizes while the next frame decodes into
+                        # the same image, so each one gets its own copy
+                        yield gif.copy()
+                
+                def resize(frame):
                     new_size = (
                         int(frame.width * scale_factor),
                         int(frame.height * scale_factor)
                     )
-                    resized_frame = frame.resize(new_size, Image.Resampling.LANCZOS)
-                    
-                    frames.append(resized_frame)
-                    
-                    # Get duration
-                    duration = gif.info.get('duration', 100)  # Default 100ms
-                    durations.append(duration)
+                    if resample == Image.Resampling.NEAREST:
+                        return frame.resize(new_size, resample)
+                    if frame.mode == "P":
+                        # Pillow resizes P images with NEAREST whatever the
+                        # filter; later frames already decode to RGB(A)
+                        frame = frame.convert("RGBA" if "transparency" in frame.info else "RGB")
+                    frame = frame.resize(new_size, resample, reducing_gap=2.0)
+                    # Quantize here, in the pool, with the configured method
+                    # instead of leaving a serial median cut to the writer
+                    if frame.mode == "RGBA":
+                        # GIF alpha is binary, so resampling only fades the
+                        # edges of shapes: keep every pixel the source covered
+                        # at all (as Pillow's writer did) instead of eroding
+                        # them at the alpha threshold
+                        frame.putalpha(frame.getchannel("A").point(_COVERED_MASK_LUT))
+                        return self._convert_transparent(frame)
+                    if frame.mode != "RGB":
+                        frame = frame.convert("RGB")
+                    return self._quantize(frame, self.color_count)
+                
+                # Resized frames stream straight into the writer
+                frames = self._iter_prepared(decoded(), convert=resize)
+                first = next(frames, None)
                 
                 # Save resized GIF
-                if frames:
+                if first is not None:
                     save_kwargs = {
                         'format': 'GIF',
                         'save_all': True,
-                        'append_images': frames[1:],
+                        'append_images': frames,
                         'duration': durations,
                         'loop': loop,
                         'optimize': True,
                         'disposal': 2
                     }
                     
-                    frames[0].save(output_path, **save_kwargs)
+                    first.save(output_path, **save_kwargs)
                     
         except Exception as e:
             raise ValueError(f"Failed to resize GIF: {str(e)}")
@@ -285,16 +1107,14 @@ class GifBuilder:
             Dictionary with GIF information
         """
         try:
+            # Frame count and delays from the block headers: seeking through
+            # the frames with Pillow would LZW-decode every one of them
+            durations = read_frame_delays(Path(gif_path).read_bytes())
             with Image.open(gif_path) as gif:
-                total_duration = 0
-                for frame_index in range(gif.n_frames):
-                    gif.seek(frame_index)
-                    total_duration += gif.info.get("duration", 100)
-
                 return {
-                    "frame_count": gif.n_frames,
+                    "frame_count": len(durations),
                     "size": (gif.width, gif.height),
-                    "total_duration_ms": total_duration,
+                    "total_duration_ms": sum(durations),
                     "loop": gif.info.get("loop", 0),
                     "mode": gif.mode,
                     "has_transparency": "transparency" in gif.info,
@@ -309,24 +1129,40 @@ class GifBuilder:
         material_manager: MaterialManager,
         sequence_editor: SequenceEditor
     ) -> List[Tuple[Image.Image, int]]:
-        frames = []
-        
-        for frame in sequence_editor.get_frames():
-            material = material_manager.get_material(frame.material_index)
-            if material is None:
-                continue
-            
-            material_img, _ = material
-            frame_img = self.prepare_frame(material_img)
-            
-            frames.append((frame_img, frame.duration))
+        sources = {}
+        for frame in sequence_editor.iter_frames():
+            key = frame.material_index
+            if key not in sources:
+                material = material_manager.get_material(key)
+                if material is not None:
+                    sources[key] = material[0]
         
-        return frames
+        # Each material is prepared once, however often the sequence uses it
+        prepared = self._prepare_materials(sources)
+        return [
+            (prepared[frame.material_index], frame.duration)
+            for frame in sequence_editor.iter_frames()
+            if frame.material_index in prepared
+        ]
     
-    def prepare_layered_frame(
+    def _detect_layered_output_size(
         self,
         layered_frame: LayeredFrame,
         material_manager: MaterialManager
+    ):
+        """Default output_size to the frame's first layer material size."""
+        if layered_frame.layers and len(layered_frame.layers) > 0:
+            first_layer = layered_frame.layers[0]
+            material = material_manager.get_material(first_layer.material_index)
+            if material:
+                img, _ = material
+                self.output_size = img.size
+    
+    def prepare_layered_frame(
+        self,
+        layered_frame: LayeredFrame,
+        material_manager: MaterialManager,
+        out_mode: str = "RGBA"
     ) -> Image.Image:
         """
         Prepare a layered frame by compositing all layers
@@ -334,28 +1170,28 @@ class GifBuilder:
         Args:
             layered_frame: The layered frame to composite
             material_manager: MaterialManager to get source images
+            out_mode: "RGB" composites onto an RGB canvas when the background
+                is fully opaque (see ``prepare_frame``)
         
         Returns:
             Composited image
         """
         if not self.output_size:
-            # Default to first layer's size if output size not set
-            if layered_frame.layers and len(layered_frame.layers) > 0:
-                first_layer = layered_frame.layers[0]
-                material = material_manager.get_material(first_layer.material_index)
-                if material:
-                    img, _ = material
-                    self.output_size = img.size
+            self._detect_layered_output_size(layered_frame, material_manager)
         
         # Use transparent background for layered frames by default
         bg_color = self.background_color if self.background_color[3] > 0 else (0, 0, 0, 0)
         
         # Composite the frame
+        mode = "RGB" if out_mode == "RGB" and bg_color[3] == 255 else "RGBA"
         composited = LayerCompositor.composite_frame(
             layered_frame,
             material_manager,
             self.output_size,
-            bg_color
+            bg_color,
+            mode,
+            self._background_template(mode),
+            self._layer_cache
         )
         
         return composited
@@ -377,15 +1213,31 @@ class GifBuilder:
         if not layered_frames:
             raise ValueError("Layered frame sequence is empty")
         
-        frames = []
-        durations = []
-        
+        # Frames are composited concurrently, so settle an auto-detected
+        # output size up front rather than letting the first worker set it.
         for layered_frame in layered_frames:
-            # Composite the layered frame
-            composited = self.prepare_layered_frame(layered_frame, material_manager)
-            
-            frames.append(self._convert_frame_for_gif(composited))
-            durations.append(layered_frame.duration)
+            if self.output_size:
+                break
+            self._detect_layered_output_size(layered_frame, material_manager)
+        self._reset_layer_cache()
+        
+        # Two passes: learn one palette from downsampled composites, then
+        # composite again and remap every frame onto it while streaming into
+        # the writer (frames are not all kept in memory).
+        palette = self._build_shared_palette(self._iter_prepared(
+            layered_frames,
+            convert=lambda layered_frame: self._palette_sample(
+                self.prepare_layered_frame(layered_frame, material_manager, "RGB")
+            ),
+        ))
+        convert_frame = self._frame_converter(palette)
+        frames = self._iter_prepared(
+            layered_frames,
+            convert=lambda layered_frame: convert_frame(
+                self.prepare_layered_frame(layered_frame, material_manager, "RGB")
+            ),
+        )
+        durations = [layered_frame.duration for layered_frame in layered_frames]
         
         self.save_gif(frames, durations, output_path)
     
@@ -404,13 +1256,22 @@ class GifBuilder:
         Returns:
             List of (image, duration) tuples for preview
         """
-        frames = []
-        
+        # Composited concurrently (see _iter_prepared), so settle an
+        # auto-detected output size first
         for layered_frame in layered_frames:
-            composited = self.prepare_layered_frame(layered_frame, material_manager)
-            frames.append((composited, layered_frame.duration))
+            if self.output_size:
+                break
+            self._detect_layered_output_size(layered_frame, material_manager)
+        self._reset_layer_cache()
         
-        return frames
+        composited = self._iter_prepared(
+            layered_frames,
+            convert=lambda layered_frame: self.prepare_layered_frame(layered_frame, material_manager),
+        )
+        return [
+            (img, layered_frame.duration)
+            for img, layered_frame in zip(composited, layered_frames)
+        ]
 
     # ----- Layer timeline composition -----
     def _expand_timeline_with_groups(
@@ -546,10 +1407,144 @@ class GifBuilder:
         
         return expanded_frames, expanded_durations
     
-    def _compose_from_expanded_frame(
+    def _detect_expanded_output_size(
         self,
         frame_layers: List[Tuple[Optional[int], int, int]],
         material_manager: MaterialManager
+    ):
+        """Set output_size from the frame's first material (fallback 400x400)."""
+        for material_idx, _, _ in frame_layers:
+            if material_idx is not None:
+                material = material_manager.get_material(material_idx)
+                if material is not None:
+                    img, _ = material
+                    self.output_size = img.size
+                    break
+        
+        if self.output_size is None:
+            # Fallback
+            self.output_size = (400, 400)
+    
+    def _iter_expanded_gif_frames(
+        self,
+        expanded_frames: List[List[Tuple[Optional[int], int, int]]],
+        material_manager: MaterialManager
+    ) -> Iterator[Image.Image]:
+        """Composite + convert expanded frames for the GIF writer, streamed.
+
+        Frames are composited in the prepare pool (see ``_iter_prepared``), so
+        an auto-detected output size is settled from the first frame up front.
+        As in ``build_from_layered_sequence``, one palette is learned from
+        downsampled composites first and every frame is remapped onto it;
+        identical expanded frames (loops) are composited once per pass.
+        """
+        if self.output_size is None and expanded_frames:
+            self._detect_expanded_output_size(expanded_frames[0], material_manager)
+        self._reset_layer_cache()
+        layer_images = self._resolve_layer_images(expanded_frames, material_manager)
+        keys = [tuple(frame_layers) for frame_layers in expanded_frames]
+        palette = self._build_shared_palette(self._iter_prepared(
+            expanded_frames,
+            keys,
+            convert=lambda frame_layers: self._palette_sample(
+                self._compose_from_expanded_frame(frame_layers, material_manager, layer_images)
+            ),
+        ))
+        convert_frame = self._frame_converter(palette)
+        return self._iter_prepared(
+            expanded_frames,
+            keys,
+            convert=lambda frame_layers: convert_frame(
+                self._compose_from_expanded_frame(frame_layers, material_manager, layer_images)
+            ),
+        )
+    
+    def _iter_expanded_composites(
+        self,
+        expanded_frames: List[List[Tuple[Optional[int], int, int]]],
+        material_manager: MaterialManager
+    ) -> Iterator[Image.Image]:
+        """Composite expanded frames (RGBA) concurrently, in order.
+
+        Identical expanded frames (group loops) are composited once and the
+        image is shared.
+        """
+        if self.output_size is None and expanded_frames:
+            self._detect_expanded_output_size(expanded_frames[0], material_manager)
+        self._reset_layer_cache()
+        layer_images = self._resolve_layer_images(expanded_frames, material_manager)
+        return self._iter_prepared(
+            expanded_frames,
+            [tuple(frame_layers) for frame_layers in expanded_frames],
+            convert=lambda frame_layers: self._compose_from_expanded_frame(
+                frame_layers, material_manager, layer_images
+            ),
+        )
+    
+    def _layer_image(
+        self, material_manager: MaterialManager, material_idx: int
+    ) -> Optional[Tuple[Image.Image, Optional[Image.Image]]]:
+        """RGBA image of a material as it is pasted into a frame, plus the
+        paste mask (None when the image is fully opaque, so the paste is a
+        plain copy instead of an alpha blend).
+
+        The keyed image (with a chroma key set) and its opacity are computed
+        once per material and reused by every frame of the current
+        export/preview, and by the next one if it asks for them again
+        (see ``_reset_layer_cache``).
+        """
+        material = material_manager.get_material(material_idx)
+        if material is None:
+            return None
+        material_img, _ = material
+        
+        key = (self.chroma_key_color, self.chroma_key_threshold)
+        hit = self._layer_cache.get(id(material_img))
+        if hit is not None and hit[0] is material_img and hit[1] == key:
+            return hit[2]
+        if self.chroma_key_color is None:
+            img = ensure_rgba(material_img)
+        else:
+            # Straight from the cached pixel array
+            img = self.apply_chroma_key(material_manager.get_material_array(material_idx))
+        entry = (img, None if LayerCompositor._is_opaque(img) else img)
+        self._layer_cache[id(material_img)] = (material_img, key, entry)
+        return entry
+    
+    def _resolve_layer_images(
+        self,
+        expanded_frames: List[List[Tuple[Optional[int], int, int]]],
+        material_manager: MaterialManager
+    ) -> dict:
+        """``_layer_image`` for every material the expanded frames use.
+
+        Resolved once per export/preview, concurrently, before compositing
+        starts: the per-(frame, layer) work is then a dict lookup, and pool
+        threads never key the same material twice.
+
+        Returns:
+            {material_index: (image, paste mask)}; missing materials are left out.
+        """
+        used = list({
+            material_idx
+            for frame_layers in expanded_frames
+            for material_idx, _, _ in frame_layers
+            if material_idx is not None
+        })
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            resolved = pool.map(lambda idx: self._layer_image(material_manager, idx), used)
+            return {idx: layer for idx, layer in zip(used, resolved) if layer is not None}
+    
+    def _reset_layer_cache(self):
+        """Start a new export/preview: keyed materials / transformed layers
+        are kept only as long as they are asked for again."""
+        self._layer_cache = _CarryOverCache(self._layer_cache)
+    
+    def _compose_from_expanded_frame(
+        self,
+        frame_layers: List[Tuple[Optional[int], int, int]],
+        material_manager: MaterialManager,
+        layer_images: Optional[dict] = None
     ) -> Image.Image:
         """
         Composite one output frame from expanded frame layers.
@@ -557,46 +1552,32 @@ class GifBuilder:
         Args:
             frame_layers: List of (material_idx, x, y) tuples for this frame
             material_manager: MaterialManager instance
+            layer_images: Optional result of ``_resolve_layer_images``;
+                without it each layer goes through ``_layer_image``
         
         Returns:
             Composited image
         """
         # Use pre-set output_size or auto-detect
         if self.output_size is None:
-            # Auto-detect from first material
-            for material_idx, _, _ in frame_layers:
-                if material_idx is not None:
-                    material = material_manager.get_material(material_idx)
-                    if material is not None:
-                        img, _ = material
-                        self.output_size = img.size
-                        break
-            
-            if self.output_size is None:
-                # Fallback
-                self.output_size = (400, 400)
+            self._detect_expanded_output_size(frame_layers, material_manager)
         
-        bg_color = self.background_color if self.background_color[3] > 0 else (0, 0, 0, 0)
-        canvas = Image.new('RGBA', self.output_size, bg_color)
+        canvas = self._new_background()
         
         # Bottom to top
         for material_idx, x, y in frame_layers:
             if material_idx is None:
                 continue
             
-            material = material_manager.get_material(material_idx)
-            if material is None:
+            if layer_images is not None:
+                layer = layer_images.get(material_idx)
+            else:
+                layer = self._layer_image(material_manager, material_idx)
+            if layer is None:
                 continue
             
-            material_img, _ = material
-            img_rgba = ensure_rgba(material_img)
-            
-            # Apply chroma key if set
-            if self.chroma_key_color is not None:
-                img_rgba = self.apply_chroma_key(img_rgba)
-            
             try:
-                canvas.paste(img_rgba, (x, y), img_rgba)
+                canvas.paste(layer[0], (x, y), layer[1])
             except Exception:
                 # Skip paste failures (out of bounds etc.)
                 pass
@@ -633,8 +1614,7 @@ class GifBuilder:
             # Fallback
             self.output_size = (400, 400)
 
-        bg_color = self.background_color if self.background_color[3] > 0 else (0, 0, 0, 0)
-        canvas = Image.new('RGBA', self.output_size, bg_color)
+        canvas = self._new_background()
 
         # Bottom to top
         for material_idx, group_idx, x, y in editor.iter_frame_layers(frame_index):
@@ -660,18 +1640,12 @@ class GifBuilder:
             if material_idx is None:
                 continue
                 
-            material = material_manager.get_material(material_idx)
-            if material is None:
+            layer = self._layer_image(material_manager, material_idx)
+            if layer is None:
                 continue
-            material_img, _ = material
-            img_rgba = ensure_rgba(material_img)
-            
-            # Apply chroma key if set
-            if self.chroma_key_color is not None:
-                img_rgba = self.apply_chroma_key(img_rgba)
             
             try:
-                canvas.paste(img_rgba, (x, y), img_rgba)
+                canvas.paste(layer[0], (x, y), layer[1])
             except Exception:
                 # Skip paste failures (out of bounds etc.)
                 pass
@@ -688,12 +1662,8 @@ class GifBuilder:
         # Expand groups first
         expanded_frames, expanded_durations = self._expand_timeline_with_groups(editor, group_manager)
         
-        frames: List[Tuple[Image.Image, int]] = []
-        for frame_layers, duration in zip(expanded_frames, expanded_durations):
-            composed = self._compose_from_expanded_frame(frame_layers, material_manager)
-            frames.append((composed, duration))
-        
-        return frames
+        composed = self._iter_expanded_composites(expanded_frames, material_manager)
+        return list(zip(composed, expanded_durations))
 
     def build_from_layer_timeline(
         self,
@@ -720,15 +1690,8 @@ class GifBuilder:
         if not expanded_frames:
             raise ValueError("No frames to export after expanding groups")
 
-        frames: List[Image.Image] = []
-        durations: List[int] = []
-        
-        for frame_layers, duration in zip(expanded_frames, expanded_durations):
-            composed = self._compose_from_expanded_frame(frame_layers, material_manager)
-            frames.append(self._convert_frame_for_gif(composed))
-            durations.append(duration)
-
-        self.save_gif(frames, durations, output_path)
+        frames = self._iter_expanded_gif_frames(expanded_frames, material_manager)
+        self.save_gif(frames, expanded_durations, output_path)
 
     # ----- Composition group (group-led) expansion and build -----
 
@@ -821,11 +1784,8 @@ class GifBuilder:
         expanded_frames, expanded_durations = self._expand_composition_group(
             group_id, group_manager, material_manager
         )
-        frames: List[Tuple[Image.Image, int]] = []
-        for frame_layers, duration in zip(expanded_frames, expanded_durations):
-            composed = self._compose_from_expanded_frame(frame_layers, material_manager)
-            frames.append((composed, duration))
-        return frames
+        composed = self._iter_expanded_composites(expanded_frames, material_manager)
+        return list(zip(composed, expanded_durations))
 
     def build_gif_from_group(
         self,
@@ -847,25 +1807,25 @@ class GifBuilder:
         if not expanded_frames:
             raise ValueError("No frames to export after expanding group")
 
-        frames: List[Image.Image] = []
-        durations: List[int] = []
-        for frame_layers, duration in zip(expanded_frames, expanded_durations):
-            composed = self._compose_from_expanded_frame(frame_layers, material_manager)
-            frames.append(self._convert_frame_for_gif(composed))
-            durations.append(duration)
-
-        self.save_gif(frames, durations, output_path)
+        frames = self._iter_expanded_gif_frames(expanded_frames, material_manager)
+        self.save_gif(frames, expanded_durations, output_path)
 
     def _prepare_frame_for_alpha_format(self, img: Image.Image) -> Image.Image:
         """Prepare an RGBA composited frame for a truecolor animated format (APNG/WebP).
 
         Unlike GIF, these formats support full RGBA directly, so no palette
         quantization is needed — only the transparent-vs-solid background
-        choice (matching the "Transparent BG" setting) is applied."""
-        img = img.convert("RGBA")
+        choice (matching the "Transparent BG" setting) is applied, through
+        the same helpers as the GIF path."""
+        img = ensure_rgba(img)
         if self.background_color[3] == 0:
             return img
-        bg = Image.new("RGBA", img.size, self.background_color)
+        if self.background_color[3] == 255:
+            return self._flatten_onto_background(img)
+        if img.size == self.output_size:
+            bg = self._new_background()
+        else:
+            bg = Image.new("RGBA", img.size, self.background_color)
         bg.alpha_composite(img)
         return bg
 
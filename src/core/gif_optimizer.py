@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import shutil
 import subprocess
-import tempfile
+import uuid
 from pathlib import Path
 from typing import Optional
 
@@ -37,7 +37,8 @@ def _optimize_with_gifsicle(input_path: str, output_path: str, lossy: int, color
     cmd += [input_path, "-o", output_path]
 
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # Only the error channel is read; gifsicle writes the GIF itself
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
     except subprocess.CalledProcessError as e:
         raise GifOptimizationError(
             f"gifsicle failed (code {e.returncode}): {e.stderr.decode(errors='ignore').strip()}"
@@ -62,9 +63,15 @@ def _optimize_with_pillow(input_path: str, output_path: str, colors: Optional[in
                 # Always quantize to palette mode so Pillow writes a valid GIF.
                 # When *colors* is None we still convert (using the default 256).
                 n_colors = colors if colors is not None else 256
-                frame = im.convert("RGBA").convert(
-                    "P", palette=Image.Palette.ADAPTIVE, colors=n_colors
-                )
+                if im.mode == "P" and len(im.getpalette() or ()) // 3 <= n_colors:
+                    # Already palettized within the limit (Pillow decodes the
+                    # first frame as P): keep its palette and transparency
+                    # instead of an RGBA round-trip and a new quantize
+                    frame = im.copy()
+                else:
+                    # RGBA -> P ADAPTIVE quantizes with Pillow's fast octree
+                    rgba = im if im.mode == "RGBA" else im.convert("RGBA")
+                    frame = rgba.convert("P", palette=Image.Palette.ADAPTIVE, colors=n_colors)
                 frames.append(frame)
                 durations.append(im.info.get("duration", 100))
                 im.seek(im.tell() + 1)
@@ -123,20 +130,19 @@ def optimize_gif_lossy(
 
     dst.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write to a temporary file first for safety, then move/replace
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp_out = Path(tmpdir) / (dst.name + ".tmp")
-
+    # Write to a temporary file next to the destination first for safety,
+    # then rename it into place: same directory, so the replace is atomic
+    # and needs no temp directory or cross-drive move. The writer creates
+    # the file itself, so it gets the usual permissions.
+    tmp_out = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
         if is_gifsicle_available():
             _optimize_with_gifsicle(str(src), str(tmp_out), lossy=lossy, colors=colors)
         else:
             _optimize_with_pillow(str(src), str(tmp_out), colors=colors)
-
-        # Atomic replace if overwriting; shutil.move handles cross-drive moves.
-        if dst.exists():
-            tmp_out.replace(dst)
-        else:
-            shutil.move(str(tmp_out), str(dst))
+        tmp_out.replace(dst)
+    finally:
+        tmp_out.unlink(missing_ok=True)
 
     return str(dst)
 
@@ -0,0 +1,166 @@
+"""
+Minimal GIF89a writer working on palette-index arrays.
+
+Used by ``GifBuilder`` when its encoder is set to ``"native"``: frames are
+handed over as (H, W) uint8 index arrays plus their palette, and the file
+is assembled here directly — header, global colour table, NETSCAPE loop
+extension and per-frame Graphic Control Extension + Image Descriptor +
+LZW image data — without going through Pillow's GIF plugin.
+
+``read_frame_delays`` walks the same block structure the other way to pull
+per-frame delays out of an existing file without decoding any image data.
+"""
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ._kernels import lzw_compress
+
+
+# (indices, palette, transparency): indices is an (H, W) uint8 array,
+# palette is packed RGB bytes (3 per entry), transparency an index or None.
+IndexedFrame = Tuple[np.ndarray, bytes, Optional[int]]
+
+
+def _table_bits(n_colors: int) -> int:
+    """Bits needed for a colour table with *n_colors* entries (1..8)."""
+    return max(1, (max(n_colors, 2) - 1).bit_length())
+
+
+def _color_table(palette: bytes, bits: int) -> bytes:
+    """Pad/trim *palette* to the 2**bits entries a GIF colour table holds."""
+    size = 3 << bits
+    return palette[:size].ljust(size, b"\x00")
+
+
+def _sub_blocks(data: bytes) -> bytes:
+    """Split *data* into GIF sub-blocks (<= 255 bytes each) plus terminator."""
+    chunks = [
+        bytes((len(data[i:i + 255]),)) + data[i:i + 255]
+        for i in range(0, len(data), 255)
+    ]
+    return b"".join(chunks) + b"\x00"
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    """Return the offset just past the sub-block chain starting at *pos*."""
+    while True:
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+
+
+def read_frame_delays(data: bytes, default: int = 100) -> List[int]:
+    """Per-frame delays (ms) of a GIF file, one entry per image.
+
+    Only the block headers are parsed: extensions and LZW image data are
+    skipped by their sub-block lengths, so nothing is decompressed. Frames
+    without a Graphic Control Extension get *default*, matching Pillow.
+
+    Raises:
+        ValueError: If *data* is not a GIF or is truncated.
+    """
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("Not a GIF file")
+    try:
+        flags = data[10]
+        pos = 13
+        if flags & 0x80:
+            pos += 3 << ((flags & 0x07) + 1)
+
+        delays = []
+        delay = None
+        while True:
+            block = data[pos]
+            if block == 0x3B:  # trailer
+                return delays
+            if block == 0x21:  # extension
+                if data[pos + 1] == 0xF9 and data[pos + 2] >= 4:
+                    delay = struct.unpack_from("<H", data, pos + 4)[0] * 10
+                pos = _skip_sub_blocks(data, pos + 2)
+            elif block == 0x2C:  # image descriptor
+                flags = data[pos + 9]
+                pos += 10
+                if flags & 0x80:
+                    pos += 3 << ((flags & 0x07) + 1)
+                pos = _skip_sub_blocks(data, pos + 1)  # after the LZW code size
+                delays.append(default if delay is None else delay)
+                delay = None
+            else:
+                raise ValueError(f"Unexpected GIF block 0x{block:02X}")
+    except IndexError:
+        # A missing trailer is common and harmless; a cut image is not
+        if delays and pos >= len(data):
+            return delays
+        raise ValueError("Truncated GIF file")
+
+
+def encode_gif(
+    frames: Iterable[IndexedFrame],
+    durations: List[int],
+    loop: Optional[int] = 0,
+    disposal: Union[int, Sequence[int]] = 2,
+) -> bytes:
+    """Assemble an animated GIF from palette-indexed frames.
+
+    The first frame's palette becomes the global colour table; later frames
+    only carry a local colour table when their palette differs.
+
+    Args:
+        frames: Iterable of (indices, palette, transparency) tuples.
+        durations: Per-frame delay in milliseconds.
+        loop: Loop count (0 = forever, None = no NETSCAPE extension).
+        disposal: GIF disposal method written into every frame, or one
+            per frame (like *durations*, entry i is read once frame i
+            has been received).
+
+    Returns:
+        The complete GIF file contents.
+
+    Raises:
+        ValueError: If there are no frames.
+    """
+    out = bytearray()
+    global_palette = None
+
+    for i, (indices, palette, transparency) in enumerate(frames):
+        height, width = indices.shape
+        n_colors = max(len(palette) // 3, int(indices.max(initial=0)) + 1)
+        bits = _table_bits(n_colors)
+
+        if global_palette is None:
+            global_palette = palette
+            global_bits = bits
+            out += b"GIF89a"
+            out += struct.pack("<HHBBB", width, height, 0xF0 | (bits - 1), 0, 0)
+            out += _color_table(palette, bits)
+            if loop is not None:
+                out += b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00"
+
+        delay = round(durations[i] / 10) if i < len(durations) else 10
+        method = disposal if isinstance(disposal, int) else disposal[i]
+        flags = (method & 0x07) << 2 | (transparency is not None)
+        out += struct.pack(
+            "<BBBBHBB", 0x21, 0xF9, 4, flags, delay,
+            transparency if transparency is not None else 0, 0,
+        )
+
+        if palette == global_palette and bits <= global_bits:
+            out += struct.pack("<BHHHHB", 0x2C, 0, 0, width, height, 0)
+        else:
+            out += struct.pack("<BHHHHB", 0x2C, 0, 0, width, height, 0x80 | (bits - 1))
+            out += _color_table(palette, bits)
+
+        min_code_size = max(2, bits)
+        data = np.ascontiguousarray(indices, dtype=np.uint8).tobytes()
+        out += bytes((min_code_size,))
+        out += _sub_blocks(lzw_compress(data, min_code_size))
+
+    if global_palette is None:
+        raise ValueError("Frame list is empty")
+
+    out += b"\x3B"
+    return bytes(out)
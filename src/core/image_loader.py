@@ -1,60 +1,92 @@
-from typing import List, Optional, Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageSequence
 from .utils import ensure_rgba
 
 
+# Image modes that survive a NumPy round-trip through Image.fromarray
+_ARRAY_MODES = ("RGBA", "RGB", "L")
+
+
 class ImageLoader:
     
     @staticmethod
     def load_image(filepath: str) -> Image.Image:
         with Image.open(filepath) as img:
-            return ensure_rgba(img.copy())
+            return img.convert('RGBA')
     
     @staticmethod
     def load_gif_frames(filepath: str) -> List[Tuple[Image.Image, int]]:
-        frames = []
+        # convert() always returns a new image detached from the file
         with Image.open(filepath) as img:
             if not getattr(img, 'is_animated', False):
                 duration = img.info.get('duration', 100)
-                frames.append((ensure_rgba(img.copy()), duration))
-            else:
+                return [(img.convert('RGBA'), duration)]
+            
+            # Decoding has to follow the file (each seek builds on the previous
+            # frame), but converting a detached copy doesn't: palette frames
+            # (cheap to copy at one byte per pixel) are converted on worker
+            # threads while the next frames are decoded.
+            frames = []
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
                 for frame in ImageSequence.Iterator(img):
                     duration = frame.info.get('duration', 100)
-                    frames.append((ensure_rgba(frame.copy()), duration))
-        
-        return frames
+                    if frame.mode == 'RGBA':
+                        frames.append((frame.copy(), duration))
+                    else:
+                        frames.append((pool.submit(frame.copy().convert, 'RGBA'), duration))
+            return [
+                (f if isinstance(f, Image.Image) else f.result(), duration)
+                for f, duration in frames
+            ]
     
+    @staticmethod
+    def split_into_tile_array(image: Image.Image, rows: int, cols: int,
+                              tile_width: int, tile_height: int,
+                              row_base: bool = True) -> np.ndarray:
+        """Cut a rows x cols grid of tiles out of *image* in one NumPy reshape.
+
+        Returns an array of shape (rows * cols, tile_height, tile_width[, bands]),
+        ordered row by row (or column by column when row_base is False).
+        Pixels right/below the grid are ignored, like the crop-based split.
+        """
+        arr = np.asarray(image)[:rows * tile_height, :cols * tile_width]
+        grid = arr.reshape(rows, tile_height, cols, tile_width, *arr.shape[2:]).swapaxes(1, 2)
+        if not row_base:
+            grid = grid.swapaxes(0, 1)
+        return grid.reshape(-1, tile_height, tile_width, *arr.shape[2:])
+
+    @staticmethod
+    def _split_grid(image: Image.Image, rows: int, cols: int,
+                    tile_width: int, tile_height: int, row_base: bool = True) -> List[Image.Image]:
+        if image.mode not in _ARRAY_MODES or tile_width <= 0 or tile_height <= 0:
+            # Modes NumPy can't round-trip (e.g. P) and degenerate grids: crop
+            boxes = [
+                (col * tile_width, row * tile_height,
+                 (col + 1) * tile_width, (row + 1) * tile_height)
+                for row, col in ImageLoader._grid_positions(rows, cols, row_base)
+            ]
+            return [image.crop(box) for box in boxes]
+
+        tiles = ImageLoader.split_into_tile_array(image, rows, cols, tile_width, tile_height, row_base)
+        return [Image.fromarray(tile, image.mode) for tile in tiles]
+
+    @staticmethod
+    def _grid_positions(rows: int, cols: int, row_base: bool = True) -> List[Tuple[int, int]]:
+        if row_base:
+            return [(row, col) for row in range(rows) for col in range(cols)]
+        return [(row, col) for col in range(cols) for row in range(rows)]
+
     @staticmethod
     def split_into_tiles(image: Image.Image, rows: int, cols: int, row_base: bool = True) -> List[Image.Image]:
         img_width, img_height = image.size
         tile_width = img_width // cols
         tile_height = img_height // rows
         
-        if row_base:
-            tiles = []
-            for row in range(rows):
-                for col in range(cols):
-                    left = col * tile_width
-                    upper = row * tile_height
-                    right = left + tile_width
-                    lower = upper + tile_height
-                    
-                    tile = image.crop((left, upper, right, lower))
-                    tiles.append(tile)
-        else:
-            tiles = []
-            for col in range(cols):
-                for row in range(rows):
-                    left = col * tile_width
-                    upper = row * tile_height
-                    right = left + tile_width
-                    lower = upper + tile_height
-                    
-                    tile = image.crop((left, upper, right, lower))
-                    tiles.append(tile)
-        
-        return tiles
+        return ImageLoader._split_grid(image, rows, cols, tile_width, tile_height, row_base)
     
     @staticmethod
     def split_by_tile_size(image: Image.Image, tile_width: int, tile_height: int) -> List[Image.Image]:
@@ -62,32 +94,47 @@ class ImageLoader:
         cols = img_width // tile_width
         rows = img_height // tile_height
         
-        tiles = []
-        for row in range(rows):
-            for col in range(cols):
-                left = col * tile_width
-                upper = row * tile_height
-                right = left + tile_width
-                lower = upper + tile_height
-                
-                tile = image.crop((left, upper, right, lower))
-                tiles.append(tile)
-        
-        return tiles
+        return ImageLoader._split_grid(image, rows, cols, tile_width, tile_height)
 
 
 class MaterialManager:
     
     def __init__(self):
-        self.materials: List[Tuple[Image.Image, str]] = []
+        # One list per field, index = material index: lookups that need a
+        # single field (images for export, names for the UI) read it directly.
+        self.images: List[Image.Image] = []
+        self.names: List[str] = []
         self.durations: List[int] = []
+        # (image, RGBA pixel array) pairs parallel to images, filled on
+        # demand (see get_material_array) or up front by add_material_array.
+        # The image is kept so a replaced material never gets a stale array.
+        self._arrays: List[Optional[Tuple[Image.Image, np.ndarray]]] = []
+    
+    @property
+    def materials(self) -> List[Tuple[Image.Image, str]]:
+        """(image, name) pairs, built from the per-field lists."""
+        return list(zip(self.images, self.names))
     
     def add_material(self, image: Image.Image, name: str = "", duration: int = 100):
         if not name:
-            name = f"Material_{len(self.materials) + 1}"
+            name = f"Material_{len(self.images) + 1}"
         
-        self.materials.append((ensure_rgba(image), name))
+        self.images.append(ensure_rgba(image))
+        self.names.append(name)
         self.durations.append(duration)
+        self._arrays.append(None)
+    
+    def add_material_array(self, array: np.ndarray, name: str = "", duration: int = 100):
+        """Add a material from an (H, W, 4) uint8 RGBA array.
+
+        The array is copied (the caller keeps its own) and stored read-only
+        alongside the image, so NumPy consumers (``get_material_array``)
+        don't have to convert the image back.
+        """
+        array = np.array(array, dtype=np.uint8, order="C")
+        array.setflags(write=False)
+        self.add_material(Image.fromarray(array, "RGBA"), name, duration)
+        self._arrays[-1] = (self.images[-1], array)
     
     def add_materials_from_list(self, images: List[Image.Image], name_prefix: str = "Material", duration: int = 100):
         for i, img in enumerate(images):
@@ -119,22 +166,57 @@ class MaterialManager:
         self.add_materials_from_list(tiles, f"{name_prefix}_tile")
     
     def get_material(self, index: int) -> Optional[Tuple[Image.Image, str]]:
-        if 0 <= index < len(self.materials):
-            return self.materials[index]
+        if 0 <= index < len(self.images):
+            return self.images[index], self.names[index]
         return None
     
+    def get_material_array(self, index: int) -> Optional[np.ndarray]:
+        """Return material *index* as a read-only (H, W, 4) uint8 array."""
+        if not 0 <= index < len(self.images):
+            return None
+        image = self.images[index]
+        pair = self._arrays[index]
+        if pair is None or pair[0] is not image:
+            pair = (image, np.asarray(image))
+            self._arrays[index] = pair
+        return pair[1]
+    
+    def invalidate(self, index: int):
+        """Drop the cached array of material *index* after its image was
+        edited in place; the next ``get_material_array`` rebuilds it.
+
+        Replacing a material's image (``images[index] = new``) needs no
+        call: the cached array and the export caches are matched to the
+        image object they were built from.
+        """
+        if 0 <= index < len(self.images):
+            self._arrays[index] = None
+    
     def get_all_materials(self) -> List[Tuple[Image.Image, str]]:
-        return self.materials.copy()
+        return self.materials
+    
+    def iter_materials(self) -> Iterator[Tuple[Image.Image, str]]:
+        """Iterate (image, name) pairs without building a list (don't add or
+        remove materials while iterating)."""
+        return zip(self.images, self.names)
+    
+    def get_images(self) -> List[Image.Image]:
+        """All material images in index order (a copy of the list)."""
+        return self.images.copy()
     
     def remove_material(self, index: int):
-        if 0 <= index < len(self.materials):
-            del self.materials[index]
+        if 0 <= index < len(self.images):
+            del self.images[index]
+            del self.names[index]
             del self.durations[index]
+            del self._arrays[index]
     
     def clear(self):
-        self.materials.clear()
+        self.images.clear()
+        self.names.clear()
         self.durations.clear()
+        self._arrays.clear()
     
     def __len__(self):
-        return len(self.materials)
+        return len(self.images)
 
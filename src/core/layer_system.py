@@ -4,18 +4,43 @@ Supports position, crop, and scale adjustments for each layer
 """
 
 import logging
+from functools import lru_cache
 from typing import List, Tuple, Optional
 from dataclasses import dataclass, field
 from PIL import Image
-from .utils import ensure_rgba
+from .utils import DATACLASS_SLOTS, ensure_rgba, resize_rgba
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _opacity_level(opacity: float) -> int:
+    """Opacity as the 0-255 alpha multiplier it is applied with (255 = none;
+    negative values are ignored like values >= 1)."""
+    if opacity >= 1.0 or opacity < 0:
+        return 255
+    return round(opacity * 255)
+
+
+@lru_cache(maxsize=32)
+def _blank_canvas(
+    size: Tuple[int, int], background_color: Tuple[int, int, int, int], mode: str
+) -> Image.Image:
+    """Shared background-only frame for ``composite_frame`` (never modified)."""
+    if mode == 'RGB':
+        return Image.new('RGB', size, background_color[:3])
+    return Image.new('RGBA', size, background_color)
+
+
+@lru_cache(maxsize=256)
+def _opacity_lut(level: int) -> List[int]:
+    """``Image.point`` table scaling an alpha band by *level*/255."""
+    return [p * level // 255 for p in range(256)]
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class Layer:
     """
-    Represents a single layer in a frame
+    Represents a single layer in a frame (immutable, so frames can share it)
     
     Attributes:
         material_index: Index to material in MaterialManager
@@ -44,67 +69,84 @@ class Layer:
     
     def __post_init__(self):
         if not self.name:
-            self.name = f"Layer {self.material_index}"
+            object.__setattr__(self, "name", f"Layer {self.material_index}")
     
     def copy(self) -> 'Layer':
-        """Create a deep copy of this layer"""
-        return Layer(
-            material_index=self.material_index,
-            x=self.x,
-            y=self.y,
-            crop_x=self.crop_x,
-            crop_y=self.crop_y,
-            crop_width=self.crop_width,
-            crop_height=self.crop_height,
-            scale=self.scale,
-            opacity=self.opacity,
-            visible=self.visible,
-            name=self.name
-        )
+        """Layers are immutable, so a copy is the layer itself (use
+        ``dataclasses.replace`` to get a changed layer)"""
+        return self
+    
+    def _crop_box(self, img_width: int, img_height: int) -> Optional[Tuple[int, int, int, int]]:
+        """Crop region clamped to an image of this size (None = no crop)."""
+        if self.crop_width is None or self.crop_height is None:
+            return None
+        
+        # Ensure crop region is within bounds
+        crop_x = max(0, min(self.crop_x, img_width - 1))
+        crop_y = max(0, min(self.crop_y, img_height - 1))
+        crop_right = min(crop_x + self.crop_width, img_width)
+        crop_bottom = min(crop_y + self.crop_height, img_height)
+        
+        if crop_right > crop_x and crop_bottom > crop_y:
+            return crop_x, crop_y, crop_right, crop_bottom
+        return None
+    
+    def _scaled_size(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """Size after scaling (None = scale is a no-op)."""
+        if abs(self.scale - 1.0) > 0.001 and self.scale > 0:
+            return max(1, int(width * self.scale)), max(1, int(height * self.scale))
+        return None
+    
+    def output_size(self, source_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Size of ``apply_to_image``'s result for a source of *source_size*,
+        computed without touching any pixels."""
+        width, height = source_size
+        box = self._crop_box(width, height)
+        if box is not None:
+            width, height = box[2] - box[0], box[3] - box[1]
+        return self._scaled_size(width, height) or (width, height)
     
     def apply_to_image(self, image: Image.Image) -> Image.Image:
         """
         Apply layer transformations to an image
-        Returns the processed image
+        Returns the processed image (the source itself, converted to RGBA if
+        needed, when there is nothing to apply or a step fails; it is never
+        modified, so callers must copy before drawing on the result)
         """
         try:
-            img = ensure_rgba(image.copy())
+            img = ensure_rgba(image)
             
-            # Apply crop
-            if self.crop_width is not None and self.crop_height is not None:
-                img_width, img_height = img.size
-                
-                # Ensure crop region is within bounds
-                crop_x = max(0, min(self.crop_x, img_width - 1))
-                crop_y = max(0, min(self.crop_y, img_height - 1))
-                crop_right = min(crop_x + self.crop_width, img_width)
-                crop_bottom = min(crop_y + self.crop_height, img_height)
-                
-                if crop_right > crop_x and crop_bottom > crop_y:
-                    img = img.crop((crop_x, crop_y, crop_right, crop_bottom))
+            # Apply crop. Kept as its own step rather than resize(box=...):
+            # a boxed resize samples the filter support from outside the box,
+            # which would bleed neighbouring sprite-sheet tiles into the edges.
+            box = self._crop_box(*img.size)
+            if box is not None:
+                img = img.crop(box)
             
             # Apply scale
-            if abs(self.scale - 1.0) > 0.001 and self.scale > 0:
-                new_width = max(1, int(img.width * self.scale))
-                new_height = max(1, int(img.height * self.scale))
-                if new_width > 0 and new_height > 0:
-                    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            new_size = self._scaled_size(*img.size)
+            if new_size is not None:
+                img = resize_rgba(img, new_size, Image.Resampling.LANCZOS)
             
-            # Apply opacity
-            if self.opacity < 1.0 and self.opacity >= 0:
+            # Apply opacity (in 1/255 steps, the resolution of the alpha band)
+            level = _opacity_level(self.opacity)
+            if level < 255:
                 # Create a copy and adjust alpha channel
                 if img.mode == 'RGBA':
-                    alpha = img.split()[3]
-                    alpha = alpha.point(lambda p: int(p * self.opacity))
+                    if img is image:
+                        img = img.copy()  # putalpha works in place
+                    # getchannel allocates only the alpha band (split() makes all four)
+                    alpha = img.getchannel('A')
+                    alpha = alpha.point(_opacity_lut(level))
                     img.putalpha(alpha)
             
             return img
         except (OSError, ValueError, MemoryError) as e:
             logger.error("Layer.apply_to_image failed: %s", e, exc_info=True)
-            return ensure_rgba(image.copy())
+            return ensure_rgba(image)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class LayeredFrame:
     """
     A frame that can contain multiple layers
@@ -148,9 +190,10 @@ class LayeredFrame:
         return None
     
     def copy(self) -> 'LayeredFrame':
-        """Create a deep copy of this frame"""
+        """Create a copy of this frame (its own layer list; the immutable
+        layers themselves are shared)"""
         return LayeredFrame(
-            layers=[layer.copy() for layer in self.layers],
+            layers=list(self.layers),
             duration=self.duration,
             name=self.name
         )
@@ -165,12 +208,71 @@ class LayeredFrame:
 class LayerCompositor:
     """Handles compositing multiple layers into a single image"""
     
+    @staticmethod
+    def _is_opaque(img: Image.Image) -> bool:
+        """True if *img* has no see-through pixels (alpha band only)."""
+        return img.mode != 'RGBA' or img.getchannel('A').getextrema()[0] == 255
+    
+    @staticmethod
+    def _transformed(
+        layer: Layer, material_img: Image.Image, cache: Optional[dict]
+    ) -> Tuple[Image.Image, bool]:
+        """``layer.apply_to_image`` and whether the result is fully opaque,
+        memoized in *cache* by material and transform."""
+        if cache is None:
+            img = layer.apply_to_image(material_img)
+            return img, LayerCompositor._is_opaque(img)
+        key = (id(material_img),) + LayerCompositor._transform_key(layer)
+        hit = cache.get(key)
+        if hit is not None and hit[0] is material_img:
+            return hit[1], hit[2]
+        img = layer.apply_to_image(material_img)
+        opaque = LayerCompositor._is_opaque(img)
+        cache[key] = (material_img, img, opaque)
+        return img, opaque
+    
+    @staticmethod
+    def _transform_key(layer: Layer) -> tuple:
+        """The parts of *layer* that ``apply_to_image`` actually uses, so
+        layers that differ only in ignored or no-op values share a cache
+        entry (crop offsets without a crop size, a scale within the 0.1%
+        tolerance of 1.0, opacities that give the same alpha level)."""
+        if layer.crop_width is not None and layer.crop_height is not None:
+            crop = (layer.crop_x, layer.crop_y, layer.crop_width, layer.crop_height)
+        else:
+            crop = None
+        scale = layer.scale if abs(layer.scale - 1.0) > 0.001 and layer.scale > 0 else 1.0
+        return crop, scale, _opacity_level(layer.opacity)
+    
+    @staticmethod
+    def _on_canvas(
+        layer: Layer, source_size: Tuple[int, int], canvas_size: Tuple[int, int]
+    ) -> bool:
+        """True if *layer* applied to a source of *source_size* overlaps the
+        canvas at all (decided from its analytic output size)."""
+        if layer.x >= canvas_size[0] or layer.y >= canvas_size[1]:
+            return False
+        width, height = layer.output_size(source_size)
+        return layer.x + width > 0 and layer.y + height > 0
+    
+    @staticmethod
+    def _covers_canvas(
+        layer: Layer, img: Image.Image, opaque: bool, canvas_size: Tuple[int, int]
+    ) -> bool:
+        """True if the processed layer image opaquely hides the whole canvas."""
+        if not opaque or layer.x > 0 or layer.y > 0:
+            return False
+        return layer.x + img.width >= canvas_size[0] and layer.y + img.height >= canvas_size[1]
+    
     @staticmethod
     def composite_frame(
         layered_frame: LayeredFrame,
         material_manager: "MaterialManager",  # noqa: F821 – avoid circular import
         canvas_size: Tuple[int, int],
-        background_color: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        background_color: Tuple[int, int, int, int] = (0, 0, 0, 0),
+        mode: str = 'RGBA',
+        template: Optional[Image.Image] = None,
+        cache: Optional[dict] = None
     ) -> Image.Image:
         """
         Composite all layers in a frame into a single image
@@ -180,14 +282,19 @@ class LayerCompositor:
             material_manager: MaterialManager to get source images
             canvas_size: Output canvas size (width, height)
             background_color: Background color (R, G, B, A)
+            mode: Canvas mode; 'RGB' for an opaque background skips the
+                alpha channel entirely
+            template: Optional blank canvas of this size, colour and mode,
+                reused across frames; it is copied, never modified
+            cache: Optional dict shared across frames; layers that apply the
+                same transform to the same material reuse its result
         
         Returns:
-            Composited image
+            Composited image. When no layer draws anything this is *template*
+            itself or a shared blank canvas, so treat the result as read-only.
         """
-        # Create canvas
-        canvas = Image.new('RGBA', canvas_size, background_color)
-        
-        # Composite each layer from bottom to top
+        # Apply layer transformations (bottom to top)
+        processed = []
         for layer in layered_frame.layers:
             if not layer.visible:
                 continue
@@ -198,13 +305,38 @@ class LayerCompositor:
                 continue
             
             material_img, _ = material
-            
-            # Apply layer transformations
-            processed_img = layer.apply_to_image(material_img)
-            
-            # Paste onto canvas at specified position
+            if not LayerCompositor._on_canvas(layer, material_img.size, canvas_size):
+                continue  # nothing would be drawn: skip crop/scale/opacity too
+            processed.append((layer, *LayerCompositor._transformed(layer, material_img, cache)))
+        
+        # Empty / hidden / off-canvas placeholder frames: no canvas to build
+        if not processed:
+            if template is not None:
+                return template
+            return _blank_canvas(canvas_size, tuple(background_color), mode)
+        
+        # Create canvas
+        if template is not None:
+            canvas = template.copy()
+        elif mode == 'RGB':
+            canvas = Image.new('RGB', canvas_size, background_color[:3])
+        else:
+            canvas = Image.new('RGBA', canvas_size, background_color)
+        
+        # Everything below the topmost opaque layer that covers the whole
+        # canvas is hidden, so compositing starts there.
+        start = 0
+        for i in range(len(processed) - 1, -1, -1):
+            if LayerCompositor._covers_canvas(*processed[i], canvas_size):
+                start = i
+                break
+        
+        # Composite each layer from bottom to top
+        for layer, processed_img, opaque in processed[start:]:
+            # Paste onto canvas at specified position; an opaque layer needs
+            # no alpha mask, which makes the paste a plain copy
             try:
-                canvas.paste(processed_img, (layer.x, layer.y), processed_img)
+                canvas.paste(processed_img, (layer.x, layer.y), None if opaque else processed_img)
             except (ValueError, MemoryError) as e:
                 logger.warning("Failed to paste layer %r: %s", layer.name, e)
                 continue
@@ -11,10 +11,13 @@ reflect its purpose as a layer composition system, not multiple independent time
 """
 
 from dataclasses import dataclass, field
+from itertools import chain, compress, repeat
 from typing import List, Optional, Tuple
 
+from .utils import DATACLASS_SLOTS
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class LayerFrame:
     """A single frame entry pointing to a material (or group) and its offset within the canvas."""
     material_index: Optional[int] = None
@@ -23,7 +26,34 @@ class LayerFrame:
     y: int = 0
 
 
-@dataclass
+class _EmptyLayerFrame(LayerFrame):
+    """Type of ``EMPTY_FRAME``: a blank LayerFrame that refuses edits."""
+    __slots__ = ()
+
+    def __init__(self):
+        for name, value in (("material_index", None), ("group_index", None), ("x", 0), ("y", 0)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "EMPTY_FRAME is shared by every blank slot; assign a new LayerFrame instead"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, LayerFrame):
+            return NotImplemented
+        return (other.material_index, other.group_index, other.x, other.y) == (None, None, 0, 0)
+
+    def __reduce__(self):
+        return "EMPTY_FRAME"  # pickles/copies as the module-level singleton
+
+
+# Placeholder in every blank timebase slot (one object instead of one per
+# frame per track). Filling a slot replaces it: track.frames[i] = LayerFrame(...)
+EMPTY_FRAME = _EmptyLayerFrame()
+
+
+@dataclass(**DATACLASS_SLOTS)
 class LayerTrack:
     """A named layer track with its own sequence of frames (materials/groups + offsets)."""
     name: str
@@ -106,34 +136,37 @@ class LayerTimelineEditor:
         self.durations_ms.extend([duration] * count)
         # Append placeholder frames for all tracks
         for t in self.layer_tracks:
-            for _ in range(count):
-                t.frames.append(LayerFrame())
+            t.frames.extend([EMPTY_FRAME] * count)
 
     def insert_timebase_frames(self, position: int, count: int, duration_ms: Optional[int] = None):
         duration = self.default_duration if duration_ms is None else duration_ms
         position = max(0, min(position, len(self.durations_ms)))
-        for _ in range(count):
-            self.durations_ms.insert(position, duration)
+        if count <= 0:
+            return
+        # Slice assignment shifts the tail once per list, not once per frame
+        self.durations_ms[position:position] = [duration] * count
         # Insert placeholder frames in every track
         for t in self.layer_tracks:
-            for _ in range(count):
-                t.frames.insert(position, LayerFrame())
+            t.frames[position:position] = [EMPTY_FRAME] * count
 
     def remove_timebase_frames(self, positions: List[int]):
-        # Remove in reverse order to keep indices stable
-        for pos in sorted(positions, reverse=True):
-            if 0 <= pos < len(self.durations_ms):
-                del self.durations_ms[pos]
-                for t in self.layer_tracks:
-                    if 0 <= pos < len(t.frames):
-                        del t.frames[pos]
+        count = len(self.durations_ms)
+        drop = {pos for pos in positions if 0 <= pos < count}
+        if not drop:
+            return
+        # One keep-mask for every list: each is compacted once (in C), not
+        # shifted per removed frame. Frames past the timebase are kept.
+        keep = [i not in drop for i in range(count)]
+        self.durations_ms[:] = compress(self.durations_ms, keep)
+        for t in self.layer_tracks:
+            t.frames[:] = compress(t.frames, chain(keep, repeat(True)))
 
     def set_timebase_duration(self, position: int, duration_ms: int):
         if 0 <= position < len(self.durations_ms):
             self.durations_ms[position] = duration_ms
 
     def set_timebase_all_durations(self, duration_ms: int):
-        self.durations_ms = [duration_ms for _ in self.durations_ms]
+        self.durations_ms[:] = [duration_ms] * len(self.durations_ms)
 
     def move_timebase_frame(self, from_pos: int, to_pos: int):
         if 0 <= from_pos < len(self.durations_ms) and 0 <= to_pos < len(self.durations_ms):
@@ -151,6 +184,9 @@ class LayerTimelineEditor:
                 if 0 <= position < len(t.frames):
                     # shallow copy is fine as fields are immutable ints
                     orig = t.frames[position]
+                    if orig is EMPTY_FRAME:
+                        t.frames.insert(position + 1, EMPTY_FRAME)
+                        continue
                     t.frames.insert(position + 1, LayerFrame(
                         material_index=orig.material_index,
                         group_index=orig.group_index,
@@ -168,8 +204,7 @@ class LayerTimelineEditor:
         t = self.get_layer_track(track_index)
         if t is None:
             return
-        while len(t.frames) < length:
-            t.frames.append(LayerFrame())
+        t.frames.extend([EMPTY_FRAME] * (length - len(t.frames)))
 
     # ----- Rendering helpers -----
     def iter_frame_layers(self, frame_index: int) -> List[Tuple[Optional[int], Optional[int], int, int]]:
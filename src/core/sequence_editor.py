@@ -1,8 +1,11 @@
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 from PIL import Image
 
 
 class Frame:
+    # Treated as immutable: SequenceEditor replaces a Frame instead of editing
+    # it, so the same object may appear at several positions (repeats).
+    __slots__ = ("material_index", "duration")
     
     def __init__(self, material_index: int, duration: int = 100):
         self.material_index = material_index
@@ -49,28 +52,21 @@ class SequenceEditor:
     
     def set_frame_duration(self, position: int, duration: int):
         if 0 <= position < len(self.frames):
-            self.frames[position].duration = duration
+            self.frames[position] = Frame(self.frames[position].material_index, duration)
     
     def set_all_durations(self, duration: int):
-        for frame in self.frames:
-            frame.duration = duration
+        self.frames[:] = [Frame(frame.material_index, duration) for frame in self.frames]
     
     def set_sequence_from_pattern(self, pattern: List[int], duration: int = None):
         if duration is None:
             duration = self.default_duration
         
-        self.frames.clear()
-        for material_idx in pattern:
-            self.add_frame(material_idx, duration)
+        self.frames[:] = [Frame(material_idx, duration) for material_idx in pattern]
     
     def repeat_sequence(self, times: int):
-        if not self.frames:
-            return
-        
-        original_frames = self.frames.copy()
-        for _ in range(times - 1):
-            for frame in original_frames:
-                self.add_frame(frame.material_index, frame.duration)
+        if self.frames and times > 1:
+            # Frames are never edited in place, so the repeats can share them
+            self.frames *= times
     
     def reverse_sequence(self):
         self.frames.reverse()
@@ -82,8 +78,14 @@ class SequenceEditor:
         return sum(frame.duration for frame in self.frames)
     
     def get_frames(self) -> List[Frame]:
+        """Snapshot of the frame list (safe to keep across edits)."""
         return self.frames.copy()
     
+    def iter_frames(self) -> Iterator[Frame]:
+        """Iterate the frames without copying the list (don't edit the
+        sequence while iterating)."""
+        return iter(self.frames)
+    
     def clear(self):
         self.frames.clear()
     
@@ -10,6 +10,11 @@ import json
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: several times faster template save/load
+    orjson = None
+
 from .composition_group import (
     group_to_dict, group_from_dict, max_material_index, remap_material_indices,
 )
@@ -20,6 +25,34 @@ FORMAT = "composition_group"
 VERSION = "4.0"
 
 
+def _iter_material_indices(template: Dict[str, Any], counts: Optional[Dict[str, int]] = None):
+    """Yield every material_index referenced by a template's groups.
+
+    If *counts* is given, each entry is also tallied there by its type, so
+    get_template_info gets its totals from the same walk that
+    estimate_required_tiles uses.
+    """
+    for g in template.get("groups", []):
+        for e in g.get("entries", []):
+            t = e.get("type")
+            if counts is not None:
+                counts[t] = counts.get(t, 0) + 1
+            if t == "frame":
+                yield e.get("material_index", 0)
+            elif t == "layerblock":
+                for tl in e.get("timelines", []):
+                    for s in tl:
+                        if s.get("type") == "frameslot":
+                            yield s.get("material_index", 0)
+
+
+def _consume(items: list):
+    """Yield the items of *items* in order, removing each from the list."""
+    items.reverse()
+    while items:
+        yield items.pop()
+
+
 class TemplateManager:
     """
     Export / import CompositionGroup templates (JSON).
@@ -65,10 +98,6 @@ class TemplateManager:
         color_count: int = 256,
     ) -> Dict[str, Any]:
         """Serialize a GroupManager into a template dict."""
-        groups_list = []
-        for gid, group in enumerate(group_manager.groups):
-            groups_list.append(group_to_dict(gid, group))
-
         return {
             "version": VERSION,
             "format": FORMAT,
@@ -77,7 +106,7 @@ class TemplateManager:
                 "color_count": color_count,
             },
             "root_group_id": group_manager.get_root_group_id(),
-            "groups": groups_list,
+            "groups": [group_to_dict(gid, group) for gid, group in enumerate(group_manager.groups)],
         }
 
     # ── Import ────────────────────────────────────────────────────────────────
@@ -86,6 +115,7 @@ class TemplateManager:
     def import_composition_template(
         template: Dict[str, Any],
         material_index_mapping: Optional[Dict[int, int]] = None,
+        release_groups: bool = False,
     ) -> Tuple[GroupManager, Dict[str, Any]]:
         """
         Deserialize a template dict back into a GroupManager.
@@ -94,6 +124,11 @@ class TemplateManager:
             template: Template dict (must be format "composition_group").
             material_index_mapping: Optional {old_idx: new_idx} remapping for
                                     applying the template to a different tile set.
+            release_groups: Empty ``template["groups"]`` while importing, so
+                            each group's data is freed as soon as its
+                            CompositionGroup is built (for a freshly loaded
+                            file that is not kept; the parsed JSON and the
+                            restored groups then never both stay in memory).
 
         Returns:
             (GroupManager, settings_dict)
@@ -104,7 +139,8 @@ class TemplateManager:
             )
 
         gm = GroupManager()
-        for group_data in template.get("groups", []):
+        groups = template.get("groups", [])
+        for group_data in _consume(groups) if release_groups else groups:
             gm.add_group(group_from_dict(group_data))
 
         root = template.get("root_group_id")
@@ -121,11 +157,20 @@ class TemplateManager:
 
     @staticmethod
     def save_template_to_file(template: Dict[str, Any], file_path: str) -> None:
+        if orjson is not None:
+            # Same UTF-8, 2-space-indented output as the json module;
+            # integer dict keys (material mappings) become strings like in json
+            Path(file_path).write_bytes(
+                orjson.dumps(template, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
+            return
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(template, f, indent=2, ensure_ascii=False)
 
     @staticmethod
     def load_template_from_file(file_path: str) -> Dict[str, Any]:
+        if orjson is not None:
+            return orjson.loads(Path(file_path).read_bytes())
         with open(file_path, "r", encoding="utf-8") as f:
             return json.load(f)
 
@@ -137,42 +182,19 @@ class TemplateManager:
         if template.get("format") == FORMAT:
             groups = template.get("groups", [])
             settings = template.get("settings", {})
-
-            # Count total frame entries across all groups
-            total_frames = 0
-            total_subgroups = 0
-            total_layerblocks = 0
-            mat_indices: set = set()
-
-            def _scan_entries(entries):
-                nonlocal total_frames, total_subgroups, total_layerblocks
-                for e in entries:
-                    t = e.get("type")
-                    if t == "frame":
-                        total_frames += 1
-                        mat_indices.add(e.get("material_index", 0))
-                    elif t == "subgroup":
-                        total_subgroups += 1
-                    elif t == "layerblock":
-                        total_layerblocks += 1
-                        for tl in e.get("timelines", []):
-                            for s in tl:
-                                if s.get("type") == "frameslot":
-                                    mat_indices.add(s.get("material_index", 0))
-
-            for g in groups:
-                _scan_entries(g.get("entries", []))
+            counts: Dict[str, int] = {}
+            mat_indices = sorted(set(_iter_material_indices(template, counts)))
 
             return {
                 "version": template.get("version", VERSION),
                 "format": FORMAT,
                 "group_count": len(groups),
                 "root_group_id": template.get("root_group_id"),
-                "total_frame_entries": total_frames,
-                "total_subgroup_entries": total_subgroups,
-                "total_layerblock_entries": total_layerblocks,
-                "unique_material_indices": sorted(mat_indices),
-                "materials_needed": (max(mat_indices) + 1) if mat_indices else 0,
+                "total_frame_entries": counts.get("frame", 0),
+                "total_subgroup_entries": counts.get("subgroup", 0),
+                "total_layerblock_entries": counts.get("layerblock", 0),
+                "unique_material_indices": mat_indices,
+                "materials_needed": (mat_indices[-1] + 1) if mat_indices else 0,
                 "transparent_bg": settings.get("transparent_bg", False),
                 "color_count": settings.get("color_count", 256),
             }
@@ -207,5 +229,6 @@ class TemplateManager:
         """Return max_material_index + 1 for the template (tiles needed for batch)."""
         if template.get("format") != FORMAT:
             return 0
-        info = TemplateManager.get_template_info(template)
-        return info.get("materials_needed", 0)
+        # Runs once per image in batch mode: a single max() pass over the
+        # indices instead of building the full get_template_info() summary.
+        return max(_iter_material_indices(template), default=-1) + 1
@@ -638,12 +638,12 @@ class ComposerPanelMixin:
                 img_small.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
                 img = img_small
 
-            # Get all pixels
-            pixels = list(img.getdata())
-            total_pixels = len(pixels)
-
-            # Count colors
-            color_counts = Counter(pixels)
+            # Count colors in Pillow's C core rather than one Python object
+            # per pixel; maxcolors = pixel count can never overflow
+            total_pixels = img.width * img.height
+            color_counts = Counter(
+                {color: count for count, color in img.getcolors(total_pixels)}
+            )
 
             # Get top colors (store all for "show more" functionality)
             top_colors = color_counts.most_common(100)  # Store up to 100
@@ -255,7 +255,9 @@ class TemplateMixin:
                 QMessageBox.information(self, "No Auto-Save", "No auto-save file found.")
                 return
             template = TemplateManager.load_template_from_file(str(self.auto_save_file))
-            new_gm, settings = TemplateManager.import_composition_template(template)
+            new_gm, settings = TemplateManager.import_composition_template(
+                template, release_groups=True
+            )
             self.group_manager = new_gm
             if settings:
                 self.transparent_bg_checkbox.setChecked(
@@ -39,7 +39,7 @@ class MaterialSelectorDialog(QDialog):
         layout.addWidget(self.material_list)
         
         # Populate list
-        for i, (img, name) in enumerate(self.material_manager.get_all_materials()):
+        for i, (img, name) in enumerate(self.material_manager.iter_materials()):
             icon_pixmap = self.create_thumbnail(img, 64, 64)
             item = QListWidgetItem(f"[{i}] {name} ({img.width}x{img.height})")
             item.setIcon(QIcon(icon_pixmap))
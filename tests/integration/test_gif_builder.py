@@ -1,11 +1,60 @@
+import io
+import subprocess
+import threading
+import types
+import weakref
+
+import numpy as np
+import pytest
 from PIL import Image
-from src.core.gif_builder import GifBuilder
+import src.core.gif_builder as gif_builder_module
+from src.core.gif_builder import GifBuilder, _PREFETCH_DEPTH
+from src.core.composition_group import CompositionGroup, FrameEntry, SubGroupEntry
+from src.core.layer_system import Layer, LayeredFrame
 from src.core.image_loader import MaterialManager
 from src.core.sequence_editor import SequenceEditor
 from src.core.layer_timeline import LayerTimelineEditor, LayerFrame
 from src.core.group_manager import GroupManager
 
 
+@pytest.fixture()
+def two_materials() -> MaterialManager:
+    # 8x8 RGB materials: "a" red, "b" green
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (8, 8), (200, 0, 0)), name="a")
+    mm.add_material(Image.new("RGB", (8, 8), (0, 200, 0)), name="b")
+    return mm
+
+
+@pytest.fixture()
+def make_root_group():
+    def _make(indices, durations=None):
+        # GroupManager holding one "Root" group (id 0) showing *indices* in order
+        root = CompositionGroup(name="Root", default_duration_ms=100)
+        for i, duration in zip(indices, durations or [100] * len(indices)):
+            root.entries.append(FrameEntry(material_index=i, x=0, y=0, duration_ms=duration))
+        group_mgr = GroupManager()
+        group_mgr.add_group(root)
+        return group_mgr
+    return _make
+
+
+@pytest.fixture()
+def make_red_frames():
+    def _make(count, size, step):
+        return [Image.new("RGB", size, (i * step, 0, 0)) for i in range(count)]
+    return _make
+
+
+@pytest.fixture()
+def write_gif(tmp_path):
+    def _write(frames, **save_kwargs):
+        path = tmp_path / "in.gif"
+        frames[0].save(path, save_all=True, append_images=frames[1:], **save_kwargs)
+        return path
+    return _write
+
+
 def test_build_from_sequence_solid_bg(tmp_gif_path, rgb_image_small):
     mm = MaterialManager()
     mm.add_material(rgb_image_small, name="a", duration=90)
@@ -65,7 +114,6 @@ def test_build_from_layer_timeline(tmp_gif_path, rgb_image_small):
 
 def test_build_gif_from_group_with_loops(tmp_gif_path):
     """CompositionGroup: SubGroupEntry with loop_count=2 → 6 frames + 1 = 7 total."""
-    from src.core.composition_group import CompositionGroup, FrameEntry, SubGroupEntry
 
     mm = MaterialManager()
     for i in range(4):
@@ -96,7 +144,6 @@ def test_build_gif_from_group_with_loops(tmp_gif_path):
 
 def test_build_gif_from_group_empty_group_no_crash(tmp_gif_path, rgb_image_small):
     """Empty subgroup produces no frames; root still exports the non-empty entries."""
-    from src.core.composition_group import CompositionGroup, FrameEntry, SubGroupEntry
 
     mm = MaterialManager()
     mm.add_material(rgb_image_small, name="mat_0")
@@ -121,7 +168,6 @@ def test_build_gif_from_group_empty_group_no_crash(tmp_gif_path, rgb_image_small
 
 def test_build_gif_from_group_subgroup_xy_offset(tmp_gif_path):
     """SubGroupEntry x/y offset shifts materials during expansion."""
-    from src.core.composition_group import CompositionGroup, FrameEntry, SubGroupEntry
 
     mm = MaterialManager()
     img = Image.new("RGB", (8, 8), (0, 128, 255))
@@ -146,18 +192,13 @@ def test_build_gif_from_group_subgroup_xy_offset(tmp_gif_path):
     assert info["size"] == (30, 30)
 
 
-def test_build_apng_and_webp_from_group(tmp_path):
-    from src.core.composition_group import CompositionGroup, FrameEntry
-
+def test_build_apng_and_webp_from_group(tmp_path, make_root_group):
     mm = MaterialManager()
     mm.add_material(Image.new("RGBA", (10, 10), (255, 0, 0, 255)), name="a")
     mm.add_material(Image.new("RGBA", (10, 10), (0, 255, 0, 255)), name="b")
 
-    group_mgr = GroupManager()
-    root = CompositionGroup(name="Root", default_duration_ms=100)
-    root.entries.append(FrameEntry(material_index=0, x=0, y=0, duration_ms=80))
-    root.entries.append(FrameEntry(material_index=1, x=0, y=0, duration_ms=120))
-    gid = group_mgr.add_group(root)
+    group_mgr = make_root_group([0, 1], [80, 120])
+    gid = 0
 
     gb = GifBuilder()
     gb.set_output_size(10, 10)
@@ -175,34 +216,27 @@ def test_build_apng_and_webp_from_group(tmp_path):
     assert getattr(Image.open(webp_path), "n_frames", 1) == 2
 
 
-def test_build_apng_from_group_raises_on_empty_materials(tmp_path):
-    from src.core.composition_group import CompositionGroup
-
+def test_build_apng_from_group_raises_on_empty_materials(tmp_path, make_root_group):
     mm = MaterialManager()
-    group_mgr = GroupManager()
-    root = CompositionGroup(name="Root", default_duration_ms=100)
-    gid = group_mgr.add_group(root)
+    group_mgr = make_root_group([])
+    gid = 0
 
     gb = GifBuilder()
     gb.set_output_size(10, 10)
 
-    import pytest
     with pytest.raises(ValueError):
         gb.build_apng_from_group(gid, group_mgr, mm, str(tmp_path / "out.png"))
 
 
-def test_build_webp_from_group_respects_solid_background(tmp_path):
+def test_build_webp_from_group_respects_solid_background(tmp_path, make_root_group):
     """A solid (non-transparent) background should flatten the material's own
     alpha channel to fully opaque, unlike the transparent-background case."""
-    from src.core.composition_group import CompositionGroup, FrameEntry
 
     mm = MaterialManager()
     mm.add_material(Image.new("RGBA", (10, 10), (255, 0, 0, 128)), name="a")
 
-    group_mgr = GroupManager()
-    root = CompositionGroup(name="Root", default_duration_ms=100)
-    root.entries.append(FrameEntry(material_index=0, x=0, y=0, duration_ms=100))
-    gid = group_mgr.add_group(root)
+    group_mgr = make_root_group([0])
+    gid = 0
 
     gb = GifBuilder()
     gb.set_output_size(10, 10)
@@ -216,3 +250,1046 @@ def test_build_webp_from_group_respects_solid_background(tmp_path):
     assert a == 255
 
 
+def test_convert_frame_for_gif_flattens_alpha_onto_solid_background():
+    gb = GifBuilder()
+    gb.set_background_color(0, 0, 255, 255)
+
+    img = Image.new("RGBA", (4, 4), (255, 0, 0, 0))
+    img.putpixel((0, 0), (255, 0, 0, 255))
+    img.putpixel((1, 0), (255, 0, 0, 128))
+
+    out = gb._convert_frame_for_gif(img)
+    assert out.mode == "RGB"
+    assert out.getpixel((0, 0)) == (255, 0, 0)
+    assert out.getpixel((1, 0)) == (128, 0, 127)
+    assert out.getpixel((2, 2)) == (0, 0, 255)
+
+
+def test_build_from_sequence_prepares_each_material_once(tmp_gif_path, monkeypatch, two_materials):
+    mm = two_materials
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([0, 1, 0, 1, 0, 1])
+
+    gb = GifBuilder()
+    gb.set_output_size(8, 8)
+    calls = []
+    original = gb.prepare_frame
+    monkeypatch.setattr(gb, "prepare_frame", lambda img, *args: calls.append(img) or original(img, *args))
+
+    gb.build_from_sequence(mm, se, output_path=str(tmp_gif_path))
+
+    assert len(calls) == 2
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 6
+
+
+def test_build_from_images_does_not_mutate_oversized_sources(tmp_gif_path):
+    big = Image.new("RGBA", (40, 20), (10, 200, 30, 255))
+
+    gb = GifBuilder()
+    gb.set_output_size(10, 10)
+    gb.set_background_color(0, 0, 0, 0)
+    gb.build_from_images([big, big], durations=[50, 50], output_path=str(tmp_gif_path))
+
+    assert big.size == (40, 20)
+    assert gb.get_gif_info(str(tmp_gif_path))["size"] == (10, 10)
+
+
+class _FakeGifsicle:
+    """Stands in for ``subprocess.Popen``: records the command and every
+    single-frame GIF streamed to stdin."""
+
+    instances = []
+
+    def __init__(self, cmd, **kwargs):
+        self.cmd = cmd
+        self.chunks = []
+        self.returncode = None
+        self.killed = False
+        _FakeGifsicle.instances.append(self)
+
+        fake = self
+
+        class _Stdin:
+            def write(self, data):
+                fake.chunks.append(bytes(data))
+
+        self.stdin = _Stdin()
+
+    def frames(self):
+        out = []
+        for chunk in self.chunks:
+            with Image.open(io.BytesIO(chunk)) as img:
+                out.append((img.size, img.info.get("duration")))
+        return out
+
+    def communicate(self):
+        self.returncode = 0
+        return b"", b""
+
+    def kill(self):
+        self.killed = True
+
+    def wait(self):
+        return self.returncode
+
+
+def test_gifsicle_encoder_streams_frames_with_delays_and_loop(tmp_gif_path, monkeypatch):
+    _FakeGifsicle.instances = []
+    monkeypatch.setattr(gif_builder_module, "is_gifsicle_available", lambda: True)
+    monkeypatch.setattr(gif_builder_module.subprocess, "Popen", _FakeGifsicle)
+
+    gb = GifBuilder()
+    gb.set_encoder("gifsicle")
+    gb.set_output_size(8, 8)
+    gb.set_loop(3)
+    img1 = Image.new("RGB", (8, 8), (255, 0, 0))
+    img2 = Image.new("RGB", (8, 8), (0, 255, 0))
+    gb.build_from_images([img1, img2], durations=[50, 124], output_path=str(tmp_gif_path))
+
+    (proc,) = _FakeGifsicle.instances
+    cmd = proc.cmd
+    assert cmd[0] == "gifsicle"
+    assert "--loopcount=3" in cmd
+    assert cmd[-4:] == ["--multifile", "-", "-o", str(tmp_gif_path)]
+    # Delays travel inside each frame, rounded to centiseconds
+    assert proc.frames() == [((8, 8), 50), ((8, 8), 120)]
+
+
+def test_gifsicle_encoder_reports_failure_and_kills_on_error(tmp_gif_path, monkeypatch):
+    class Failing(_FakeGifsicle):
+        def communicate(self):
+            self.returncode = 1
+            return b"", b"gifsicle: bad input"
+
+    monkeypatch.setattr(gif_builder_module, "is_gifsicle_available", lambda: True)
+    monkeypatch.setattr(gif_builder_module.subprocess, "Popen", Failing)
+    gb = GifBuilder()
+    gb.set_encoder("gifsicle")
+    with pytest.raises(ValueError, match="bad input"):
+        gb.save_gif([Image.new("P", (4, 4))], [100], str(tmp_gif_path))
+
+    def frames():
+        yield Image.new("P", (4, 4))
+        raise RuntimeError("frame failed")
+
+    _FakeGifsicle.instances = []
+    monkeypatch.setattr(gif_builder_module.subprocess, "Popen", _FakeGifsicle)
+    with pytest.raises(RuntimeError):
+        gb.save_gif(frames(), [100, 100], str(tmp_gif_path))
+    assert _FakeGifsicle.instances[0].killed
+
+
+def test_gifsicle_encoder_falls_back_to_pillow_when_missing(tmp_gif_path, monkeypatch):
+    monkeypatch.setattr(gif_builder_module, "is_gifsicle_available", lambda: False)
+
+    gb = GifBuilder()
+    gb.set_encoder("gifsicle")
+    gb.build_from_images([Image.new("RGB", (8, 8), (1, 2, 3))], durations=[100],
+                         output_path=str(tmp_gif_path))
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 1
+
+
+def test_set_encoder_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        GifBuilder().set_encoder("nope")
+
+
+def test_shared_palette_is_reused_by_every_frame():
+    gb = GifBuilder()
+    gb.set_color_count(16)
+    gb.set_background_color(255, 255, 255, 255)
+    red = Image.new("RGBA", (6, 6), (255, 0, 0, 255))
+    green = Image.new("RGBA", (6, 6), (0, 255, 0, 255))
+
+    palette = gb._build_shared_palette([red, green])
+    out_red = gb._convert_frame_for_gif(red, palette)
+    out_green = gb._convert_frame_for_gif(green, palette)
+
+    assert out_red.mode == out_green.mode == "P"
+    assert out_red.getpalette() == out_green.getpalette()
+    assert out_red.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+    assert out_green.convert("RGB").getpixel((0, 0)) == (0, 255, 0)
+
+
+def test_prepare_frame_gives_each_frame_its_own_background():
+    gb = GifBuilder()
+    gb.set_output_size(10, 10)
+    gb.set_background_color(0, 0, 255, 255)
+    template = gb._background_template()
+
+    first = gb.prepare_frame(Image.new("RGBA", (4, 4), (255, 0, 0, 255)))
+    second = gb.prepare_frame(Image.new("RGBA", (4, 4), (0, 255, 0, 255)))
+
+    assert first is not second and first is not template
+    assert template.getpixel((5, 5)) == (0, 0, 255, 255)
+    assert first.getpixel((5, 5)) == (255, 0, 0, 255)
+    assert first.getpixel((0, 0)) == second.getpixel((0, 0)) == (0, 0, 255, 255)
+
+    gb.set_background_color(0, 0, 0, 0)
+    assert gb.prepare_frame(Image.new("RGBA", (4, 4))).getpixel((0, 0)) == (0, 0, 0, 0)
+
+
+def test_prepare_frame_resample_filter():
+    # 2x2 checkerboard blown up 4x: an exact integer down-scale
+    small = Image.new("RGBA", (2, 2), (0, 0, 0, 255))
+    small.putpixel((1, 0), (255, 255, 255, 255))
+    small.putpixel((0, 1), (255, 255, 255, 255))
+    big = small.resize((8, 8), Image.Resampling.NEAREST)
+
+    gb = GifBuilder()
+    gb.set_output_size(2, 2)
+    assert gb.prepare_frame(big).tobytes() == small.tobytes()
+
+    gb.set_resample_filter(Image.Resampling.BILINEAR)
+    assert gb.prepare_frame(big).tobytes() != small.tobytes()
+
+
+def test_prepare_frame_skips_canvas_when_material_fills_transparent_output():
+    gb = GifBuilder()
+    gb.set_output_size(4, 4)
+    gb.set_background_color(0, 0, 0, 0)
+    material = Image.new("RGBA", (4, 4), (10, 20, 30, 100))
+
+    assert gb.prepare_frame(material) is material
+
+
+def test_prepare_frame_skips_canvas_when_opaque_material_fills_output(monkeypatch):
+    gb = GifBuilder()
+    gb.set_output_size(4, 4)
+    gb.set_background_color(0, 0, 255, 255)
+    monkeypatch.setattr(
+        gif_builder_module, "paste_center_inplace",
+        lambda *a: (_ for _ in ()).throw(AssertionError("canvas built")),
+    )
+    material = Image.new("RGBA", (4, 4), (10, 20, 30, 255))
+
+    assert gb.prepare_frame(material) is material
+    rgb = gb.prepare_frame(material, out_mode="RGB")
+    assert rgb.mode == "RGB" and rgb.getpixel((0, 0)) == (10, 20, 30)
+
+    # Any see-through pixel still needs the background underneath
+    material.putpixel((0, 0), (10, 20, 30, 254))
+    monkeypatch.undo()
+    assert gb.prepare_frame(material).getpixel((0, 0))[2] > 30
+
+
+def test_build_from_sequence_rejects_missing_material_index(tmp_gif_path):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (4, 4)), name="a")
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([0, 3, 0])
+
+    with pytest.raises(ValueError, match="Material index 3"):
+        GifBuilder().build_from_sequence(mm, se, output_path=str(tmp_gif_path))
+
+
+def test_save_gif_leaves_no_partial_file_when_encoding_fails(tmp_gif_path):
+    def frames():
+        yield Image.new("RGB", (4, 4), (255, 0, 0))
+        raise RuntimeError("frame source failed")
+
+    with pytest.raises(RuntimeError):
+        GifBuilder().save_gif(frames(), [100, 100], str(tmp_gif_path))
+    assert not tmp_gif_path.exists()
+
+
+def test_fastoctree_quantize_method(tmp_gif_path):
+    gb = GifBuilder()
+    with pytest.raises(ValueError):
+        gb.set_quantize_method("nope")
+
+    gb.set_quantize_method("fastoctree")
+    gb.set_color_count(16)
+    frame = gb._convert_frame_for_gif(Image.new("RGBA", (6, 6), (255, 0, 0, 255)))
+    assert frame.mode == "P"
+    assert frame.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+
+    images = [Image.new("RGB", (6, 6), (0, 0, 255)), Image.new("RGB", (6, 6), (0, 255, 0))]
+    gb.build_from_images(images, [100, 100], str(tmp_gif_path))
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 2
+
+
+def test_native_encoder_writes_readable_gif(tmp_gif_path):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (8, 8), (200, 0, 0)), name="a")
+    mm.add_material(Image.new("RGB", (8, 8), (0, 0, 200)), name="b")
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([0, 1, 0])
+
+    gb = GifBuilder()
+    gb.set_encoder("native")
+    gb.set_output_size(8, 8)
+    gb.build_from_sequence(mm, se, output_path=str(tmp_gif_path))
+
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.n_frames == 3
+        colors = []
+        for i in range(3):
+            gif.seek(i)
+            colors.append(gif.convert("RGB").getpixel((4, 4)))
+    assert colors == [(200, 0, 0), (0, 0, 200), (200, 0, 0)]
+
+
+def test_build_from_layered_sequence_keeps_frame_order(tmp_gif_path):
+    mm = MaterialManager()
+    colors = [(200, 0, 0), (0, 200, 0), (0, 0, 200)]
+    for i, color in enumerate(colors):
+        mm.add_material(Image.new("RGB", (6, 6), color), name=str(i))
+    layered = [
+        LayeredFrame(layers=[Layer(material_index=i % 3)], duration=50 + i * 10)
+        for i in range(12)
+    ]
+
+    gb = GifBuilder()
+    gb.build_from_layered_sequence(layered, mm, str(tmp_gif_path))
+
+    assert gb.output_size == (6, 6)
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.n_frames == 12
+        for i in range(12):
+            gif.seek(i)
+            assert gif.convert("RGB").getpixel((3, 3)) == colors[i % 3]
+            assert gif.info["duration"] == 50 + i * 10
+
+
+def test_libimagequant_method_falls_back_when_unavailable():
+    gb = GifBuilder()
+    gb.set_quantize_method("libimagequant")
+    gb.set_color_count(16)
+
+    out = gb._quantize(Image.new("RGB", (6, 6), (0, 128, 255)), 15)
+
+    assert out.mode == "P"
+    assert out.convert("RGB").getpixel((0, 0)) == (0, 128, 255)
+
+
+def test_shared_palette_learns_from_downsampled_frames():
+    gb = GifBuilder()
+    gb.set_color_count(16)
+    big = Image.new("RGBA", (600, 300), (10, 20, 30, 255))
+    big.paste((250, 240, 230, 255), (0, 0, 300, 300))
+
+    palette = gb._build_shared_palette([big])
+
+    assert palette.height <= 128
+    colors = {c for _, c in palette.convert("RGB").getcolors()}
+    assert colors == {(10, 20, 30), (250, 240, 230)}
+
+
+def test_get_preview_frames_reuses_prepared_material(two_materials):
+    mm = two_materials
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([0, 1, 0, 7, 1])
+
+    gb = GifBuilder()
+    gb.set_output_size(8, 8)
+    frames = gb.get_preview_frames(mm, se)
+
+    assert len(frames) == 4  # index 7 does not exist
+    assert frames[0][0] is frames[2][0]
+    assert frames[1][0] is frames[3][0]
+    assert frames[1][0].getpixel((4, 4)) == (0, 200, 0, 255)
+
+
+def test_prepare_frame_rgb_out_mode_composites_onto_opaque_background():
+    gb = GifBuilder()
+    gb.set_output_size(4, 4)
+    gb.set_background_color(0, 0, 255, 255)
+    material = Image.new("RGBA", (2, 2), (255, 0, 0, 255))
+    material.putpixel((0, 0), (255, 0, 0, 0))
+
+    rgb = gb.prepare_frame(material, "RGB")
+    assert rgb.mode == "RGB"
+    assert rgb.getpixel((0, 0)) == (0, 0, 255)
+    assert rgb.getpixel((1, 1)) == (0, 0, 255)  # transparent material pixel
+    assert rgb.getpixel((2, 2)) == (255, 0, 0)
+    assert gb._convert_frame_for_gif(rgb) is rgb
+
+    gb.set_background_color(0, 0, 0, 0)
+    assert gb.prepare_frame(material, "RGB").mode == "RGBA"
+
+
+def test_downscale_fits_output_in_one_resize():
+    gb = GifBuilder()
+    gb.set_output_size(64, 64)
+    source = Image.new("RGBA", (301, 200), (10, 200, 10, 255))
+
+    assert gb._downscale(source).size == (64, 43)
+    assert source.size == (301, 200)
+
+    gb.set_resample_filter(Image.Resampling.BILINEAR)
+    assert gb._downscale(Image.new("RGBA", (100, 400))).size == (16, 64)
+
+
+def test_downscale_filters_opaque_rgba_as_rgb(monkeypatch):
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 256, size=(120, 90, 4), dtype=np.uint8)
+    arr[..., 3] = 255
+    source = Image.fromarray(arr, "RGBA")
+    expected = source.resize((40, 53), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    modes = []
+    original = Image.Image.resize
+    monkeypatch.setattr(
+        Image.Image, "resize",
+        lambda self, *a, **k: modes.append(self.mode) or original(self, *a, **k),
+    )
+    gb = GifBuilder()
+    gb.set_output_size(64, 53)
+    gb.set_resample_filter(Image.Resampling.LANCZOS)
+    out = gb._downscale(source)
+
+    assert modes == ["RGB"]  # no premultiplied "RGBa" round-trip
+    assert out.mode == "RGBA" and out.tobytes() == expected.tobytes()
+
+    # Partial transparency keeps Pillow's premultiplied RGBA filtering
+    arr[0, 0, 3] = 10
+    gb._downscale(Image.fromarray(arr, "RGBA"))
+    assert "RGBa" in modes
+
+
+def test_build_gif_from_group_streams_frames_to_writer(tmp_gif_path, monkeypatch, make_root_group):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (12, 6), (255, 0, 0)), name="a")
+    mm.add_material(Image.new("RGB", (4, 4), (0, 255, 0)), name="b")
+    group_mgr = make_root_group([0, 1, 0, 1])
+
+    gb = GifBuilder()
+    original = gb.save_gif
+    received = []
+    monkeypatch.setattr(
+        gb, "save_gif",
+        lambda frames, durations, path: received.append(frames) or original(frames, durations, path),
+    )
+    gb.build_gif_from_group(0, group_mgr, mm, str(tmp_gif_path))
+
+    assert not isinstance(received[0], list)
+    assert gb.output_size == (12, 6)  # auto-detected from the first frame
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 4
+
+
+def test_expanded_frames_resolve_each_material_once(tmp_gif_path, monkeypatch):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (4, 4), (255, 0, 0, 255)), name="a")
+    mm.add_material(Image.new("RGBA", (4, 4), (0, 255, 0, 128)), name="b")
+    group_mgr = GroupManager()
+    root = CompositionGroup(name="Root", default_duration_ms=100)
+    for x in range(6):
+        root.entries.append(FrameEntry(material_index=x % 2, x=x, y=0, duration_ms=100))
+    group_mgr.add_group(root)
+
+    gb = GifBuilder()
+    gb.set_output_size(10, 4)
+    resolved = []
+    original = gb._layer_image
+    monkeypatch.setattr(
+        gb, "_layer_image", lambda mm_, idx: resolved.append(idx) or original(mm_, idx)
+    )
+    gb.build_gif_from_group(0, group_mgr, mm, str(tmp_gif_path))
+    assert sorted(resolved) == [0, 1]
+
+    resolved.clear()
+    frames = gb.get_preview_frames_for_group(0, group_mgr, mm)
+    assert sorted(resolved) == [0, 1]
+    assert frames[5][0].getpixel((5, 0))[1] > 0
+
+
+def test_layered_export_reuses_preview_transforms(tmp_gif_path, monkeypatch):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (8, 8), (200, 0, 0)), name="a")
+    layered = [
+        LayeredFrame(layers=[Layer(material_index=0, scale=0.5)], duration=100),
+        LayeredFrame(layers=[Layer(material_index=0, scale=0.5, x=4)], duration=100),
+    ]
+
+    gb = GifBuilder()
+    gb.set_output_size(8, 4)
+    applied = []
+    original = Layer.apply_to_image
+    monkeypatch.setattr(
+        Layer, "apply_to_image", lambda self, img: applied.append(1) or original(self, img)
+    )
+    gb.get_layered_preview_frames(layered, mm)
+    gb.build_from_layered_sequence(layered, mm, str(tmp_gif_path))
+    assert len(applied) == 1
+
+    # Entries not asked for again are dropped by the next reset
+    gb._reset_layer_cache()
+    gb._reset_layer_cache()
+    assert not gb._layer_cache and not gb._layer_cache._previous
+
+
+def test_palette_frames_skip_requantization(tmp_gif_path, monkeypatch):
+    gb = GifBuilder()
+    gb.set_output_size(8, 8)
+    gb.set_background_color(0, 0, 0, 0)
+    frames = []
+    for color in ((255, 0, 0), (0, 0, 255)):
+        frame = Image.new("P", (16, 16), 1)
+        frame.putpalette([0, 0, 0, *color])
+        frame.info["transparency"] = 0
+        frames.append(frame)
+
+    monkeypatch.setattr(gb, "_quantize", lambda *a: pytest.fail("requantized a P frame"))
+    reused = gb._prepare_one(frames[0])
+    assert reused.mode == "P" and reused.size == (8, 8)
+    assert reused.getpalette()[:6] == [0, 0, 0, 255, 0, 0]
+
+    gb.build_from_images(frames, [100, 100], str(tmp_gif_path))
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 2
+
+    # A letterboxed result still goes through the regular path
+    assert gb._reuse_palette_frame(Image.new("P", (16, 8))) is None
+
+
+def test_group_export_shares_one_palette_and_composites_repeats_once(
+    tmp_gif_path, monkeypatch, make_root_group
+):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (8, 8), (255, 0, 0)), name="a")
+    mm.add_material(Image.new("RGB", (8, 8), (0, 0, 255)), name="b")
+    group_mgr = make_root_group([0, 1, 0, 1, 0, 1])
+
+    gb = GifBuilder()
+    composed, palettes = [], []
+    original_compose = gb._compose_from_expanded_frame
+    original_palette = gb._build_shared_palette
+    monkeypatch.setattr(
+        gb, "_compose_from_expanded_frame",
+        lambda *a: composed.append(a[0]) or original_compose(*a),
+    )
+    monkeypatch.setattr(
+        gb, "_build_shared_palette",
+        lambda images: palettes.append(1) or original_palette(images),
+    )
+    gb.build_gif_from_group(0, group_mgr, mm, str(tmp_gif_path))
+
+    assert len(palettes) == 1
+    assert len(composed) == 4  # two distinct frames, palette pass + encode pass
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 6
+
+
+def test_compose_from_expanded_frame_starts_from_background_template():
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (2, 2), (0, 255, 0, 255)), name="a")
+    gb = GifBuilder()
+    gb.set_output_size(4, 4)
+    gb.set_background_color(10, 20, 30, 255)
+
+    first = gb._compose_from_expanded_frame([(0, 0, 0)], mm)
+    second = gb._compose_from_expanded_frame([(0, 2, 2)], mm)
+
+    assert first.getpixel((3, 3)) == (10, 20, 30, 255)
+    assert second.getpixel((0, 0)) == (10, 20, 30, 255)
+    assert gb._background_template().getpixel((0, 0)) == (10, 20, 30, 255)
+
+
+def test_frame_converter_resolves_background_branch_once():
+    gb = GifBuilder()
+    frame = Image.new("RGBA", (4, 4), (200, 10, 10, 0))
+
+    gb.set_background_color(0, 0, 0, 0)
+    convert = gb._frame_converter()
+    gb.set_background_color(255, 255, 255, 255)
+
+    out = convert(frame)
+    assert out.mode == "P" and out.info["transparency"] == len(out.getpalette()) // 3
+    assert gb._convert_frame_for_gif(frame).mode == "RGB"
+
+
+def test_auto_quantize_method_picks_quantizer_by_background(monkeypatch):
+    gb = GifBuilder()
+    gb.set_quantize_method("auto")
+    source = Image.new("RGB", (8, 8), (0, 128, 255))
+    methods = []
+    original = Image.Image.quantize
+    monkeypatch.setattr(
+        Image.Image, "quantize",
+        lambda self, *a, **k: methods.append((k.get("method"), k.get("kmeans"))) or original(self, *a, **k),
+    )
+
+    out = gb._quantize(source, 255)
+    gb.set_background_color(0, 0, 0, 0)
+    gb._quantize(source, 255)
+
+    assert methods == [(Image.Quantize.MEDIANCUT, 2), (Image.Quantize.FASTOCTREE, None)]
+    assert out.convert("RGB").getpixel((0, 0)) == (0, 128, 255)
+
+
+def test_gifsicle_frames_are_encoded_off_the_writer_thread(tmp_gif_path, monkeypatch, make_red_frames):
+    writer_threads = set()
+    original_save = Image.Image.save
+    monkeypatch.setattr(
+        Image.Image, "save",
+        lambda self, *a, **k: writer_threads.add(threading.current_thread())
+        or original_save(self, *a, **k),
+    )
+
+    _FakeGifsicle.instances = []
+    monkeypatch.setattr(gif_builder_module, "is_gifsicle_available", lambda: True)
+    monkeypatch.setattr(gif_builder_module.subprocess, "Popen", _FakeGifsicle)
+
+    gb = GifBuilder()
+    gb.set_encoder("gifsicle")
+    gb.set_output_size(4, 4)
+    images = make_red_frames(12, (4, 4), 20)
+    gb.build_from_images(images, [100] * 12, str(tmp_gif_path))
+
+    assert _FakeGifsicle.instances[0].frames() == [((4, 4), 100)] * 12
+    assert threading.main_thread() not in writer_threads
+
+
+def test_downscale_uses_opencv_for_opaque_lanczos_when_available(monkeypatch):
+    calls = []
+
+    def fake_resize(arr, size, interpolation):
+        calls.append((arr.shape, size, interpolation))
+        return np.zeros((size[1], size[0], arr.shape[2]), dtype=np.uint8)
+
+    fake_cv2 = types.SimpleNamespace(INTER_LANCZOS4=4, INTER_AREA=3, resize=fake_resize)
+    monkeypatch.setattr(gif_builder_module, "cv2", fake_cv2)
+
+    gb = GifBuilder()
+    gb.set_output_size(64, 64)
+    gb.set_resample_filter(Image.Resampling.LANCZOS)
+
+    out = gb._downscale(Image.new("RGBA", (100, 80), (1, 2, 3, 255)))
+    assert out.size == (64, 51) and out.mode == "RGBA"
+    gb._downscale(Image.new("RGBA", (300, 300), (1, 2, 3, 255)))
+    assert [c[2] for c in calls] == [4, 3]
+
+    # Translucent sources keep Pillow's premultiplied resize
+    gb._downscale(Image.new("RGBA", (100, 80), (1, 2, 3, 128)))
+    assert len(calls) == 2
+
+
+def test_transparency_index_follows_palette_and_native_table_stays_small(tmp_gif_path):
+    gb = GifBuilder()
+    gb.set_color_count(16)
+    gb.set_background_color(0, 0, 0, 0)
+    gb.set_encoder("native")
+    frames = []
+    for color in ((255, 0, 0, 255), (0, 0, 255, 255)):
+        frame = Image.new("RGBA", (8, 8), (0, 0, 0, 0))
+        frame.paste(color, (0, 0, 4, 4))
+        frames.append(frame)
+
+    out = gb._convert_frame_for_gif(frames[0])
+    assert out.info["transparency"] == len(out.getpalette()) // 3 < 16
+    assert out.getpixel((7, 7)) == out.info["transparency"]
+    assert out.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+
+    gb.build_from_images(frames, [100, 100], str(tmp_gif_path))
+    header = tmp_gif_path.read_bytes()[:13]
+    assert (header[10] & 0x07) + 1 <= 4  # global table of at most 16 entries
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.convert("RGBA").getpixel((7, 7))[3] == 0
+
+
+def test_preview_warms_prepared_materials_for_export(tmp_gif_path, monkeypatch, two_materials):
+    mm = two_materials
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([0, 1, 0, 1])
+
+    gb = GifBuilder()
+    gb.set_output_size(6, 6)
+    calls = []
+    original = gb.prepare_frame
+    monkeypatch.setattr(gb, "prepare_frame", lambda img, *a: calls.append(img) or original(img, *a))
+
+    gb.get_preview_frames(mm, se)
+    gb.build_from_sequence(mm, se, str(tmp_gif_path))
+    assert len(calls) == 2
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 4
+
+    gb.set_background_color(0, 0, 255)
+    frames = gb.get_preview_frames(mm, se)
+    assert len(calls) == 4
+    assert frames[0][0].getpixel((0, 0)) == (200, 0, 0, 255)
+
+
+def test_prepare_frame_keeps_rgb_material_for_opaque_rgb_output(monkeypatch):
+    gb = GifBuilder()
+    gb.set_output_size(8, 8)
+    gb.set_background_color(0, 0, 255)
+    filled = Image.new("RGB", (8, 8), (200, 0, 0))
+    small = Image.new("RGB", (4, 4), (200, 0, 0))
+    monkeypatch.setattr(Image.Image, "convert", lambda *a, **k: pytest.fail("converted"))
+
+    assert gb.prepare_frame(filled, "RGB") is filled
+    out = gb.prepare_frame(small, "RGB")
+    assert out.mode == "RGB"
+    assert out.getpixel((0, 0)) == (0, 0, 255)
+    assert out.getpixel((4, 4)) == (200, 0, 0)
+
+
+def test_pillow_output_is_post_optimized_with_gifsicle_when_available(
+    tmp_gif_path, monkeypatch, make_red_frames
+):
+    runs = []
+
+    def fake_run(cmd, input=None, **kwargs):
+        runs.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=input + b"")
+
+    monkeypatch.setattr(gif_builder_module, "is_gifsicle_available", lambda: True)
+    monkeypatch.setattr(gif_builder_module.subprocess, "run", fake_run)
+    saved_kwargs = []
+    original_save = Image.Image.save
+    monkeypatch.setattr(
+        Image.Image, "save",
+        lambda self, fp, **k: saved_kwargs.append(k) or original_save(self, fp, **k),
+    )
+
+    gb = GifBuilder()
+    frames = make_red_frames(2, (8, 8), 50)
+    gb.build_from_images(frames, [100, 100], str(tmp_gif_path))
+
+    assert runs == [["gifsicle", "--no-warnings", "-O3"]]
+    assert saved_kwargs[-1]["optimize"] is True
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 2
+
+    # A failing gifsicle keeps the Pillow-optimized output
+    def failing_run(cmd, **kwargs):
+        raise subprocess.CalledProcessError(1, cmd)
+
+    monkeypatch.setattr(gif_builder_module.subprocess, "run", failing_run)
+    gb.build_from_images(frames, [100, 100], str(tmp_gif_path))
+    assert saved_kwargs[-1]["optimize"] is True
+    assert gb.get_gif_info(str(tmp_gif_path))["frame_count"] == 2
+
+    # Output gifsicle didn't shrink is not used
+    monkeypatch.setattr(
+        gif_builder_module.subprocess, "run",
+        lambda cmd, input=None, **k: subprocess.CompletedProcess(cmd, 0, stdout=input + b"\0" * 64),
+    )
+    gb.build_from_images(frames, [100, 100], str(tmp_gif_path))
+    assert tmp_gif_path.read_bytes().endswith(b";")
+
+    gb.set_external_optimize(False)
+    gb.build_from_images(frames, [100, 100], str(tmp_gif_path))
+    assert saved_kwargs[-1]["optimize"] is True
+
+
+def test_save_gif_disposal_follows_background(tmp_gif_path, make_red_frames):
+    gb = GifBuilder()
+    gb.disposal = 1
+    frames = make_red_frames(2, (4, 4), 90)
+
+    gb.save_gif(frames, [100, 100], str(tmp_gif_path))
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.disposal_method == 1
+
+    gb.set_background_color(0, 0, 0, 0)
+    gb.save_gif(frames, [100, 100], str(tmp_gif_path))
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.disposal_method == 2
+
+
+def test_save_gif_leaves_opaque_frames_in_place_by_default(tmp_gif_path):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, size=(40, 40, 3), dtype=np.uint8)
+    frames = []
+    for i in range(4):
+        arr = base.copy()
+        arr[10:20, i * 8:i * 8 + 10] = (255, 0, 0)
+        frames.append(Image.fromarray(arr))
+
+    def decode(path):
+        with Image.open(path) as gif:
+            methods, pixels = set(), []
+            for i in range(gif.n_frames):
+                gif.seek(i)
+                methods.add(gif.disposal_method)
+                pixels.append(gif.convert("RGB").tobytes())
+            return methods, pixels
+
+    gb = GifBuilder()
+    gb.set_output_size(40, 40)
+    gb.build_from_images(frames, [100] * 4, str(tmp_gif_path))
+    methods, pixels = decode(tmp_gif_path)
+    assert methods == {1}
+
+    # Decodes exactly like the full-repaint (disposal 2) GIF, in fewer bytes
+    repaint = tmp_gif_path.with_name("repaint.gif")
+    gb.disposal = 2
+    gb.build_from_images(frames, [100] * 4, str(repaint))
+    assert decode(repaint) == ({2}, pixels)
+    assert tmp_gif_path.stat().st_size < repaint.stat().st_size
+    gb.disposal = None
+
+    # A palette frame carrying transparency is still cleared each frame
+    transparent = Image.new("P", (4, 4))
+    transparent.info["transparency"] = 0
+    gb.save_gif([transparent, transparent.copy()], [100, 100], str(tmp_gif_path))
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.disposal_method == 2
+
+
+def test_save_gif_clears_frame_before_a_later_transparent_frame(tmp_gif_path):
+    opaque = [Image.new("RGB", (4, 4), (200, 0, 0)), Image.new("RGB", (4, 4), (0, 200, 0))]
+    holed = Image.new("P", (4, 4), 1)
+    holed.putpalette([0, 0, 0, 0, 0, 200])
+    holed.putpixel((0, 0), 0)
+    holed.info["transparency"] = 0
+
+    for encoder in ("pil", "native"):
+        gb = GifBuilder()
+        gb.encoder = encoder
+        gb.save_gif(opaque + [holed, opaque[0]], [100] * 4, str(tmp_gif_path))
+        with Image.open(tmp_gif_path) as gif:
+            methods = []
+            for i in range(gif.n_frames):
+                gif.seek(i)
+                methods.append(gif.disposal_method)
+        assert methods == [1, 2, 1, 1], encoder
+
+    # All frames merged into one by Pillow still saves
+    gb = GifBuilder()
+    gb.save_gif([opaque[0], opaque[0].copy()], [100, 100], str(tmp_gif_path))
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.n_frames == 1
+    with pytest.raises(ValueError):
+        gb.save_gif([], [], str(tmp_gif_path))
+
+
+def test_transparent_shared_palette_ignores_hidden_pixels():
+    gb = GifBuilder()
+    gb.set_background_color(0, 0, 0, 0)
+    gb.set_color_count(4)
+    frame = Image.new("RGBA", (8, 8), (0, 255, 0, 0))  # hidden green
+    frame.paste((255, 0, 0, 255), (0, 0, 4, 8))
+    frame.paste((0, 0, 255, 255), (4, 0, 8, 4))
+
+    palette = gb._build_shared_palette([frame])
+    colors = {tuple(palette.getpalette()[i:i + 3]) for i in range(0, len(palette.getpalette()), 3)}
+
+    assert (255, 0, 0) in colors and (0, 0, 255) in colors
+    assert (0, 255, 0) not in colors
+    assert gb._build_shared_palette([Image.new("RGBA", (4, 4))]).mode == "P"
+
+
+def test_transparent_converter_skips_mask_for_solid_frames(monkeypatch):
+    gb = GifBuilder()
+    gb.set_background_color(0, 0, 0, 0)
+    solid = Image.new("RGBA", (4, 4), (200, 0, 0, 200))
+    holed = solid.copy()
+    holed.putpixel((0, 0), (0, 0, 0, 0))
+    points = []
+    original = Image.Image.point
+    monkeypatch.setattr(
+        Image.Image, "point", lambda self, *a, **k: points.append(1) or original(self, *a, **k)
+    )
+
+    out = gb._convert_frame_for_gif(solid)
+    assert not points
+    assert out.info["transparency"] not in out.tobytes()
+
+    out = gb._convert_frame_for_gif(holed)
+    assert len(points) == 1
+    assert out.getpixel((0, 0)) == out.info["transparency"]
+
+
+def test_alpha_format_frames_share_gif_background_helpers():
+    gb = GifBuilder()
+    gb.set_output_size(2, 2)
+    frame = Image.new("RGBA", (2, 2), (255, 0, 0, 128))
+
+    gb.set_background_color(0, 0, 255, 255)
+    flat = gb._prepare_frame_for_alpha_format(frame)
+    assert flat.mode == "RGB"
+    assert flat.getpixel((0, 0)) == tuple(gb._flatten_onto_background(frame).getpixel((0, 0)))
+
+    gb.set_background_color(0, 0, 255, 128)
+    out = gb._prepare_frame_for_alpha_format(frame)
+    assert out.mode == "RGBA" and out.getpixel((0, 0))[3] > 128
+    assert gb._background_template().getpixel((0, 0)) == (0, 0, 255, 128)
+
+    gb.set_background_color(0, 0, 0, 0)
+    assert gb._prepare_frame_for_alpha_format(frame) is frame
+
+
+def test_build_from_images_quantizes_one_shared_palette(tmp_gif_path, monkeypatch):
+    gb = GifBuilder()
+    gb.set_quantize_method("fastoctree")
+    images = [Image.new("RGB", (8, 8), (i * 40, 255 - i * 40, 0)) for i in range(5)]
+    calls = []
+    original = gb._quantize
+    monkeypatch.setattr(gb, "_quantize", lambda img, colors: calls.append(img.size) or original(img, colors))
+
+    gb.build_from_images(images + images[:1], [100] * 6, str(tmp_gif_path))
+
+    assert len(calls) == 1  # the palette montage only
+    with Image.open(tmp_gif_path) as gif:
+        assert gif.n_frames == 6
+        gif.seek(1)
+        assert gif.convert("RGB").getpixel((0, 0)) == (40, 215, 0)
+
+
+def test_group_preview_composites_repeated_frames_once(make_root_group):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGB", (6, 6), (255, 0, 0)), name="a")
+    mm.add_material(Image.new("RGB", (6, 6), (0, 0, 255)), name="b")
+    group_mgr = make_root_group([0, 1, 0, 1], [10, 20, 30, 40])
+
+    frames = GifBuilder().get_preview_frames_for_group(0, group_mgr, mm)
+
+    assert [d for _, d in frames] == [10, 20, 30, 40]
+    assert frames[0][0] is frames[2][0]
+    assert frames[1][0].getpixel((0, 0)) == (0, 0, 255, 255)
+
+
+def test_resize_gif_keeps_frame_order_and_durations(tmp_path, make_red_frames, write_gif):
+    src = write_gif(make_red_frames(10, (20, 20), 25), duration=[(i + 1) * 10 for i in range(10)])
+
+    out = tmp_path / "out.gif"
+    GifBuilder().resize_gif(str(src), str(out), 0.5)
+
+    with Image.open(out) as gif:
+        assert gif.n_frames == 10 and gif.size == (10, 10)
+        for i in range(10):
+            gif.seek(i)
+            assert gif.info["duration"] == (i + 1) * 10
+            assert gif.convert("RGB").getpixel((5, 5))[0] == i * 25
+
+
+def test_resize_gif_picks_bilinear_for_heavy_downscales(tmp_path, monkeypatch):
+    src = tmp_path / "in.gif"
+    Image.new("RGB", (40, 40), (200, 0, 0)).save(src)
+    filters = []
+    original = Image.Image.resize
+    monkeypatch.setattr(
+        Image.Image, "resize",
+        lambda self, size, resample=None, *a, **k: filters.append(resample)
+        or original(self, size, resample, *a, **k),
+    )
+    gb = GifBuilder()
+
+    gb.resize_gif(str(src), str(tmp_path / "a.gif"), 0.25)
+    gb.resize_gif(str(src), str(tmp_path / "b.gif"), 0.5)
+    gb.resize_gif(str(src), str(tmp_path / "c.gif"), 0.25, resample=Image.Resampling.NEAREST)
+
+    assert filters[0] == Image.Resampling.BILINEAR
+    assert Image.Resampling.LANCZOS in filters
+    assert filters[-1] == Image.Resampling.NEAREST
+    assert gb.get_gif_info(str(tmp_path / "a.gif"))["size"] == (10, 10)
+
+
+def test_resize_gif_quantizes_frames_with_configured_method(tmp_path, monkeypatch, write_gif):
+    frames = []
+    for i in range(3):
+        img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+        img.paste((200, i * 40, 0, 255), (0, 0, 20, 10))
+        frames.append(img)
+    src = write_gif(frames, duration=100, disposal=2)
+
+    methods = []
+    original = Image.Image.quantize
+    monkeypatch.setattr(
+        Image.Image, "quantize",
+        lambda self, *a, **k: methods.append(k.get("method")) or original(self, *a, **k),
+    )
+    gb = GifBuilder()
+    gb.set_quantize_method("fastoctree")
+    out = tmp_path / "out.gif"
+    gb.resize_gif(str(src), str(out), 0.5)
+
+    assert methods == [Image.Quantize.FASTOCTREE] * 3
+    with Image.open(out) as gif:
+        for i in range(3):
+            gif.seek(i)
+            rgba = gif.convert("RGBA")
+            r, g, _, a = rgba.getpixel((5, 2))
+            assert a == 255 and abs(r - 200) <= 4 and abs(g - i * 40) <= 4
+            assert rgba.getpixel((5, 8))[3] == 0
+
+
+def test_native_and_gifsicle_encoders_merge_repeated_frames(tmp_gif_path, monkeypatch):
+    red = Image.new("RGB", (6, 6), (255, 0, 0))
+    blue = Image.new("RGB", (6, 6), (0, 0, 255))
+    images = [red, red.copy(), blue, blue, red]
+    durations = [100, 50, 30, 30, 70]
+
+    gb = GifBuilder()
+    gb.set_output_size(6, 6)
+    gb.set_encoder("native")
+    gb.build_from_images(images, durations, str(tmp_gif_path))
+    with Image.open(tmp_gif_path) as gif:
+        merged = []
+        for i in range(gif.n_frames):
+            gif.seek(i)
+            merged.append((gif.convert("RGB").getpixel((0, 0)), gif.info["duration"]))
+    assert merged == [((255, 0, 0), 150), ((0, 0, 255), 60), ((255, 0, 0), 70)]
+
+    _FakeGifsicle.instances = []
+    monkeypatch.setattr(gif_builder_module, "is_gifsicle_available", lambda: True)
+    monkeypatch.setattr(gif_builder_module.subprocess, "Popen", _FakeGifsicle)
+    gb.set_encoder("gifsicle")
+    gb.build_from_images(images, durations, str(tmp_gif_path))
+    assert [d for _, d in _FakeGifsicle.instances[0].frames()] == [150, 60, 70]
+
+
+def test_layer_image_uses_replaced_material_with_chroma_key():
+    mm = MaterialManager()
+    mm.add_material_array(np.full((2, 2, 4), (255, 0, 0, 255), dtype=np.uint8))
+    gb = GifBuilder()
+    gb.set_chroma_key(0, 255, 0)
+    assert gb._layer_image(mm, 0)[0].getpixel((0, 0)) == (255, 0, 0, 255)
+
+    mm.images[0] = Image.new("RGBA", (2, 2), (0, 0, 255, 255))
+    assert gb._layer_image(mm, 0)[0].getpixel((0, 0)) == (0, 0, 255, 255)
+
+
+def test_iter_prepared_keeps_repeated_frames_only_until_last_use():
+    refs = []
+
+    def convert(n):
+        img = Image.new("P", (2, 2), n)
+        refs.append(weakref.ref(img))
+        return img
+
+    keys = list(range(50)) + [0]
+    frames = GifBuilder()._iter_prepared(keys, keys, convert)
+    for _ in range(50):
+        next(frames)
+    assert sum(ref() is not None for ref in refs) <= _PREFETCH_DEPTH + 2
+    assert next(frames).getpixel((0, 0)) == 0
+    assert len(refs) == 50
+
+
+def test_build_from_images_streams_without_holding_every_frame(tmp_gif_path, monkeypatch, make_red_frames):
+    images = make_red_frames(60, (8, 8), 4)
+    gb = GifBuilder()
+    gb.set_output_size(8, 8)
+    live = []
+
+    def consume(frames, durations, output_path):
+        refs = []
+        for frame in frames:
+            refs.append(weakref.ref(frame))
+            if len(refs) == 50:
+                live.append(sum(ref() is not None for ref in refs))
+
+    monkeypatch.setattr(gb, "save_gif", consume)
+    gb.build_from_images(images, [100] * 60, str(tmp_gif_path))
+    assert live[0] <= 1
+
+
+def test_resize_gif_collapses_frames_that_become_identical(tmp_path, write_gif):
+    frames = []
+    for shade in (200, 201):
+        frame = Image.new("P", (8, 8), 0)
+        frame.putpalette([200, 0, 0, shade, 0, 0])
+        frame.putpixel((0, 0), 1)
+        frames.append(frame)
+    src = write_gif(frames, duration=[50, 70])
+
+    gb = GifBuilder()
+    assert gb.get_gif_info(str(src))["frame_count"] == 2
+    out = tmp_path / "out.gif"
+    gb.resize_gif(str(src), str(out), scale_factor=0.5)
+
+    info = gb.get_gif_info(str(out))
+    assert info["frame_count"] == 1
+    with Image.open(out) as gif:
+        assert gif.info["duration"] == 120
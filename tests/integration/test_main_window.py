@@ -149,6 +149,28 @@ def test_dropping_material_on_canvas_adds_centered_frame_entry(qapp):
     assert len(window.canvas_editor._material_items) == 1
 
 
+def test_analyze_first_frame_colors_ranks_colors_by_share(qapp, monkeypatch):
+    """Color analysis of the first frame lists colors most common first."""
+    from PIL import Image
+    from PyQt6.QtWidgets import QMessageBox
+    from src.core.composition_group import FrameEntry
+
+    monkeypatch.setattr(QMessageBox, "information", lambda *a, **k: None)
+    monkeypatch.setattr(QMessageBox, "critical", lambda *a, **k: None)
+
+    img = Image.new("RGB", (10, 10), (0, 255, 0))
+    img.paste((255, 0, 0), (0, 0, 10, 3))
+    window = MainWindow()
+    window.material_manager.add_material(img, "a")
+    root = window.group_manager.get_group(window.current_group_id)
+    root.entries.append(FrameEntry(material_index=0, x=0, y=0, duration_ms=100))
+
+    window.analyze_first_frame_colors()
+
+    colors = [(color, pct) for color, pct, _ in window.chroma_key_colors_all]
+    assert colors == [((0, 255, 0), 70.0), ((255, 0, 0), 30.0)]
+
+
 def test_export_format_combo_toggles_webp_quality_visibility(qapp):
     """WebP shows a quality spinbox; GIF/APNG hide it."""
     window = MainWindow()
@@ -245,3 +245,117 @@ def test_process_batch_with_output_dir(tmp_path):
     assert len(successful) == 2
     for p in successful:
         assert Path(p).exists()
+
+
+def test_process_batch_with_process_pool(tmp_path):
+    """max_workers > 1 runs images in worker processes with the same results."""
+    out_dir = tmp_path / "gifs"
+    out_dir.mkdir()
+
+    sources = []
+    for i in range(3):
+        p = tmp_path / f"src_{i}.png"
+        Image.new("RGB", (16, 16), (i * 80, 100, 200)).save(p)
+        sources.append(str(p))
+    sources.append(str(tmp_path / "missing.png"))
+
+    tpl = _simple_template(n_tiles=1)
+    bp = BatchProcessor()
+    progress_calls = []
+    bp.set_progress_callback(lambda c, t, m: progress_calls.append((c, t)))
+
+    successful, failed = bp.process_batch(
+        image_paths=sources,
+        template=tpl,
+        split_mode="grid",
+        split_rows=1,
+        split_cols=1,
+        tile_width=0,
+        tile_height=0,
+        output_directory=str(out_dir),
+        output_width=16,
+        output_height=16,
+        max_workers=2,
+    )
+
+    assert sorted(successful) == sorted(str(out_dir / f"src_{i}.gif") for i in range(3))
+    assert [p for p, _ in failed] == [sources[-1]]
+    assert sorted(progress_calls) == [(i, 4) for i in range(1, 5)]
+
+
+def test_process_batch_parses_template_once(tmp_path, monkeypatch):
+    sources = []
+    for i in range(3):
+        p = tmp_path / f"src_{i}.png"
+        Image.new("RGB", (16, 16), (50, 100, 200)).save(p)
+        sources.append(str(p))
+
+    calls = []
+    original = TemplateManager.import_composition_template
+    monkeypatch.setattr(
+        TemplateManager, "import_composition_template",
+        staticmethod(lambda *a, **kw: calls.append(a) or original(*a, **kw)),
+    )
+
+    successful, failed = BatchProcessor().process_batch(
+        image_paths=sources,
+        template=_simple_template(n_tiles=1),
+        split_mode="grid",
+        split_rows=1,
+        split_cols=1,
+        tile_width=0,
+        tile_height=0,
+        output_directory=str(tmp_path),
+        max_workers=1,
+    )
+
+    assert len(successful) == 3 and not failed
+    assert len(calls) == 1
+
+
+def test_process_batch_invalid_template_fails_every_image(tmp_path):
+    sources = [str(tmp_path / "a.png"), str(tmp_path / "b.png")]
+
+    successful, failed = BatchProcessor().process_batch(
+        image_paths=sources,
+        template={"version": "3.0", "format": "layer_timeline"},
+        split_mode="grid",
+        split_rows=1,
+        split_cols=1,
+        tile_width=0,
+        tile_height=0,
+        max_workers=1,
+    )
+
+    assert successful == []
+    assert [p for p, _ in failed] == sources
+
+
+def test_process_single_image_selected_positions(tmp_path):
+    colors = {(0, 0): (255, 0, 0), (0, 1): (0, 255, 0), (1, 0): (0, 0, 255), (1, 1): (255, 255, 0)}
+    img = Image.new("RGB", (16, 16))
+    for (row, col), color in colors.items():
+        img.paste(color, (col * 8, row * 8, col * 8 + 8, row * 8 + 8))
+    src = tmp_path / "sheet.png"
+    img.save(src)
+
+    out = BatchProcessor.process_single_image(
+        image_path=str(src),
+        template=_simple_template(n_tiles=2),
+        split_mode="grid",
+        split_rows=2,
+        split_cols=2,
+        tile_width=0,
+        tile_height=0,
+        output_path=str(tmp_path / "out.gif"),
+        selected_positions=[(1, 1), (0, 0), (5, 5)],
+        output_width=8,
+        output_height=8,
+    )
+
+    with Image.open(out) as gif:
+        firsts = []
+        for i in range(gif.n_frames):
+            gif.seek(i)
+            firsts.append(gif.convert("RGB").getpixel((4, 4)))
+    assert firsts == [(255, 255, 0), (255, 0, 0)]
@@ -144,3 +144,21 @@ def test_main_with_invalid_positions_returns_1(tmp_path, capsys):
     ])
     assert rc == 1
     assert "Invalid position" in capsys.readouterr().err
+
+
+def test_main_accepts_fastoctree_quantizer(tmp_path):
+    template_path = _make_two_tile_template(tmp_path)
+    image_path = _make_sheet_image(tmp_path)
+    out_dir = tmp_path / "out"
+
+    rc = main([
+        "--images", image_path,
+        "--template", template_path,
+        "--output-dir", str(out_dir),
+        "--split-cols", "2",
+        "--quantize", "fastoctree",
+        "--workers", "1",
+    ])
+
+    assert rc == 0
+    assert (out_dir / "sheet.gif").exists()
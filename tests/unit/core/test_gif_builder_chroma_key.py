@@ -384,3 +384,79 @@ class TestChromaKeyEdgeCases:
         # Near green should also be transparent (within threshold)
         assert result.getpixel((2, 0))[3] == 0
 
+    
+    def test_array_input_is_not_modified(self):
+        """Test that an RGBA array (e.g. a cached material array) is left untouched"""
+        import numpy as np
+        
+        arr = np.zeros((2, 2, 4), dtype=np.uint8)
+        arr[..., 1] = 255
+        arr[..., 3] = 255
+        arr[0, 0] = (255, 255, 255, 255)  # Max distance from black
+        
+        gb = GifBuilder()
+        gb.set_chroma_key(0, 255, 0, threshold=10)
+        result = gb.apply_chroma_key(arr)
+        
+        assert result.getpixel((1, 1))[3] == 0
+        assert result.getpixel((0, 0))[3] == 255
+        assert (arr[..., 3] == 255).all()
+        
+        # Largest possible distance (white vs black) must not overflow
+        gb.set_chroma_key(0, 0, 0, threshold=441)
+        assert gb.apply_chroma_key(arr).getpixel((0, 0))[3] == 255
+        gb.set_chroma_key(0, 0, 0, threshold=442)
+        assert gb.apply_chroma_key(arr).getpixel((0, 0))[3] == 0
+    
+    def test_threshold_boundary_matches_euclidean_distance(self):
+        """Test that the squared comparison equals dist <= threshold exactly"""
+        img = Image.new('RGB', (1, 1), (103, 104, 100))  # distance 5 from (100, 100, 100)
+        
+        gb = GifBuilder()
+        gb.set_chroma_key(100, 100, 100, threshold=5)
+        assert gb.apply_chroma_key(img).getpixel((0, 0))[3] == 0
+        
+        gb.set_chroma_key(100, 100, 100, threshold=4)
+        assert gb.apply_chroma_key(img).getpixel((0, 0))[3] == 255
+    
+    def test_group_export_keys_each_material_once(self, tmp_path, green_screen_image, monkeypatch):
+        """Test that a material repeated across frames is chroma-keyed only once"""
+        from src.core.composition_group import CompositionGroup, FrameEntry
+        from src.core.group_manager import GroupManager
+        
+        mm = MaterialManager()
+        mm.add_material(green_screen_image, name="a")
+        group_mgr = GroupManager()
+        root = CompositionGroup(name="Root", default_duration_ms=100)
+        for x in (0, 1, 2, 3):
+            root.entries.append(FrameEntry(material_index=0, x=x, y=0, duration_ms=100))
+        group_mgr.add_group(root)
+        
+        gb = GifBuilder()
+        gb.set_chroma_key(0, 255, 0)
+        calls = []
+        original = gb.apply_chroma_key
+        monkeypatch.setattr(gb, "apply_chroma_key", lambda img: calls.append(1) or original(img))
+        
+        gb.build_gif_from_group(0, group_mgr, mm, str(tmp_path / "out.gif"))
+        assert len(calls) == 1
+        
+        gb.set_chroma_key(0, 255, 0, threshold=5)
+        frames = gb.get_preview_frames_for_group(0, group_mgr, mm)
+        assert len(calls) == 2
+        assert frames[0][0].getpixel((0, 0)) == (255, 255, 255, 255)  # keyed out to the background
+    
+    def test_batch_matches_per_frame(self, green_screen_image):
+        """Test that keying a stack of frames equals keying each frame"""
+        import numpy as np
+        
+        gb = GifBuilder()
+        gb.set_chroma_key(0, 255, 0, threshold=30)
+        frames = [green_screen_image, Image.new('RGB', (20, 20), (10, 240, 5))]
+        stack = np.stack([np.asarray(f.convert('RGBA')) for f in frames])
+        
+        for batch in (gb.apply_chroma_key_batch(frames), gb.apply_chroma_key_batch(stack)):
+            assert [np.asarray(b).tolist() for b in batch] == \
+                [np.asarray(gb.apply_chroma_key(f)).tolist() for f in frames]
+        assert stack[..., 3].min() == 255  # input array untouched
+        assert gb.apply_chroma_key_batch([]) == []
@@ -1,4 +1,5 @@
 import os
+import subprocess
 from pathlib import Path
 from unittest import mock
 
@@ -32,31 +33,24 @@ def test_optimize_with_gifsicle_calls_cli_when_available(tmp_path, sample_gif):
     src = sample_gif
     out = tmp_path / "out2.gif"
 
-    # Mock subprocess.run to simulate gifsicle success and also create the temp output
+    # Mock subprocess.run to simulate gifsicle success by writing its -o file
     with mock.patch("src.core.gif_optimizer.is_gifsicle_available", return_value=True), \
-         mock.patch("subprocess.run") as m_run, \
-         mock.patch("tempfile.TemporaryDirectory") as m_tmpdir:
-        # Create a deterministic temp dir and ensure expected temp file exists
-        tmpdir_path = tmp_path / "_tmp"
-        tmpdir_path.mkdir()
-        class _Tmp:
-            def __enter__(self_inner):
-                return str(tmpdir_path)
-            def __exit__(self_inner, exc_type, exc, tb):
-                return False
-        m_tmpdir.return_value = _Tmp()
-        # After calling optimize, our code will write to tmpdir/out2.gif.tmp
-        # Prepare by creating that file after the subprocess mock "runs"
+         mock.patch("subprocess.run") as m_run:
         def _run_side_effect(cmd, check=True, stdout=None, stderr=None):
-            tmp_out = tmpdir_path / (out.name + ".tmp")
+            tmp_out = Path(cmd[cmd.index("-o") + 1])
+            # The temp file sits next to the destination, not in a temp dir
+            assert tmp_out.parent == out.parent
             tmp_out.write_bytes(b"GIF89a")
-            return mock.Mock(returncode=0, stdout=b"", stderr=b"")
+            return mock.Mock(returncode=0, stdout=None, stderr=b"")
         m_run.side_effect = _run_side_effect
 
         result = optimize_gif_lossy(src, output_path=str(out), lossy=120, colors=128)
 
     assert Path(result) == out
+    assert out.read_bytes() == b"GIF89a"
+    assert not list(tmp_path.glob(".*.tmp"))
     assert m_run.called
+    assert m_run.call_args.kwargs["stdout"] is subprocess.DEVNULL
     # Verify command contains lossy and colors flags
     args, kwargs = m_run.call_args
     cmd = args[0]
@@ -87,5 +81,25 @@ def test_gifsicle_error_bubbles_as_exception(tmp_path, sample_gif):
          mock.patch("subprocess.run", side_effect=Exception("boom")):
         with pytest.raises(GifOptimizationError):
             optimize_gif_lossy(src, output_path=str(tmp_path / "x.gif"), lossy=200)
-
-
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_pillow_fallback_keeps_palette_frames_that_fit(tmp_path, sample_gif):
+    from PIL import Image
+
+    converted = []
+    original = Image.Image.convert
+    with mock.patch("src.core.gif_optimizer.is_gifsicle_available", return_value=False), \
+         mock.patch.object(
+             Image.Image, "convert",
+             lambda self, mode=None, *a, **k: converted.append(self.mode) or original(self, mode, *a, **k),
+         ):
+        optimize_gif_lossy(sample_gif, output_path=str(tmp_path / "a.gif"))
+        assert converted[0] == "RGB"  # first (P) frame reused as is
+        converted.clear()
+        optimize_gif_lossy(sample_gif, output_path=str(tmp_path / "b.gif"), colors=2)
+        assert converted[0] == "P"  # too many colours: requantized
+
+    with Image.open(tmp_path / "a.gif") as a, Image.open(sample_gif) as src:
+        assert a.n_frames == src.n_frames
+        assert a.convert("RGB").tobytes() == src.convert("RGB").tobytes()
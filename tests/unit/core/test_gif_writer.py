@@ -0,0 +1,83 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.gif_writer import encode_gif, read_frame_delays
+
+
+def _read_frames(data):
+    frames = []
+    with Image.open(io.BytesIO(data)) as gif:
+        for i in range(gif.n_frames):
+            gif.seek(i)
+            frames.append((np.asarray(gif.convert("RGB")), gif.info.get("duration")))
+    return frames
+
+
+@pytest.mark.parametrize("n_colors", [2, 5, 256])
+@pytest.mark.parametrize("shape", [(1, 1), (9, 7), (130, 140)])
+def test_encode_gif_round_trips_through_pillow(n_colors, shape):
+    rng = np.random.default_rng(n_colors)
+    palette = rng.integers(0, 256, size=(n_colors, 3), dtype=np.uint8)
+    noise = rng.integers(0, n_colors, size=shape, dtype=np.uint8)  # forces table resets
+    stripes = (np.arange(shape[0] * shape[1]) % n_colors).astype(np.uint8).reshape(shape)
+
+    data = encode_gif(
+        [(noise, palette.tobytes(), None), (stripes, palette.tobytes(), None)],
+        durations=[100, 40],
+    )
+
+    (first, d1), (second, d2) = _read_frames(data)
+    assert np.array_equal(first, palette[noise])
+    assert np.array_equal(second, palette[stripes])
+    assert (d1, d2) == (100, 40)
+
+
+def test_encode_gif_local_palette_and_transparency():
+    red = bytes((255, 0, 0, 0, 0, 0))
+    blue = bytes((0, 0, 255, 0, 0, 0))
+    idx = np.zeros((4, 4), dtype=np.uint8)
+    idx[0, 0] = 1
+
+    data = encode_gif([(idx, red, 1), (idx, blue, 1)], durations=[100, 100], loop=3)
+
+    with Image.open(io.BytesIO(data)) as gif:
+        assert gif.info["loop"] == 3
+        assert gif.info["transparency"] == 1
+        gif.seek(1)
+        assert gif.convert("RGBA").getpixel((1, 1)) == (0, 0, 255, 255)
+        assert gif.convert("RGBA").getpixel((0, 0))[3] == 0
+
+
+def test_encode_gif_rejects_empty_input():
+    with pytest.raises(ValueError):
+        encode_gif([], durations=[])
+
+
+def test_read_frame_delays_matches_pillow():
+    rng = np.random.default_rng(0)
+    frames = [
+        Image.fromarray(rng.integers(0, 256, size=(40, 30, 3), dtype=np.uint8))
+        for _ in range(3)
+    ]
+    buf = io.BytesIO()
+    frames[0].save(buf, format="GIF", save_all=True, append_images=frames[1:],
+                   duration=[30, 70, 120], loop=0)
+    data = buf.getvalue()
+
+    assert read_frame_delays(data) == [d for _, d in _read_frames(data)] == [30, 70, 120]
+    # A missing trailer still yields every complete frame
+    assert read_frame_delays(data[:-1]) == [30, 70, 120]
+
+
+def test_read_frame_delays_without_control_extension():
+    buf = io.BytesIO()
+    Image.new("P", (4, 4)).save(buf, format="GIF")  # single frame, no GCE
+    assert read_frame_delays(buf.getvalue(), default=100) == [100]
+
+    with pytest.raises(ValueError):
+        read_frame_delays(b"PNG\x00")
+    with pytest.raises(ValueError):
+        read_frame_delays(buf.getvalue()[:20])
@@ -73,3 +73,108 @@ def test_material_manager_get_material_out_of_bounds(rgb_image_small):
     assert mm.get_material(1) is None  # only index 0 exists
 
 
+def test_split_into_tiles_matches_crop_order():
+    img = Image.new('RGBA', (9, 4), (0, 0, 0, 255))
+    for x in range(9):
+        for y in range(4):
+            img.putpixel((x, y), (x * 20, y * 50, 0, 255))
+
+    row_tiles = ImageLoader.split_into_tiles(img, rows=2, cols=4)
+    col_tiles = ImageLoader.split_into_tiles(img, rows=2, cols=4, row_base=False)
+
+    assert row_tiles[1].tobytes() == img.crop((2, 0, 4, 2)).tobytes()
+    assert row_tiles[4].tobytes() == img.crop((0, 2, 2, 4)).tobytes()
+    assert col_tiles[1].tobytes() == img.crop((0, 2, 2, 4)).tobytes()
+    assert col_tiles[2].tobytes() == img.crop((2, 0, 4, 2)).tobytes()
+
+
+def test_split_into_tiles_palette_image_falls_back_to_crop():
+    img = Image.new('RGBA', (8, 6), (5, 6, 7, 255)).convert('P')
+    tiles = ImageLoader.split_into_tiles(img, rows=3, cols=4)
+    assert len(tiles) == 12
+    assert all(t.mode == 'P' and t.size == (2, 2) for t in tiles)
+
+
+def test_material_manager_array_materials():
+    import numpy as np
+
+    mm = MaterialManager()
+    arr = np.zeros((3, 5, 4), dtype=np.uint8)
+    arr[..., 0] = 200
+    arr[..., 3] = 255
+    mm.add_material_array(arr, "tile")
+    mm.add_material(Image.new("RGB", (2, 2), (1, 2, 3)))
+
+    img, name = mm.get_material(0)
+    assert name == "tile"
+    assert img.mode == "RGBA" and img.size == (5, 3)
+    assert img.getpixel((0, 0)) == (200, 0, 0, 255)
+    assert np.array_equal(mm.get_material_array(0), arr)
+    assert mm.get_material_array(1)[0, 0].tolist() == [1, 2, 3, 255]
+    assert mm.get_material_array(2) is None
+
+    mm.remove_material(0)
+    assert mm.get_material_array(0).shape == (2, 2, 4)
+
+
+def test_material_manager_keeps_fields_in_parallel_lists(rgb_image_small):
+    mm = MaterialManager()
+    mm.add_material(rgb_image_small, "a", duration=40)
+    mm.add_material(rgb_image_small, "b", duration=60)
+    mm.remove_material(0)
+
+    assert mm.names == ["b"] and mm.durations == [60]
+    assert mm.get_images() == mm.images and mm.get_images() is not mm.images
+    assert mm.get_all_materials() == [(mm.images[0], "b")]
+
+
+def test_load_gif_frames_are_independent_rgba(tmp_path):
+    path = tmp_path / "p.gif"
+    frames = [Image.new("P", (2, 2), i) for i in range(2)]
+    for frame in frames:
+        frame.putpalette([255, 0, 0, 0, 0, 255])
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=[30, 70])
+
+    loaded = ImageLoader.load_gif_frames(str(path))
+
+    assert [img.mode for img, _ in loaded] == ["RGBA", "RGBA"]
+    assert [d for _, d in loaded] == [30, 70]
+    assert loaded[0][0].getpixel((0, 0)) == (255, 0, 0, 255)
+    assert loaded[1][0].getpixel((0, 0)) == (0, 0, 255, 255)
+    assert loaded[0][0].getpixel((0, 0)) == (255, 0, 0, 255)
+
+
+def test_material_manager_invalidate_rebuilds_array():
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (2, 2), (1, 2, 3, 255)))
+    first = mm.get_material_array(0)
+    assert mm.get_material_array(0) is first
+
+    mm.images[0].putpixel((0, 0), (9, 9, 9, 255))
+    mm.invalidate(0)
+    mm.invalidate(5)
+    assert mm.get_material_array(0)[0, 0].tolist() == [9, 9, 9, 255]
+
+
+def test_material_manager_replaced_image_gets_a_fresh_array():
+    import numpy as np
+
+    mm = MaterialManager()
+    mm.add_material_array(np.full((2, 2, 4), (255, 0, 0, 255), dtype=np.uint8))
+    mm.images[0] = Image.new("RGBA", (2, 2), (0, 0, 255, 255))
+
+    assert mm.get_material_array(0)[0, 0].tolist() == [0, 0, 255, 255]
+
+
+def test_add_material_array_copies_the_input():
+    import numpy as np
+
+    a = np.zeros((2, 2, 4), dtype=np.uint8)
+    mm = MaterialManager()
+    mm.add_material_array(a)
+    a[0, 0] = 255
+
+    stored = mm.get_material_array(0)
+    assert stored is not a and not stored.flags.writeable
+    assert stored[0, 0].tolist() == [0, 0, 0, 0]
+    assert mm.images[0].getpixel((0, 0)) == (0, 0, 0, 0)
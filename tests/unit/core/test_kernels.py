@@ -0,0 +1,72 @@
+import numpy as np
+
+from src.core import _kernels
+
+
+def test_alpha_over_blends_onto_background():
+    rgba = np.array([[[200, 100, 0, 255], [200, 100, 0, 0], [200, 100, 0, 128]]], dtype=np.uint8)
+    bg = np.array([0, 0, 255], dtype=np.uint16)
+
+    out = _kernels.alpha_over(rgba, bg)
+
+    assert out.dtype == np.uint8 and out.shape == (1, 3, 3)
+    assert out[0, 0].tolist() == [200, 100, 0]
+    assert out[0, 1].tolist() == [0, 0, 255]
+    assert out[0, 2].tolist() == [100, 50, 127]
+
+
+def test_alpha_over_matches_numpy_reference():
+    rng = np.random.default_rng(0)
+    rgba = rng.integers(0, 256, size=(17, 9, 4), dtype=np.uint8)
+    bg = np.array([12, 200, 99], dtype=np.uint16)
+
+    assert np.array_equal(_kernels.alpha_over(rgba, bg), _kernels._alpha_over_numpy(rgba, bg))
+
+
+def test_pil_alpha_over_matches_numpy_reference_for_every_value():
+    # Every (colour, alpha) pair over a dark and a light background
+    value, alpha = np.meshgrid(np.arange(256), np.arange(256), indexing="ij")
+    rgba = np.stack([value, 255 - value, value, alpha], axis=-1).astype(np.uint8)
+
+    for bg in (np.array([0, 7, 255]), np.array([255, 128, 1])):
+        assert np.array_equal(_kernels._alpha_over_pil(rgba, bg), _kernels._alpha_over_numpy(rgba, bg))
+
+
+def test_chroma_key_matches_numpy_reference_on_a_frame_stack():
+    rng = np.random.default_rng(1)
+    stack = rng.integers(0, 256, size=(3, 11, 7, 4), dtype=np.uint8)
+    stack[..., :3][stack[..., 0] < 60] = (20, 200, 20)
+    expected = stack.copy()
+    _kernels._chroma_key_numpy(expected, (20, 200, 20), 40)
+
+    _kernels.chroma_key(stack, (20, 200, 20), 40)
+
+    assert np.array_equal(stack, expected)
+    assert (stack[..., 3] == 0).any()
+
+
+def test_chroma_key_numpy_is_exact_euclidean_threshold():
+    rng = np.random.default_rng(2)
+    rgba = rng.integers(0, 256, size=(64, 64, 4), dtype=np.uint8)
+    key = (30, 220, 40)
+    dist_sq = ((rgba[..., :3].astype(np.int32) - key) ** 2).sum(-1)
+    expected = np.where(dist_sq <= 90 * 90, 0, rgba[..., 3])
+
+    _kernels._chroma_key_numpy(rgba, key, 90)
+
+    assert np.array_equal(rgba[..., 3], expected)
+
+
+def test_lzw_compress_matches_python_reference():
+    rng = np.random.default_rng(2)
+    for n_colors, shape in ((2, (1, 1)), (4, (9, 7)), (256, (130, 140))):
+        min_code_size = max(2, (n_colors - 1).bit_length())
+        for indices in (
+            rng.integers(0, n_colors, size=shape, dtype=np.uint8),  # forces table resets
+            (np.arange(shape[0] * shape[1]) % n_colors).astype(np.uint8),
+            np.zeros(shape, dtype=np.uint8),
+        ):
+            data = indices.tobytes()
+            assert _kernels.lzw_compress(data, min_code_size) == _kernels._lzw_compress_python(
+                data, min_code_size
+            )
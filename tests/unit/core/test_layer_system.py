@@ -0,0 +1,218 @@
+from PIL import Image
+
+from src.core.image_loader import MaterialManager
+from src.core.layer_system import Layer, LayerCompositor, LayeredFrame
+
+
+def test_apply_to_image_scales_alpha_by_opacity():
+    src = Image.new("RGBA", (2, 2), (10, 20, 30, 200))
+
+    out = Layer(material_index=0, opacity=0.5).apply_to_image(src)
+
+    assert out.getpixel((0, 0)) == (10, 20, 30, 100)
+    assert src.getpixel((0, 0)) == (10, 20, 30, 200)
+
+
+def test_apply_to_image_without_transforms_does_not_copy():
+    src = Image.new("RGBA", (2, 2), (10, 20, 30, 200))
+
+    assert Layer(material_index=0).apply_to_image(src) is src
+
+
+def test_apply_to_image_failure_returns_source_without_copy(monkeypatch):
+    import src.core.layer_system as layer_system
+
+    def fail(*args, **kwargs):
+        raise MemoryError
+
+    monkeypatch.setattr(layer_system, "resize_rgba", fail)
+    src = Image.new("RGBA", (4, 4), (10, 20, 30, 200))
+
+    assert Layer(material_index=0, scale=0.5).apply_to_image(src) is src
+    assert Layer(material_index=0, scale=0.5).apply_to_image(src.convert("RGB")).mode == "RGBA"
+
+
+def test_composite_frame_skips_layers_hidden_by_opaque_cover(monkeypatch):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (4, 4), (255, 0, 0, 255)), name="bottom")
+    mm.add_material(Image.new("RGBA", (4, 4), (0, 0, 255, 255)), name="cover")
+    mm.add_material(Image.new("RGBA", (2, 2), (0, 255, 0, 128)), name="top")
+    frame = LayeredFrame(layers=[
+        Layer(material_index=0),
+        Layer(material_index=1),
+        Layer(material_index=2, x=1, y=1),
+    ])
+
+    pasted = []
+    original = Image.Image.paste
+    monkeypatch.setattr(
+        Image.Image, "paste",
+        lambda self, im, *a, **k: pasted.append(im) or original(self, im, *a, **k),
+    )
+    out = LayerCompositor.composite_frame(frame, mm, (4, 4))
+
+    assert len(pasted) == 2
+    assert out.getpixel((0, 0)) == (0, 0, 255, 255)
+    assert out.getpixel((1, 1))[1] > 0
+
+
+def test_composite_frame_starts_from_template_copy():
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (2, 2), (0, 255, 0, 255)), name="a")
+    template = Image.new("RGB", (4, 4), (9, 9, 9))
+
+    out = LayerCompositor.composite_frame(
+        LayeredFrame(layers=[Layer(material_index=0)]), mm, (4, 4), mode="RGB", template=template
+    )
+
+    assert out.mode == "RGB"
+    assert out.getpixel((0, 0)) == (0, 255, 0)
+    assert out.getpixel((3, 3)) == (9, 9, 9)
+    assert template.getpixel((0, 0)) == (9, 9, 9)
+
+
+def test_composite_frame_cache_reuses_transformed_layers(monkeypatch):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (8, 8), (255, 0, 0, 255)), name="a")
+    frames = [
+        LayeredFrame(layers=[Layer(material_index=0, x=x, scale=0.5)]) for x in range(3)
+    ]
+    calls = []
+    original = Layer.apply_to_image
+    monkeypatch.setattr(
+        Layer, "apply_to_image", lambda self, img: calls.append(1) or original(self, img)
+    )
+
+    cache = {}
+    outs = [LayerCompositor.composite_frame(f, mm, (8, 8), cache=cache) for f in frames]
+
+    assert len(calls) == 1
+    assert outs[2].getpixel((2, 0)) == (255, 0, 0, 255)
+    assert outs[2].getpixel((1, 0))[3] == 0
+
+
+def test_transform_key_ignores_no_op_differences():
+    base = LayerCompositor._transform_key(Layer(material_index=0, opacity=0.5))
+
+    assert LayerCompositor._transform_key(
+        Layer(material_index=0, crop_x=3, scale=1.0004, opacity=0.5001)
+    ) == base
+    assert LayerCompositor._transform_key(Layer(material_index=0, opacity=0.51)) != base
+    assert LayerCompositor._transform_key(Layer(material_index=0, scale=0.5)) != (
+        LayerCompositor._transform_key(Layer(material_index=0))
+    )
+
+
+def test_composite_frame_pastes_opaque_layers_without_mask(monkeypatch):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (2, 2), (255, 0, 0, 255)), name="opaque")
+    mm.add_material(Image.new("RGBA", (2, 2), (0, 0, 255, 128)), name="translucent")
+    frame = LayeredFrame(layers=[Layer(material_index=0), Layer(material_index=1, x=1)])
+
+    masks = []
+    original = Image.Image.paste
+    monkeypatch.setattr(
+        Image.Image, "paste",
+        lambda self, im, box=None, mask=None: masks.append(mask) or original(self, im, box, mask),
+    )
+    out = LayerCompositor.composite_frame(frame, mm, (4, 2), background_color=(0, 0, 0, 0))
+
+    assert masks[0] is None and masks[1] is not None
+    assert out.getpixel((0, 0)) == (255, 0, 0, 255)
+    assert out.getpixel((1, 0))[2] > 0 and out.getpixel((1, 0))[0] > 0
+
+
+def test_composite_frame_skips_off_canvas_layers(monkeypatch):
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (2, 2), (255, 0, 0, 128)), name="a")
+    frame = LayeredFrame(layers=[
+        Layer(material_index=0, x=4),
+        Layer(material_index=0, x=-2, y=1),
+        Layer(material_index=0, x=-1, y=-1),
+    ])
+
+    pasted = []
+    original = Image.Image.paste
+    monkeypatch.setattr(
+        Image.Image, "paste",
+        lambda self, im, *a, **k: pasted.append(a[0]) or original(self, im, *a, **k),
+    )
+    applied = []
+    original_apply = Layer.apply_to_image
+    monkeypatch.setattr(
+        Layer, "apply_to_image", lambda self, img: applied.append(self.x) or original_apply(self, img)
+    )
+    out = LayerCompositor.composite_frame(frame, mm, (4, 4))
+
+    assert pasted == [(-1, -1)] and applied == [-1]
+    assert out.getpixel((0, 0))[0] > 0 and out.getpixel((1, 1))[3] == 0
+
+
+def test_layer_records_use_slots_and_still_pickle():
+    import pickle
+    import sys
+
+    import pytest
+
+    if sys.version_info < (3, 10):
+        pytest.skip("dataclass slots need Python 3.10")
+    frame = LayeredFrame(layers=[Layer(material_index=2, x=3, opacity=0.5)], duration=70)
+
+    assert not hasattr(frame.layers[0], "__dict__") and not hasattr(frame, "__dict__")
+    restored = pickle.loads(pickle.dumps(frame))
+    assert restored == frame and restored.layers[0].name == "Layer 2"
+
+
+def test_output_size_matches_apply_to_image():
+    src = Image.new("RGBA", (10, 7))
+    layers = [
+        Layer(material_index=0),
+        Layer(material_index=0, scale=0.33),
+        Layer(material_index=0, crop_x=8, crop_y=2, crop_width=5, crop_height=3, scale=2.5),
+        Layer(material_index=0, crop_x=20, crop_width=4, crop_height=40),
+        Layer(material_index=0, crop_width=0, crop_height=3, scale=0.01),
+    ]
+
+    for layer in layers:
+        assert layer.output_size(src.size) == layer.apply_to_image(src).size
+
+
+def test_composite_frame_without_visible_layers_shares_background():
+    mm = MaterialManager()
+    mm.add_material(Image.new("RGBA", (2, 2), (255, 0, 0, 255)), name="a")
+    empty = LayeredFrame(layers=[])
+    hidden = LayeredFrame(layers=[Layer(material_index=0, visible=False), Layer(material_index=5)])
+
+    first = LayerCompositor.composite_frame(empty, mm, (4, 3), (1, 2, 3, 255), "RGB")
+    assert first.mode == "RGB" and first.size == (4, 3) and first.getpixel((0, 0)) == (1, 2, 3)
+    assert LayerCompositor.composite_frame(hidden, mm, (4, 3), (1, 2, 3, 255), "RGB") is first
+
+    template = Image.new("RGBA", (4, 3))
+    assert LayerCompositor.composite_frame(empty, mm, (4, 3), template=template) is template
+
+
+def test_layered_frame_copy_shares_immutable_layers():
+    import dataclasses
+
+    import pytest
+
+    frame = LayeredFrame(layers=[Layer(material_index=0), Layer(material_index=1, x=2)], duration=40)
+    dup = frame.copy()
+
+    assert dup == frame and dup.layers is not frame.layers
+    assert dup.layers[1] is frame.layers[1]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        dup.layers[1].x = 5
+
+    dup.layers[1] = dataclasses.replace(dup.layers[1], x=5)
+    assert frame.layers[1].x == 2 and dup.layers[1].name == "Layer 1"
+
+
+def test_crop_and_scale_do_not_bleed_neighbouring_pixels():
+    sheet = Image.new("RGBA", (20, 10), (255, 0, 0, 255))
+    sheet.paste((0, 0, 255, 255), (10, 0, 20, 10))
+
+    out = Layer(material_index=0, crop_width=10, crop_height=10, scale=0.5).apply_to_image(sheet)
+
+    assert out.size == (5, 5)
+    assert all(out.getpixel((x, 2)) == (255, 0, 0, 255) for x in range(5))
@@ -1,7 +1,7 @@
 """Unit tests for src/core/layer_timeline.py"""
 
 import pytest
-from src.core.layer_timeline import LayerTimelineEditor, LayerFrame, LayerTrack
+from src.core.layer_timeline import EMPTY_FRAME, LayerTimelineEditor, LayerFrame, LayerTrack
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -44,6 +44,28 @@ class TestAddLayerTracks:
         assert frame.x == 0 and frame.y == 0
 
 
+class TestEmptyFrame:
+    def test_blank_slots_share_the_read_only_placeholder(self):
+        ed = _make_editor(n_tracks=2, n_frames=3)
+        ed.insert_timebase_frames(1, 2)
+        ed.duplicate_timebase_frame(0)
+        assert all(f is EMPTY_FRAME for t in ed.layer_tracks for f in t.frames)
+        assert EMPTY_FRAME == LayerFrame() and LayerFrame() == EMPTY_FRAME
+        with pytest.raises(AttributeError):
+            ed.layer_tracks[0].frames[0].x = 5
+
+    def test_placeholder_survives_copy_and_pickle(self):
+        import copy
+        import pickle
+
+        ed = _make_editor(n_tracks=1, n_frames=2)
+        ed.layer_tracks[0].frames[1] = LayerFrame(material_index=3, x=1)
+        restored = pickle.loads(pickle.dumps(ed))
+        assert restored.layer_tracks[0].frames[0] is EMPTY_FRAME
+        assert restored.layer_tracks[0].frames[1] == LayerFrame(material_index=3, x=1)
+        assert copy.deepcopy(ed).layer_tracks[0].frames[0] is EMPTY_FRAME
+
+
 class TestRemoveLayerTrack:
     def test_remove_middle_track(self):
         ed = _make_editor(n_tracks=3, n_frames=0)
@@ -114,6 +136,27 @@ class TestTimebase:
         ed.remove_timebase_frames([1, 3])
         assert ed.get_frame_count() == 3
 
+    def test_insert_and_remove_keep_tracks_aligned(self):
+        ed = _make_editor(n_tracks=2, n_frames=3)
+        for i in range(3):
+            ed.layer_tracks[1].frames[i] = LayerFrame(material_index=i)
+        ed.insert_timebase_frames(1, 2, duration_ms=40)
+        assert ed.durations_ms == [100, 40, 40, 100, 100]
+        assert [f.material_index for f in ed.layer_tracks[1].frames] == [0, None, None, 1, 2]
+
+        ed.remove_timebase_frames([3, 0, 3, 99])
+        assert ed.durations_ms == [40, 40, 100]
+        assert [f.material_index for f in ed.layer_tracks[1].frames] == [None, None, 2]
+        assert len(ed.layer_tracks[0].frames) == 3
+
+    def test_remove_keeps_frames_past_the_timebase(self):
+        ed = _make_editor(n_tracks=1, n_frames=2)
+        ed.ensure_track_length(0, 4)
+        ed.layer_tracks[0].frames[3] = LayerFrame(material_index=7)
+        ed.remove_timebase_frames([0])
+        assert ed.get_frame_count() == 1
+        assert [f.material_index for f in ed.layer_tracks[0].frames] == [None, None, 7]
+
     def test_remove_all_frames_leaves_empty(self):
         ed = _make_editor(n_tracks=1, n_frames=3)
         ed.remove_timebase_frames([0, 1, 2])
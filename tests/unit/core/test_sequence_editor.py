@@ -35,3 +35,21 @@ def test_set_durations_and_export():
     assert se.export_durations() == [10, 10, 10]
 
 
+def test_repeat_sequence_keeps_frames_independent():
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([1, 2], duration=50)
+    se.repeat_sequence(0)
+    assert se.export_pattern() == [1, 2]
+    se.repeat_sequence(3)
+    assert se.export_pattern() == [1, 2, 1, 2, 1, 2]
+
+    se.set_frame_duration(2, 200)
+    assert se.export_durations() == [50, 50, 200, 50, 50, 50]
+
+
+def test_iter_frames_walks_the_live_list():
+    se = SequenceEditor()
+    se.set_sequence_from_pattern([4, 5], duration=30)
+
+    assert [f.material_index for f in se.iter_frames()] == [4, 5]
+    assert next(se.iter_frames()) is se[0]
@@ -9,7 +9,7 @@ from src.core.template_manager import TemplateManager, FORMAT, VERSION
 from src.core.group_manager import GroupManager
 from src.core.composition_group import (
     CompositionGroup, FrameEntry, SubGroupEntry, LayerBlockEntry,
-    FrameSlot, GroupSlot,
+    FrameSlot, GroupSlot, entry_from_dict, entry_to_dict,
 )
 
 
@@ -115,6 +115,56 @@ def test_save_load_file(tmp_path):
     assert len(loaded["groups"]) == 2
 
 
+def test_save_load_file_with_and_without_orjson(tmp_path, monkeypatch):
+    import src.core.template_manager as template_manager
+
+    tpl = TemplateManager.export_composition_template(_make_gm())
+    tpl["settings"]["note"] = "精靈 ✓"
+    tpl["mapping"] = {3: 1}
+    expected = json.loads(json.dumps(tpl))  # int keys become strings, as in any JSON
+
+    orjson = template_manager.orjson
+    for writer in {orjson, None}:
+        for reader in {orjson, None}:
+            path = tmp_path / "template.json"
+            monkeypatch.setattr(template_manager, "orjson", writer)
+            TemplateManager.save_template_to_file(tpl, str(path))
+            monkeypatch.setattr(template_manager, "orjson", reader)
+            assert TemplateManager.load_template_from_file(str(path)) == expected
+            assert "精靈" in path.read_text(encoding="utf-8")
+
+
+def test_import_can_release_group_data(tmp_path):
+    tpl = TemplateManager.export_composition_template(_make_gm())
+    path = str(tmp_path / "template.json")
+    TemplateManager.save_template_to_file(tpl, path)
+
+    loaded = TemplateManager.load_template_from_file(path)
+    gm, settings = TemplateManager.import_composition_template(
+        loaded, {0: 5}, release_groups=True
+    )
+
+    assert loaded["groups"] == [] and loaded["format"] == FORMAT
+    expected, _ = TemplateManager.import_composition_template(tpl, {0: 5})
+    assert gm.groups == expected.groups
+    assert gm.get_root_group_id() == expected.get_root_group_id()
+    assert settings == tpl["settings"]
+
+
+def test_batch_template_job_pickles_slotted_entries():
+    import pickle
+
+    gm = _make_gm()
+    gm2, _ = TemplateManager.import_composition_template(
+        pickle.loads(pickle.dumps(TemplateManager.export_composition_template(gm)))
+    )
+    restored = pickle.loads(pickle.dumps(gm2))
+
+    assert TemplateManager.export_composition_template(restored) == (
+        TemplateManager.export_composition_template(gm)
+    )
+
+
 # ── get_template_info ─────────────────────────────────────────────────────────
 
 def test_get_template_info():
@@ -128,6 +178,21 @@ def test_get_template_info():
     assert isinstance(info["unique_material_indices"], list)
 
 
+def test_get_template_info_follows_in_place_edits():
+    tpl = TemplateManager.export_composition_template(_make_gm())
+    assert TemplateManager.get_template_info(tpl)["materials_needed"] == 4
+
+    for group in tpl["groups"]:
+        for entry in group["entries"]:
+            if entry["type"] == "frame":
+                entry["material_index"] = 99
+    info = TemplateManager.get_template_info(tpl)
+    assert info["materials_needed"] == TemplateManager.estimate_required_tiles(tpl) == 100
+
+    tpl["groups"][0]["entries"].append({"type": "subgroup", "group_id": 1})
+    assert TemplateManager.get_template_info(tpl)["total_subgroup_entries"] == info["total_subgroup_entries"] + 1
+
+
 def test_get_template_info_wrong_format():
     with pytest.raises(ValueError, match="Unsupported"):
         TemplateManager.get_template_info({"format": "old_format", "version": "3.0"})
@@ -179,3 +244,33 @@ def test_import_with_material_mapping():
     assert root2.entries[2].timelines[1][0].material_index == 12
     sub2 = gm2.groups[1]
     assert sub2.entries[0].material_index == 13
+
+
+def test_import_with_partial_and_identity_mapping():
+    gm = _make_gm()
+    tpl = TemplateManager.export_composition_template(gm)
+    # 0 and 3 swap, 1 maps to itself, 2 is not mentioned
+    mapping = {0: 3, 1: 1, 3: 0}
+    gm2, _ = TemplateManager.import_composition_template(tpl, material_index_mapping=mapping)
+    root2 = gm2.groups[0]
+    assert root2.entries[0].material_index == 3
+    assert root2.entries[2].timelines[0][0].material_index == 1
+    assert root2.entries[2].timelines[1][0].material_index == 2
+    assert gm2.groups[1].entries[0].material_index == 0
+
+    gm3, _ = TemplateManager.import_composition_template(tpl, material_index_mapping={1: 1})
+    assert gm3.groups[0].entries[0].material_index == 0
+
+
+def test_entry_dict_round_trip_keeps_every_field():
+    entries = [
+        FrameEntry(material_index=3, x=1, y=2, duration_ms=40),
+        SubGroupEntry(group_id=2, loop_count=3, x=4, y=5, duration_override_ms=60),
+        LayerBlockEntry(
+            timelines=[[FrameSlot(material_index=7, x=8, y=9)],
+                       [GroupSlot(group_id=1, loop_count=2, x=3, y=4)]],
+            default_duration_ms=70,
+        ),
+    ]
+    for entry in entries:
+        assert entry_from_dict(entry_to_dict(entry)) == entry
@@ -1,6 +1,7 @@
+import numpy as np
 from PIL import Image
 import pytest
-from src.core.utils import ensure_rgba, resize_image, create_background, paste_center, validate_image_file
+from src.core.utils import ensure_rgba, resize_image, resize_rgba, create_background, paste_center, paste_center_inplace, validate_image_file
 
 
 def test_ensure_rgba_converts_from_rgb(rgb_image_small):
@@ -14,6 +15,15 @@ def test_ensure_rgba_noop_when_already_rgba(rgba_image_small):
     assert out.size == rgba_image_small.size
 
 
+def test_ensure_rgba_returns_rgba_images_themselves(tmp_path):
+    path = tmp_path / 'a.png'
+    Image.new('RGBA', (2, 2)).save(path)
+    with Image.open(path) as opened:
+        opened.load()
+        for img in (Image.new('RGBA', (2, 2)), Image.new('RGB', (2, 2)).convert('RGBA'), opened):
+            assert ensure_rgba(img) is img
+
+
 def test_resize_image_keep_aspect(rgb_image_small):
     out = resize_image(rgb_image_small.copy(), (4, 4), keep_aspect=True)
     assert out.size[0] <= 4 and out.size[1] <= 4
@@ -39,6 +49,18 @@ def test_paste_center_positions():
     assert out.getpixel((5, 5))[3] > 0
 
 
+def test_paste_center_copies_and_inplace_variant_does_not():
+    bg = create_background((6, 6), (0, 0, 255, 255))
+    fg = Image.new('RGBA', (2, 2), (255, 0, 0, 255))
+
+    out = paste_center(bg, fg)
+    assert out is not bg
+    assert bg.getpixel((3, 3)) == (0, 0, 255, 255)
+
+    assert paste_center_inplace(bg, fg) is bg
+    assert bg.tobytes() == out.tobytes()
+
+
 def test_resize_image_keep_aspect_is_non_destructive():
     """resize_image with keep_aspect=True must not modify the original image."""
     original = Image.new('RGBA', (10, 6), (100, 150, 200, 255))
@@ -52,3 +74,16 @@ def test_validate_image_file(make_temp_image):
     assert validate_image_file(p) is True
 
 
+def test_resize_rgba_matches_pillow_for_opaque_and_transparent_images():
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 256, size=(30, 40, 4), dtype=np.uint8)
+    for alpha in (255, None):
+        if alpha is not None:
+            arr[..., 3] = alpha
+        else:
+            arr[0, 0, 3] = 7
+        img = Image.fromarray(arr, 'RGBA')
+        for size in ((17, 11), (80, 61)):
+            out = resize_rgba(img, size, Image.Resampling.LANCZOS)
+            assert out.mode == 'RGBA'
+            assert out.tobytes() == img.resize(size, Image.Resampling.LANCZOS).tobytes()